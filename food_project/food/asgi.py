@@ -3,6 +3,11 @@ ASGI config for food project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Run it with an ASGI server (e.g. ``uvicorn food.asgi:application``) so the
+async views in ``food_app.async_views`` (recommendations, streaming
+recommendations, image prediction, meals) do not hold a worker thread while
+waiting on the LLM, the inference server or the database.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
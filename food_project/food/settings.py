@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,6 +52,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # 제일 위쪽에 두는 걸 추천
+    "food_app.tracing.tracing_middleware",  # 구간별 소요 시간 → Server-Timing 헤더 (TRACING_ENABLED)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -111,6 +113,25 @@ DATABASES = {
 }
 
 
+# Cache
+# default: 프로세스별 메모리 캐시
+# shared:  같은 서버의 여러 워커/관리 명령이 공유하는 작은 값(음식 카탈로그 버전 등)
+#          여러 서버로 운영하면 Redis 등 공유 캐시로 교체하세요.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, '.cache'),
+        # 카탈로그 버전 등은 만료되면 안 되므로 기본값 없음 (필요한 값만 timeout을 지정)
+        'TIMEOUT': None,
+    },
+}
+FOOD_CATALOG_CACHE_ALIAS = os.getenv('FOOD_CATALOG_CACHE_ALIAS', 'shared')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -155,3 +176,117 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+# 비워두면 OpenAI 기본 주소. 테스트 시 로컬 스텁 서버 사용: python manage.py run_llm_stub → http://127.0.0.1:8001/v1
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', '')
+
+# --- 이미지 분류(ConvNeXt) 추론 설정 ---
+# 한 장의 사진에서 탐지된 crop들을 몇 개씩 묶어서 분류할지 (배치 크기 상한)
+CLASSIFIER_BATCH_SIZE = int(os.getenv('CLASSIFIER_BATCH_SIZE', 16))
+
+# --- 추론 서버 설정 (python manage.py run_inference_server) ---
+# 'host:port' 또는 유닉스 소켓 경로. 비워두면 웹 워커 안에서 직접 추론합니다. (개발용)
+INFERENCE_SERVER_ADDRESS = os.getenv('INFERENCE_SERVER_ADDRESS', '')
+# 서버/클라이언트가 pickle로 주고받으므로 반드시 추측할 수 없는 값으로 설정 (기본값 없음)
+INFERENCE_SERVER_AUTHKEY = os.getenv('INFERENCE_SERVER_AUTHKEY', '')
+if INFERENCE_SERVER_ADDRESS and not INFERENCE_SERVER_AUTHKEY:
+    raise ImproperlyConfigured("INFERENCE_SERVER_ADDRESS를 사용하려면 INFERENCE_SERVER_AUTHKEY를 설정해야 합니다.")
+# 추론 스레드 수 / 대기 큐 크기 (가득 차면 503) / 작업 1건당 제한 시간(초)
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', 1))
+INFERENCE_QUEUE_SIZE = int(os.getenv('INFERENCE_QUEUE_SIZE', 8))
+INFERENCE_JOB_TIMEOUT = float(os.getenv('INFERENCE_JOB_TIMEOUT', 30))
+# async 뷰(/api/predict/)에서 추론(또는 추론 서버 호출)을 실행할 스레드 수. 초과 요청은 이벤트 루프를 막지 않고 대기
+ASYNC_INFERENCE_THREADS = int(os.getenv('ASYNC_INFERENCE_THREADS', 4))
+
+# --- 동시 요청 마이크로 배칭 ---
+# 여러 요청의 이미지를 최대 MICRO_BATCH_MAX_WAIT_MS 동안 모아 YOLO/분류기를 한 번에 실행합니다.
+# 요청을 동시에 처리하는 경우(추론 서버 INFERENCE_WORKERS > 1, 멀티스레드 웹 워커)에만 효과가 있습니다.
+INFERENCE_MICRO_BATCHING = os.getenv('INFERENCE_MICRO_BATCHING', 'false').lower() == 'true'
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv('MICRO_BATCH_MAX_WAIT_MS', 10))
+YOLO_MAX_BATCH_SIZE = int(os.getenv('YOLO_MAX_BATCH_SIZE', 8))
+
+# --- 모델 로딩 ---
+# true면 서버 시작 시 백그라운드에서 모델을 로드하고 더미 추론을 1회 수행합니다.
+# (false면 첫 /api/predict/ 요청 때 로드. 수동 웜업: python manage.py warmup_models)
+WARMUP_MODELS_ON_STARTUP = os.getenv('WARMUP_MODELS_ON_STARTUP', 'false').lower() == 'true'
+
+# 모델 로드 시간, 추론 지연 등 food_app 로그를 콘솔에 출력
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'food_app': {
+            'handlers': ['console'],
+            'level': os.getenv('FOOD_APP_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+# --- 분류기 실행 엔진 ---
+# eager(기본값) | onnx | torchscript  (onnx/torchscript는 먼저 python manage.py export_classifier 실행)
+CLASSIFIER_ENGINE = os.getenv('CLASSIFIER_ENGINE', 'eager')
+CLASSIFIER_EXPORT_DIR = os.getenv('CLASSIFIER_EXPORT_DIR', os.path.join(BASE_DIR, 'checkpoints_convnext_stratified', 'export'))
+# 비워두면 CLASSIFIER_EXPORT_DIR/classifier.onnx 또는 classifier.ts 사용 (int8 모델은 경로를 직접 지정)
+CLASSIFIER_ARTIFACT_PATH = os.getenv('CLASSIFIER_ARTIFACT_PATH', '')
+# ONNX Runtime intra-op 스레드 수 (0이면 ONNX Runtime 기본값)
+CLASSIFIER_NUM_THREADS = int(os.getenv('CLASSIFIER_NUM_THREADS', 0))
+
+# --- /api/predict/ 업로드 이미지 디코딩 (image_decode) ---
+# 파일 크기 / 픽셀 수 상한 (초과 시 413)
+PREDICT_MAX_UPLOAD_BYTES = int(os.getenv('PREDICT_MAX_UPLOAD_BYTES', 15 * 1024 * 1024))
+PREDICT_MAX_IMAGE_PIXELS = int(os.getenv('PREDICT_MAX_IMAGE_PIXELS', 50_000_000))
+# 탐지/분류에 사용할 작업 해상도의 긴 변 (YOLO 입력 640px, 분류기 입력 224px). 응답 bbox는 원본 해상도 기준
+PREDICT_MAX_IMAGE_SIDE = int(os.getenv('PREDICT_MAX_IMAGE_SIDE', 1280))
+
+# --- /api/predict/ 결과 캐시 (같은/거의 같은 사진 재업로드) ---
+# local(프로세스 내 LRU, 기본값) | django(CACHES['PREDICTION_CACHE_ALIAS'] 공유) | none
+PREDICTION_CACHE_BACKEND = os.getenv('PREDICTION_CACHE_BACKEND', 'local')
+PREDICTION_CACHE_ALIAS = os.getenv('PREDICTION_CACHE_ALIAS', 'default')
+PREDICTION_CACHE_TTL = int(os.getenv('PREDICTION_CACHE_TTL', 600))
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv('PREDICTION_CACHE_MAX_ENTRIES', 512))
+# 파일 해시 외에 perceptual hash(dHash)로 거의 같은 사진도 매칭할지, 허용 해밍 거리(local 백엔드)
+# 캐시는 사용자 간에 공유되므로, 같은 휴대폰/조명으로 찍은 다른 음식 사진이 다른 사람의 결과에
+# 적중할 수 있습니다. 기본값은 꺼짐 (같은 파일만 매칭)
+PREDICTION_CACHE_PERCEPTUAL = os.getenv('PREDICTION_CACHE_PERCEPTUAL', 'false').lower() == 'true'
+PREDICTION_CACHE_MAX_DISTANCE = int(os.getenv('PREDICTION_CACHE_MAX_DISTANCE', 4))
+
+# --- 분류 결과 후보/신뢰도 ---
+CLASSIFIER_TOP_K = int(os.getenv('CLASSIFIER_TOP_K', 3))
+# top-1 확률이 이 값보다 낮으면 응답에 low_confidence=true로 표시 (재분류는 하지 않음)
+CLASSIFIER_MIN_CONFIDENCE = float(os.getenv('CLASSIFIER_MIN_CONFIDENCE', 0.5))
+# YOLO 박스 면적이 이미지의 이 비율 이상이면 Crop 대신 원본 이미지 분류 결과를 사용 (박스는 그대로 반환)
+FULL_FRAME_BOX_RATIO = float(os.getenv('FULL_FRAME_BOX_RATIO', 0.9))
+
+# --- /api/recommend-menu/ LLM 응답 캐시 (같은 사용자의 거의 같은 요청) ---
+RECOMMENDATION_CACHE_ENABLED = os.getenv('RECOMMENDATION_CACHE_ENABLED', 'true').lower() == 'true'
+RECOMMENDATION_CACHE_TTL = int(os.getenv('RECOMMENDATION_CACHE_TTL', 600))
+RECOMMENDATION_CACHE_MAX_ENTRIES = int(os.getenv('RECOMMENDATION_CACHE_MAX_ENTRIES', 1024))
+# 쿼리 임베딩 코사인 유사도가 이 값 이상이면 같은 요청으로 간주
+RECOMMENDATION_CACHE_MIN_SIMILARITY = float(os.getenv('RECOMMENDATION_CACHE_MIN_SIMILARITY', 0.92))
+
+# --- 쿼리 임베딩 캐시 (정규화된 쿼리 텍스트 → 임베딩) ---
+QUERY_EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_EMBEDDING_CACHE_MAX_ENTRIES', 2048))
+QUERY_EMBEDDING_CACHE_TTL = int(os.getenv('QUERY_EMBEDDING_CACHE_TTL', 3600))
+
+# --- 유사 음식 검색 벡터 백엔드 ---
+# chroma(기본값, chroma_db_data) | numpy(VECTOR_INDEX_DIR의 .npy 행렬을 mmap, 프로세스 내 코사인 검색)
+VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'chroma')
+VECTOR_INDEX_DIR = os.getenv('VECTOR_INDEX_DIR', os.path.join(BASE_DIR, 'vector_index'))
+# float16이면 인덱스 크기가 절반 (검색 시 float32로 변환)
+VECTOR_INDEX_DTYPE = os.getenv('VECTOR_INDEX_DTYPE', 'float32')
+# IVF 클러스터 수 (0이면 전체 exact 검색) / 검색할 클러스터 수. 카탈로그가 수만 건 이상일 때만 의미 있음
+VECTOR_IVF_LISTS = int(os.getenv('VECTOR_IVF_LISTS', 0))
+VECTOR_IVF_NPROBE = int(os.getenv('VECTOR_IVF_NPROBE', 8))
+# true면 Food 변경 시 웹 프로세스의 백그라운드 스레드가 벡터 인덱스를 증분 동기화 (바뀐 음식만 임베딩)
+# 여러 워커에서 동시에 동기화하지 않도록 인덱싱을 담당할 프로세스에서만 켜세요.
+VECTOR_AUTO_REINDEX = os.getenv('VECTOR_AUTO_REINDEX', 'false').lower() == 'true'
+VECTOR_REINDEX_DEBOUNCE = float(os.getenv('VECTOR_REINDEX_DEBOUNCE', 2))
+# 전체 재인덱싱 시 인코딩 프로세스 수 (1이면 현재 프로세스에서 인코딩) / SentenceTransformer 배치 크기
+VECTOR_INDEX_WORKERS = int(os.getenv('VECTOR_INDEX_WORKERS', 1))
+VECTOR_ENCODE_BATCH_SIZE = int(os.getenv('VECTOR_ENCODE_BATCH_SIZE', 64))
+
+# --- 요청 구간별 소요 시간 측정 (Server-Timing 헤더, /api/metrics) ---
+# false면 미들웨어/DB 쿼리 래퍼를 설치하지 않고 span()도 아무 일도 하지 않습니다.
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
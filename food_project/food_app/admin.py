@@ -1,6 +1,9 @@
 # food_app/admin.py
 from django.contrib import admin
-from .models import UserProfile, Meal, MealItem, Food, Allergen, UserFoodPreference
+from django.utils import timezone
+
+from .models import UserProfile, Meal, MealItem, Food, Allergen, UserFoodPreference, DailyNutritionSummary
+from .nutrition import recalculate_daily_summary, refresh_meal_aggregates
 
 
 @admin.register(UserProfile)
@@ -23,6 +26,15 @@ class MealAdmin(admin.ModelAdmin):
     list_filter = ("created_at",)
     search_fields = ("user__username", "title")
     inlines = [MealItemInline]
+    readonly_fields = ("total_kcal", "total_protein_g", "total_fat_g", "total_carbohydrate_g", "total_sugars_g")
+
+    def save_related(self, request, form, formsets, change):
+        # 항목(inline) 저장 후 식사/일별 영양 합계 갱신
+        super().save_related(request, form, formsets, change)
+        refresh_meal_aggregates(form.instance)
+        # 날짜나 사용자를 바꿨다면 원래 날짜의 요약에서도 이 식사를 빼야 함
+        if change and {'created_at', 'user'} & set(form.changed_data):
+            recalculate_daily_summary(form.initial['user'], timezone.localdate(form.initial['created_at']))
 
 
 @admin.register(MealItem)
@@ -31,6 +43,15 @@ class MealItemAdmin(admin.ModelAdmin):
     search_fields = ("food__representative_name", "meal__user__username")
     autocomplete_fields = ['meal', 'food']
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        refresh_meal_aggregates(obj.meal)
+
+    def delete_model(self, request, obj):
+        meal = obj.meal
+        super().delete_model(request, obj)
+        refresh_meal_aggregates(meal)
+
 
 @admin.register(Food)
 class FoodAdmin(admin.ModelAdmin):
@@ -51,3 +72,10 @@ class UserFoodPreferenceAdmin(admin.ModelAdmin):
     list_filter = ('preference',)
     search_fields = ('user_profile__user__username', 'food__representative_name')
     autocomplete_fields = ['user_profile', 'food']
+
+
+@admin.register(DailyNutritionSummary)
+class DailyNutritionSummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'meal_count', 'total_kcal')
+    list_filter = ('date',)
+    search_fields = ('user__username',)
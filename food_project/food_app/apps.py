@@ -1,6 +1,27 @@
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class FoodAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'food_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (signal 핸들러 등록)
+
+        if settings.TRACING_ENABLED:
+            from django.db.backends.signals import connection_created
+            from .tracing import install_db_wrapper
+
+            # 새 DB 연결마다 쿼리 시간을 요청 트레이스의 "db" 구간으로 기록
+            connection_created.connect(install_db_wrapper, dispatch_uid="food_app_tracing_db")
+
+        # 웹 서버 프로세스에서만 WARMUP_MODELS_ON_STARTUP=true로 설정하세요.
+        # (추론 서버를 쓰는 경우 웹 워커는 모델을 로드하지 않음)
+        if settings.WARMUP_MODELS_ON_STARTUP and not settings.INFERENCE_SERVER_ADDRESS:
+            from .inference import registry
+
+            # 백그라운드에서 로드하므로 서버 시작 자체는 지연되지 않음
+            threading.Thread(target=registry.warmup, name="model-warmup", daemon=True).start()
@@ -0,0 +1,347 @@
+# food_app/async_views.py
+"""
+비동기(ASGI) 뷰: I/O 대기가 긴 엔드포인트 (LLM 추천, 이미지 추론, 식사 기록)
+
+DRF의 @api_view는 async 함수를 지원하지 않으므로 Django 기본 async 뷰로 작성합니다.
+`uvicorn food.asgi:application` 처럼 ASGI 서버로 실행하면 LLM 응답/추론 결과를 기다리는 동안
+워커 스레드를 점유하지 않아, 프로세스 하나가 많은 요청을 동시에 처리할 수 있습니다.
+(WSGI에서도 동작하지만 요청마다 스레드를 점유)
+
+- ORM: Django async API (aget, afirst, ain_bulk, async for)
+- 쓰기/트랜잭션(MealSerializer.save): sync_to_async (요청별 스레드에서 실행)
+- 이미지 디코딩, 임베딩 계산: sync_to_async(thread_sensitive=False)
+- 모델 추론/추론 서버 호출: 전용 스레드 풀 (settings.ASYNC_INFERENCE_THREADS)
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods, require_POST
+from openai import AsyncOpenAI
+
+from . import food_index
+from .image_decode import ImageTooLarge, decode_upload
+from .inference_service import detect, InferenceBusy, InferenceTimeout, InferenceError
+from .models import Meal, UserProfile
+from .recommendation_cache import recommendation_cache
+from .result_cache import prediction_cache, make_key as make_prediction_key
+from .serializers import MealSerializer
+from .tracing import span
+from .views import (
+    NO_CANDIDATES_MESSAGE,
+    RECOMMENDATION_MODEL,
+    aprepare_recommendation,
+    recommendation_messages,
+)
+
+# 추론은 CPU/대기 시간이 길어 기본 스레드 풀(임베딩, 이미지 디코딩 등)을 막지 않도록 따로 실행
+inference_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_INFERENCE_THREADS, thread_name_prefix="async-inference"
+)
+
+
+async def _authenticated_user(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None
+    # 동기 코드(serializer 등)에서 request.user를 읽어도 세션/사용자를 다시 조회하지 않도록
+    request.user = user
+    return user
+
+
+def _unauthenticated_response():
+    return JsonResponse({"detail": "Authentication credentials were not provided."}, status=403)
+
+
+def _request_data(request) -> dict:
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except json.JSONDecodeError:
+            return {}
+    return request.POST
+
+
+def _openai_client() -> AsyncOpenAI:
+    """`async with _openai_client() as client:`로 사용 (요청이 끝나면 httpx 연결을 바로 닫음)"""
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL or None)
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Server-Sent Events 형식의 메시지 한 개"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(events, content_type="text/event-stream; charset=utf-8")
+    response["Cache-Control"] = "no-cache"
+    # nginx 등 리버스 프록시가 응답을 모아두지 않도록
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ============================================
+# RAG 기반 메뉴 추천 API
+# ============================================
+@require_POST
+async def recommend_menu_view(request):
+    """
+    POST /api/recommend-menu/
+    JSON: {"query": "비오는 날 국물 요리"}
+    응답: {"recommendation": "...", "cached": false}
+    RAG 기반으로 사용자에게 메뉴를 추천합니다. 오늘의 섭취량을 분석하여 프롬프트에 포함합니다.
+    (토큰 단위 스트리밍 버전: POST /api/recommend-menu/stream/)
+    """
+    user = await _authenticated_user(request)
+    if user is None:
+        return _unauthenticated_response()
+
+    query_text = _request_data(request).get("query")
+    if not query_text:
+        return JsonResponse({"detail": "'query'는 필수 항목입니다."}, status=400)
+
+    # 1~4. 사용자 정보, 영양 상태, 후보 음식으로 프롬프트 구성
+    try:
+        prepared = await aprepare_recommendation(user, query_text)
+    except UserProfile.DoesNotExist:
+        return JsonResponse({"detail": "사용자 프로필을 찾을 수 없습니다."}, status=404)
+    except Exception as e:
+        return JsonResponse({"detail": f"추천 생성 중 알 수 없는 오류 발생: {e}"}, status=500)
+
+    if prepared.cached is not None:
+        return JsonResponse({"recommendation": prepared.cached, "cached": True})
+    if prepared.prompt is None:
+        return JsonResponse({"recommendation": NO_CANDIDATES_MESSAGE})
+
+    try:
+        async with _openai_client() as client:
+            with span("llm"):
+                completion = await client.chat.completions.create(
+                    model=RECOMMENDATION_MODEL,
+                    messages=recommendation_messages(prepared.prompt),
+                    temperature=0.8,
+                )
+        recommendation = completion.choices[0].message.content
+    except Exception as e:
+        return JsonResponse({"detail": f"OpenAI API 호출 중 오류 발생: {e}"}, status=500)
+
+    # 5. 결과 캐시 후 반환
+    recommendation_cache.set(prepared.cache_key, recommendation)
+    return JsonResponse({"recommendation": recommendation, "cached": False})
+
+
+# ============================================
+# RAG 기반 메뉴 추천 API (스트리밍)
+# ============================================
+@require_POST
+async def recommend_menu_stream_view(request):
+    """
+    POST /api/recommend-menu/stream/
+    JSON: {"query": "비오는 날 국물 요리"}
+    응답 (text/event-stream):
+        event: token   data: {"text": "오늘은"}      ← LLM 토큰이 도착하는 대로 전달
+        ...
+        event: done    data: {"recommendation": "<전체 문장>", "cached": false}
+        event: error   data: {"detail": "..."}       ← 스트리밍 도중 오류 발생 시
+    캐시 적중 시에는 전체 문장을 token 이벤트 하나로 보낸 뒤 바로 done("cached": true)을 보냅니다.
+    """
+    user = await _authenticated_user(request)
+    if user is None:
+        return _unauthenticated_response()
+
+    query_text = _request_data(request).get("query")
+    if not query_text:
+        return JsonResponse({"detail": "'query'는 필수 항목입니다."}, status=400)
+
+    # 1~4. 프롬프트 구성
+    try:
+        prepared = await aprepare_recommendation(user, query_text)
+    except UserProfile.DoesNotExist:
+        return JsonResponse({"detail": "사용자 프로필을 찾을 수 없습니다."}, status=404)
+    except Exception as e:
+        return JsonResponse({"detail": f"추천 생성 중 알 수 없는 오류 발생: {e}"}, status=500)
+
+    async def events():
+        if prepared.cached is not None:
+            yield sse_event("token", {"text": prepared.cached})
+            yield sse_event("done", {"recommendation": prepared.cached, "cached": True})
+            return
+        if prepared.prompt is None:
+            yield sse_event("done", {"recommendation": NO_CANDIDATES_MESSAGE})
+            return
+
+        # 5. LLM 토큰 스트리밍
+        chunks = []
+        try:
+            # 응답 헤더를 보낸 뒤에 실행되므로 Server-Timing에는 없고 llm 히스토그램에만 기록
+            async with _openai_client() as client:
+                with span("llm"):
+                    stream = await client.chat.completions.create(
+                        model=RECOMMENDATION_MODEL,
+                        messages=recommendation_messages(prepared.prompt),
+                        temperature=0.8,
+                        stream=True,
+                    )
+                    # 클라이언트 연결이 끊기면(CancelledError/GeneratorExit) 업스트림 스트림도 닫아
+                    # LLM이 토큰을 계속 생성하지 않게 함
+                    async with stream:
+                        async for chunk in stream:
+                            text = chunk.choices[0].delta.content if chunk.choices else None
+                            if text:
+                                chunks.append(text)
+                                yield sse_event("token", {"text": text})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"OpenAI API 호출 중 오류 발생: {e}"})
+            return
+
+        recommendation = "".join(chunks)
+        if recommendation:
+            recommendation_cache.set(prepared.cache_key, recommendation)
+        yield sse_event("done", {"recommendation": recommendation, "cached": False})
+
+    return sse_response(events())
+
+
+# ============================================
+# 이미지 → 대표식품명 + 식품명 후보 (YOLO 다중 객체 탐지)
+# ============================================
+def _decode_upload(img_file):
+    """업로드 파일 → (작업 해상도 이미지, 결과 캐시 키). 디코딩/해시 계산은 CPU 작업이므로 스레드에서 실행"""
+    with span("decode"):
+        decoded = decode_upload(img_file)
+    return decoded, make_prediction_key(decoded.content, decoded.img, decoded.original_size)
+
+
+@require_POST
+async def predict_food(request):
+    """
+    POST /api/predict/
+    - form-data: image (파일)
+    응답:
+    {
+      "detected_foods": [
+        {
+            "index": 0,
+            "pred_class": "국밥",
+            "confidence": 0.93,
+            "top_k": [{"pred_class": "국밥", "confidence": 0.93}, ...],
+            "low_confidence": false,
+            "food_options": [...],
+            "bbox": [x1, y1, x2, y2]
+        },
+        ...
+      ]
+    }
+    bbox는 업로드한 사진의 원본 해상도(EXIF 방향 적용) 기준 좌표입니다.
+    탐지/분류는 긴 변 settings.PREDICT_MAX_IMAGE_SIDE 이하로 줄인 이미지로 수행합니다. (image_decode 참고)
+    파일이 settings.PREDICT_MAX_UPLOAD_BYTES보다 크면 413.
+    """
+    if await _authenticated_user(request) is None:
+        return _unauthenticated_response()
+
+    img_file = request.FILES.get("image")
+    if not img_file:
+        return JsonResponse({"detail": "image 파일이 필요합니다."}, status=400)
+
+    try:
+        decoded, cache_key = await sync_to_async(_decode_upload, thread_sensitive=False)(img_file)
+    except ImageTooLarge as e:
+        return JsonResponse({"detail": str(e)}, status=413)
+    except Exception:
+        return JsonResponse({"detail": "이미지 파일을 열 수 없습니다."}, status=400)
+
+    # 0. 같은/거의 같은 사진의 이전 탐지 결과가 있으면 재사용 (django 캐시 백엔드는 네트워크 I/O)
+    detections = await sync_to_async(prediction_cache.get, thread_sensitive=False)(cache_key)
+    if detections is None:
+        # 1. YOLO 탐지 + 분류 (추론 서버 또는 현재 프로세스) - 전용 스레드 풀에서 실행
+        try:
+            with span("detect"):
+                detections = await sync_to_async(detect, thread_sensitive=False, executor=inference_executor)(
+                    decoded.img
+                )
+        except InferenceBusy:
+            return JsonResponse(
+                {"detail": "요청이 많아 잠시 후 다시 시도해주세요."}, status=503, headers={"Retry-After": "1"},
+            )
+        except InferenceTimeout:
+            return JsonResponse({"detail": "이미지 분석 시간이 초과되었습니다."}, status=504)
+        except InferenceError as e:
+            return JsonResponse({"detail": f"이미지 분석 중 오류 발생: {e}"}, status=503)
+
+        detections = [
+            {
+                "pred_class": detection["pred_class"],
+                "confidence": detection.get("confidence"),
+                "top_k": detection.get("top_k", []),
+                "low_confidence": detection.get("low_confidence", False),
+                "bbox": decoded.to_original(detection["bbox"]),
+            }
+            for detection in detections
+        ]
+        # 탐지 결과만 캐시 (식품 후보는 카탈로그가 바뀔 수 있으므로 매번 조회)
+        await sync_to_async(prediction_cache.set, thread_sensitive=False)(cache_key, detections)
+
+    # 2. 대표식품명별 식품 후보 조회 (인메모리 인덱스, 카탈로그가 바뀌었으면 RDB에서 다시 생성)
+    options_by_class = await sync_to_async(food_index.options_for_classes)({d["pred_class"] for d in detections})
+    detected_foods = [
+        {"index": i, **detection, "food_options": options_by_class[detection["pred_class"]]}
+        for i, detection in enumerate(detections)
+    ]
+    return JsonResponse({"detected_foods": detected_foods})
+
+
+# ============================================
+# 한끼 식사 기록 (조회/저장)
+# ============================================
+def _save_meal(request, data) -> tuple[int, dict | list | None]:
+    """MealSerializer 검증 + 저장 (트랜잭션을 쓰는 동기 코드) → (상태 코드, 응답 본문)"""
+    serializer = MealSerializer(data=data, context={'request': request})
+    if not serializer.is_valid():
+        return 400, serializer.errors
+
+    meal_instance = serializer.save()
+    # If the meal now has no items, delete the meal itself
+    if not meal_instance.items.all():
+        meal_instance.delete()
+        return 204, None
+    return 201, serializer.data
+
+
+@require_http_methods(["GET", "POST"])
+async def meal_list_create_view(request):
+    """
+    GET /api/meals/?date=YYYY-MM-DD  → 해당 날짜 식사 목록 (기본값 오늘)
+    POST /api/meals/  JSON: {"title": "점심", "items": [{"food_id": 1, "weight_g": 150}, ...]}
+        같은 날 같은 제목의 식사가 있으면 항목을 교체합니다. 항목이 비어 있으면 식사를 삭제하고 204.
+    """
+    user = await _authenticated_user(request)
+    if user is None:
+        return _unauthenticated_response()
+
+    if request.method == "GET":
+        # Get date from query params, default to today
+        target_date = timezone.now().date()
+        date_str = request.GET.get('date')
+        if date_str:
+            try:
+                target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            except (ValueError, TypeError):
+                # Handle invalid date format, default to today
+                pass
+
+        meals = [
+            meal async for meal in Meal.objects.filter(user=user, created_at__date=target_date)
+            .prefetch_related('items__food').order_by("created_at")
+        ]
+        # 항목/음식은 위에서 모두 가져왔으므로 직렬화는 DB를 조회하지 않음
+        return JsonResponse(MealSerializer(meals, many=True).data, safe=False)
+
+    # POST: 새 식사 저장
+    status_code, payload = await sync_to_async(_save_meal)(request, _request_data(request))
+    if payload is None:
+        return HttpResponse(status=status_code)
+    return JsonResponse(payload, status=status_code)
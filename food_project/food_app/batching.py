@@ -0,0 +1,129 @@
+# food_app/batching.py
+"""
+동적 마이크로 배칭 (Dynamic micro-batching)
+
+여러 요청 스레드가 동시에 보낸 입력을 잠깐(max_wait_ms) 모았다가
+batch_fn을 한 번만 호출하고, 결과를 각 요청에게 다시 나눠줍니다.
+배치 크기 1로 forward pass를 여러 번 하는 것보다 코어당 처리량이 높아집니다.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+class BatchStats:
+    """배치 채움률(fill rate)과 대기 지연(queueing delay) 누적 통계"""
+
+    def __init__(self, max_batch_size: int):
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+
+    def record(self, batch_size: int, queue_delays: list[float]):
+        with self._lock:
+            self.batches += 1
+            self.items += batch_size
+            self.total_queue_delay += sum(queue_delays)
+            self.max_queue_delay = max(self.max_queue_delay, max(queue_delays))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "fill_rate": round(self.items / (self.batches * self.max_batch_size), 3) if self.batches else 0.0,
+                "avg_queue_delay_ms": round(self.total_queue_delay / self.items * 1000, 2) if self.items else 0.0,
+                "max_queue_delay_ms": round(self.max_queue_delay * 1000, 2),
+            }
+
+
+class MicroBatcher:
+    """
+    batch_fn(list[입력]) -> list[출력] 을 감싸는 스케줄러.
+    첫 입력이 들어온 뒤 max_wait_ms가 지나거나 max_batch_size개가 모이면 실행합니다.
+    배치 실행은 전용 스레드 하나에서만 이루어지므로 모델을 동시에 호출하지 않습니다.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[list], list], max_batch_size: int, max_wait_ms: float,
+                 timeout: float | None = None):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        # map()/__call__에서 결과를 기다리는 기본 최대 시간(초). 초과 시 concurrent.futures.TimeoutError
+        self.timeout = timeout
+        self.stats = BatchStats(self.max_batch_size)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=f"micro-batcher-{self.name}", daemon=True)
+                    self._thread.start()
+
+    def submit_many(self, items: list) -> list[Future]:
+        """입력 여러 개를 큐에 넣고 각각의 Future를 반환"""
+        self._ensure_thread()
+        futures = []
+        now = time.monotonic()
+        for item in items:
+            future = Future()
+            self._queue.put((item, future, now))
+            futures.append(future)
+        return futures
+
+    def map(self, items: list, timeout: float | None = None) -> list:
+        """
+        입력 리스트 → 출력 리스트 (다른 요청의 입력과 함께 배치 처리될 수 있음)
+        timeout(기본값 self.timeout)은 입력 전체에 대한 제한 시간입니다.
+        """
+        futures = self.submit_many(items)
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            return [future.result() for future in futures]
+        deadline = time.monotonic() + timeout
+        return [future.result(max(0.0, deadline - time.monotonic())) for future in futures]
+
+    def __call__(self, item: Any, timeout: float | None = None) -> Any:
+        return self.map([item], timeout)[0]
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            dispatched_at = time.monotonic()
+            self.stats.record(len(batch), [dispatched_at - enqueued_at for _, _, enqueued_at in batch])
+
+            try:
+                outputs = self.batch_fn([item for item, _, _ in batch])
+                if len(outputs) != len(batch):
+                    # 일부만 결과를 받으면 나머지 호출자가 영원히 기다리게 되므로 배치 전체를 실패 처리
+                    raise RuntimeError(
+                        f"{self.name}: batch_fn이 입력 {len(batch)}개에 대해 출력 {len(outputs)}개를 반환했습니다."
+                    )
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), output in zip(batch, outputs):
+                future.set_result(output)
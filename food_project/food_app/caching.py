@@ -0,0 +1,83 @@
+# food_app/caching.py
+"""
+프로세스 내 메모리 캐시 유틸리티
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUTTLCache:
+    """
+    스레드 안전한 LRU + TTL 캐시
+    max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 제거하고,
+    ttl(초)이 지난 항목은 조회 시점에 만료 처리합니다. (ttl=None이면 만료 없음)
+    """
+
+    def __init__(self, max_entries: int, ttl: float | None = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _is_expired(self, expires_at: float | None, now: float) -> bool:
+        return expires_at is not None and expires_at <= now
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or self._is_expired(entry[0], time.monotonic()):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """만료되지 않은 (key, value) 목록의 스냅샷 (LRU 순서/적중률에는 영향 없음)"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, value)
+                for key, (expires_at, value) in self._data.items()
+                if not self._is_expired(expires_at, now)
+            ]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,164 @@
+# food_app/classifier_engines.py
+"""
+ConvNeXt 분류기 실행 엔진 (settings.CLASSIFIER_ENGINE)
+
+- eager:       best_model.pt를 HF 모델로 로드해 PyTorch eager 모드로 실행 (기본값)
+- torchscript: `export_classifier --format torchscript`로 만든 .ts 파일
+- onnx:        `export_classifier --format onnx`로 만든 .onnx 파일 (ONNX Runtime, CPU)
+
+모든 엔진은 processor가 만든 pixel_values(np.ndarray, NCHW float32)를 받아
+logits(np.ndarray, [batch, num_classes])를 반환합니다.
+"""
+import json
+import os
+
+import numpy as np
+
+ENGINE_CHOICES = ("eager", "torchscript", "onnx")
+ARTIFACT_EXTENSIONS = {"torchscript": ".ts", "onnx": ".onnx"}
+
+
+def load_eager_model(ckpt_path: str):
+    """best_model.pt → (HF 분류 모델, classes, model_name)"""
+    import torch
+    from transformers import AutoModelForImageClassification
+
+    ckpt = torch.load(ckpt_path, map_location="cpu")
+    classes = ckpt["classes"]
+    model_name = ckpt["model_name"]
+
+    model = AutoModelForImageClassification.from_pretrained(
+        model_name,
+        num_labels=len(classes),
+        ignore_mismatched_sizes=True,
+    )
+    model.load_state_dict(ckpt["model_state_dict"])
+    model.eval()
+    return model, classes, model_name
+
+
+def default_artifact_path(export_dir: str, engine: str, quantized: bool = False) -> str:
+    suffix = ".int8" if quantized else ""
+    return os.path.join(export_dir, f"classifier{suffix}{ARTIFACT_EXTENSIONS[engine]}")
+
+
+def meta_path(artifact_path: str) -> str:
+    """내보낸 모델과 함께 저장되는 메타데이터(classes, model_name) 파일 경로"""
+    return artifact_path + ".json"
+
+
+def read_meta(artifact_path: str) -> dict:
+    with open(meta_path(artifact_path), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_meta(artifact_path: str, meta: dict):
+    with open(meta_path(artifact_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+class EagerEngine:
+    name = "eager"
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, pixel_values: np.ndarray) -> np.ndarray:
+        import torch
+
+        with torch.no_grad():
+            return self.model(pixel_values=torch.from_numpy(pixel_values)).logits.numpy()
+
+
+class TorchScriptEngine:
+    name = "torchscript"
+
+    def __init__(self, path: str):
+        import torch
+
+        self.module = torch.jit.load(path, map_location="cpu")
+        self.module.eval()
+
+    def __call__(self, pixel_values: np.ndarray) -> np.ndarray:
+        import torch
+
+        with torch.no_grad():
+            return self.module(torch.from_numpy(pixel_values)).numpy()
+
+
+class OnnxEngine:
+    name = "onnx"
+
+    def __init__(self, path: str, num_threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, pixel_values: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: pixel_values.astype(np.float32, copy=False)})[0]
+
+
+def load_exported_engine(engine: str, artifact_path: str, num_threads: int = 0):
+    if engine == "torchscript":
+        return TorchScriptEngine(artifact_path)
+    if engine == "onnx":
+        return OnnxEngine(artifact_path, num_threads=num_threads)
+    raise ValueError(f"알 수 없는 분류기 엔진입니다: {engine} (가능한 값: {', '.join(ENGINE_CHOICES)})")
+
+
+# ============================================
+# 내보내기 (export_classifier 명령에서 사용)
+# ============================================
+def _logits_only(model):
+    """HF 모델 출력(ImageClassifierOutput) 대신 logits 텐서만 반환하도록 감싸기"""
+    import torch
+
+    class LogitsOnly(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, pixel_values):
+            return self.inner(pixel_values=pixel_values).logits
+
+    return LogitsOnly(model).eval()
+
+
+def export_onnx(model, sample_pixel_values, path: str, quantize: bool, opset: int = 17):
+    """dynamic batch 축을 가진 ONNX 모델로 내보내고, 필요하면 가중치를 int8로 동적 양자화"""
+    import torch
+
+    # 양자화 시에는 fp32 모델을 임시 파일로 내보낸 뒤 int8로 변환
+    fp32_path = f"{os.path.splitext(path)[0]}.fp32.onnx" if quantize else path
+    torch.onnx.export(
+        _logits_only(model),
+        (torch.from_numpy(sample_pixel_values),),
+        fp32_path,
+        input_names=["pixel_values"],
+        output_names=["logits"],
+        dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset,
+    )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+
+
+def export_torchscript(model, sample_pixel_values, path: str, quantize: bool):
+    """TorchScript(trace)로 내보내기. quantize면 Linear 레이어를 int8 동적 양자화"""
+    import torch
+
+    module = _logits_only(model)
+    if quantize:
+        module = torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+    with torch.no_grad():
+        traced = torch.jit.trace(module, torch.from_numpy(sample_pixel_values))
+    traced = torch.jit.freeze(traced)
+    traced.save(path)
@@ -0,0 +1,98 @@
+# food_app/food_index.py
+"""
+대표식품명(food_class) → 식품 후보 목록 인메모리 인덱스
+
+음식 카탈로그는 load_food_data 실행 사이에는 거의 바뀌지 않으므로,
+예측 요청마다 DB를 조회하지 않고 프로세스 메모리의 불변 인덱스를 사용합니다.
+
+무효화: 카탈로그 버전 번호를 공유 캐시(settings.FOOD_CATALOG_CACHE_ALIAS)에 두고,
+Food 저장/삭제(signals)와 load_food_data가 버전을 올립니다.
+각 프로세스는 조회 시 버전이 바뀌었으면 인덱스를 다시 만듭니다.
+
+버전 키는 만료 없이 저장합니다. (만료되어 0으로 돌아가면, 0에서 인덱스를 만든 워커가
+이후 변경을 영원히 놓치고 추천 캐시 fingerprint도 예전 버전 번호를 다시 쓰게 됨)
+갱신은 읽기 → 쓰기라 프로세스 간 원자적이지 않으므로, 값을 +1 대신 현재 시각(ns) 이상으로 올려
+동시에 갱신한 두 프로세스가 같은 번호를 쓰지 않게 합니다. (버전은 같은지만 비교하고 대소는 보지 않음)
+"""
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+CATALOG_VERSION_KEY = "food_catalog_version"
+
+
+def _version_cache():
+    return caches[settings.FOOD_CATALOG_CACHE_ALIAS]
+
+
+def get_catalog_version() -> int:
+    cache = _version_cache()
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 0, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 0)
+    return version
+
+
+def bump_catalog_version():
+    """카탈로그 변경 알림 (트랜잭션 안에서 호출되면 커밋 후에 반영)"""
+    def _bump():
+        # cache.incr는 백엔드에 따라 기본 TIMEOUT으로 다시 저장하므로 사용하지 않음
+        version = max(get_catalog_version() + 1, time.time_ns())
+        _version_cache().set(CATALOG_VERSION_KEY, version, timeout=None)
+
+    transaction.on_commit(_bump)
+
+
+class FoodClassIndex:
+    """food_class → ((id, representative_name, food_class), ...) 불변 매핑"""
+
+    def __init__(self, version: int, options_by_class: dict[str, tuple[tuple, ...]]):
+        self.version = version
+        self.options_by_class = MappingProxyType(options_by_class)
+
+    @classmethod
+    def build(cls, version: int) -> "FoodClassIndex":
+        from .models import Food
+
+        grouped: dict[str, list[tuple]] = {}
+        rows = Food.objects.values_list('id', 'representative_name', 'food_class').order_by('food_class', 'id')
+        for row in rows:
+            grouped.setdefault(row[2], []).append(row)
+        return cls(version, {food_class: tuple(options) for food_class, options in grouped.items()})
+
+    def options(self, food_class: str) -> list[dict]:
+        return [
+            {'id': food_id, 'representative_name': name, 'food_class': cls_name}
+            for food_id, name, cls_name in self.options_by_class.get(food_class, ())
+        ]
+
+
+_index: FoodClassIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> FoodClassIndex:
+    """현재 카탈로그 버전의 인덱스 (없거나 오래됐으면 다시 생성)"""
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = FoodClassIndex.build(version)
+            index = _index
+    return index
+
+
+def options_for_class(food_class: str) -> list[dict]:
+    return get_index().options(food_class)
+
+
+def options_for_classes(food_classes) -> dict[str, list[dict]]:
+    index = get_index()
+    return {food_class: index.options(food_class) for food_class in food_classes}
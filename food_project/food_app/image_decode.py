@@ -0,0 +1,73 @@
+# food_app/image_decode.py
+"""
+/api/predict/ 업로드 이미지 디코딩
+
+휴대폰 사진(12MP 전후)을 원본 해상도 그대로 디코딩/탐지/Crop하지 않도록 작업 해상도로 줄입니다.
+
+1. 업로드 크기/픽셀 수 제한 (초과 시 ImageTooLarge → 413)
+2. JPEG는 Image.draft()로 DCT 단계에서 1/2, 1/4, 1/8 축소 디코딩 (원본 크기 버퍼를 만들지 않음)
+3. 긴 변을 settings.PREDICT_MAX_IMAGE_SIDE 이하로 축소
+4. EXIF Orientation 적용 (사용자가 보는 방향 기준)
+
+YOLO는 내부에서 640px로, 분류기는 224px로 다시 줄이므로 작업 해상도를 제한해도 탐지 결과는
+거의 같습니다. 박스는 작업 이미지 기준이므로 응답 전에 to_original()로 원본 해상도 좌표로 되돌립니다.
+"""
+import io
+from typing import NamedTuple
+
+from django.conf import settings
+from PIL import ExifTags, Image, ImageOps
+
+# 90도 회전이 포함된 EXIF Orientation 값 (가로/세로가 바뀜)
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+class ImageTooLarge(Exception):
+    """업로드 파일 크기 또는 픽셀 수가 제한을 넘음"""
+
+
+class DecodedImage(NamedTuple):
+    img: Image.Image                # 작업 해상도 RGB 이미지 (EXIF 방향 적용)
+    content: bytes                  # 업로드 원본 바이트 (결과 캐시 키)
+    original_size: tuple[int, int]  # EXIF 방향 적용 후 원본 해상도
+
+    def to_original(self, bbox: list[float]) -> list[float]:
+        """작업 이미지 기준 [x1, y1, x2, y2] → 원본 해상도 좌표"""
+        if self.img.size == self.original_size:
+            return bbox
+        scale_x = self.original_size[0] / self.img.width
+        scale_y = self.original_size[1] / self.img.height
+        x1, y1, x2, y2 = bbox
+        return [x1 * scale_x, y1 * scale_y, x2 * scale_x, y2 * scale_y]
+
+
+def decode_upload(upload) -> DecodedImage:
+    """
+    업로드 파일(UploadedFile) → DecodedImage
+    이미지가 아니거나 손상된 파일이면 PIL 예외(UnidentifiedImageError, OSError 등)가 그대로 전달됩니다.
+    """
+    max_bytes = settings.PREDICT_MAX_UPLOAD_BYTES
+    if upload.size > max_bytes:
+        raise ImageTooLarge(f"이미지 파일은 최대 {max_bytes // (1024 * 1024)}MB까지 업로드할 수 있습니다.")
+    content = upload.read()
+
+    # open은 헤더만 읽으므로 여기까지는 픽셀을 디코딩하지 않음
+    img = Image.open(io.BytesIO(content))
+    width, height = img.size
+    if width * height > settings.PREDICT_MAX_IMAGE_PIXELS:
+        raise ImageTooLarge(f"이미지 해상도가 너무 큽니다. ({width}x{height})")
+    orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+    original_size = (height, width) if orientation in TRANSPOSED_ORIENTATIONS else (width, height)
+
+    max_side = settings.PREDICT_MAX_IMAGE_SIDE
+    ratio = max_side / max(width, height)
+    if ratio < 1:
+        # JPEG 외 형식에서는 아무 일도 하지 않음. 결과는 요청 크기 이상이므로 아래에서 마저 축소
+        img.draft("RGB", (max(1, int(width * ratio)), max(1, int(height * ratio))))
+        img.thumbnail((max_side, max_side), Image.Resampling.BILINEAR)
+
+    # 축소한 뒤에 회전해야 적은 픽셀만 옮김 (thumbnail은 EXIF 정보를 유지)
+    img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return DecodedImage(img, content, original_size)
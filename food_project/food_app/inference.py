@@ -0,0 +1,301 @@
+# food_app/inference.py
+"""
+이미지 → 대표식품명 추론 (YOLO 다중 객체 탐지 + ConvNeXt 분류)
+
+DB 조회 없이 순수 추론만 담당합니다.
+웹 워커 안에서 직접 import 되거나, 별도의 추론 서버 프로세스
+(`python manage.py run_inference_server`)에서 한 번만 로드되어 사용됩니다.
+
+모델은 import 시점이 아니라 처음 사용될 때 `registry`가 한 번만 로드합니다.
+(`python manage.py warmup_models` 또는 settings.WARMUP_MODELS_ON_STARTUP 으로 미리 로드 가능)
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, NamedTuple
+
+import numpy as np
+from PIL import Image
+
+from django.conf import settings
+
+from . import classifier_engines
+from .batching import MicroBatcher
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# 1. 경로 설정 (프로젝트 루트 기준)
+# ============================================
+BASE_DIR = settings.BASE_DIR
+
+CKPT_PATH = os.path.join(
+    BASE_DIR, "checkpoints_convnext_stratified", "best_model.pt"
+)
+YOLO_WEIGHTS = "yolo11n.pt"
+
+
+# ============================================
+# 2. 모델 지연 로딩 레지스트리
+#    torch/transformers/ultralytics import 자체도 무거우므로
+#    실제로 모델이 필요할 때까지 미룹니다. (migrate 등 관리 명령 시작 속도)
+# ============================================
+class ClassifierBundle(NamedTuple):
+    engine: Any          # pixel_values(np.ndarray) -> logits(np.ndarray), classifier_engines 참고
+    processor: Any
+    classes: list[str]
+
+
+def classifier_artifact_path() -> str:
+    """settings.CLASSIFIER_ENGINE이 사용할 내보낸 모델 파일 경로"""
+    return settings.CLASSIFIER_ARTIFACT_PATH or classifier_engines.default_artifact_path(
+        settings.CLASSIFIER_EXPORT_DIR, settings.CLASSIFIER_ENGINE
+    )
+
+
+def _load_classifier() -> ClassifierBundle:
+    from transformers import AutoImageProcessor
+
+    engine_name = settings.CLASSIFIER_ENGINE
+    if engine_name == "eager":
+        logger.info("Loading checkpoint: %s", CKPT_PATH)
+        model, classes, model_name = classifier_engines.load_eager_model(CKPT_PATH)
+        engine = classifier_engines.EagerEngine(model)
+    else:
+        artifact_path = classifier_artifact_path()
+        logger.info("Loading %s classifier: %s", engine_name, artifact_path)
+        meta = classifier_engines.read_meta(artifact_path)
+        classes, model_name = meta["classes"], meta["model_name"]
+        engine = classifier_engines.load_exported_engine(
+            engine_name, artifact_path, num_threads=settings.CLASSIFIER_NUM_THREADS
+        )
+
+    processor = AutoImageProcessor.from_pretrained(model_name)
+    return ClassifierBundle(engine, processor, classes)
+
+
+def _load_yolo():
+    from ultralytics import YOLO
+
+    # YOLO 모델 로드 (없으면 자동 다운로드)
+    logger.info("Loading YOLO model: %s", YOLO_WEIGHTS)
+    return YOLO(YOLO_WEIGHTS)
+
+
+class ModelRegistry:
+    """
+    추론 모델을 처음 사용할 때 한 번만 로드하는 레지스트리 (스레드 안전)
+    모델별 로드 시간과 첫 추론(cold path) 시간을 로그로 남깁니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaders = {"classifier": _load_classifier, "yolo": _load_yolo}
+        self._models = {}
+        self.load_seconds = {}
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    start = time.perf_counter()
+                    model = self._loaders[name]()
+                    self.load_seconds[name] = time.perf_counter() - start
+                    self._models[name] = model
+                    logger.info("[registry] %s loaded in %.2fs", name, self.load_seconds[name])
+        return model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    @property
+    def classifier(self) -> ClassifierBundle:
+        return self.get("classifier")
+
+    @property
+    def yolo(self):
+        return self.get("yolo")
+
+    def warmup(self) -> dict:
+        """
+        모든 모델을 로드하고 더미 이미지로 1회씩 추론합니다.
+        반환값: {"classifier": {"load_s": ..., "first_inference_s": ...}, "yolo": {...}}
+        """
+        dummy = Image.new("RGB", (640, 480), (127, 127, 127))
+        warmups = {
+            "classifier": lambda: predict_classes_from_pil([dummy]),
+            "yolo": lambda: detect_boxes_batch([dummy]),
+        }
+
+        timings = {}
+        for name, run_dummy in warmups.items():
+            self.get(name)
+            start = time.perf_counter()
+            run_dummy()
+            timings[name] = {
+                "load_s": round(self.load_seconds.get(name, 0.0), 3),
+                "first_inference_s": round(time.perf_counter() - start, 3),
+            }
+            logger.info(
+                "[registry] %s warm-up: load %.2fs, first inference %.3fs",
+                name, timings[name]["load_s"], timings[name]["first_inference_s"],
+            )
+        timings["classifier"]["engine"] = self.classifier.engine.name
+        return timings
+
+
+registry = ModelRegistry()
+
+
+# 분류기 1회 forward pass에 함께 넣을 최대 crop 수
+# (CPU 메모리/지연 시간을 보고 settings.CLASSIFIER_BATCH_SIZE로 조정)
+CLASSIFIER_BATCH_SIZE = max(1, getattr(settings, "CLASSIFIER_BATCH_SIZE", 16))
+# 응답에 포함할 후보 수 / 이 확률 미만이면 low_confidence로 표시
+CLASSIFIER_TOP_K = max(1, getattr(settings, "CLASSIFIER_TOP_K", 3))
+CLASSIFIER_MIN_CONFIDENCE = getattr(settings, "CLASSIFIER_MIN_CONFIDENCE", 0.5)
+# 박스 면적이 이미지의 이 비율 이상이면 '사진 전체'로 취급 (식탁/쟁반 박스 등)
+FULL_FRAME_BOX_RATIO = getattr(settings, "FULL_FRAME_BOX_RATIO", 0.9)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def predict_topk_from_pil(imgs: list[Image.Image], k: int | None = None,
+                          batch_size: int | None = None) -> list[list[tuple[str, float]]]:
+    """
+    PIL 이미지 리스트 → 이미지별 상위 k개 (대표식품명, softmax 확률) 리스트
+    crop들을 batch_size 단위로 묶어 processor/모델을 한 번씩만 호출합니다.
+    """
+    engine, processor, classes = registry.classifier
+    k = max(1, min(k or CLASSIFIER_TOP_K, len(classes)))
+    batch_size = max(1, batch_size or CLASSIFIER_BATCH_SIZE)
+    # Convert RGBA/P to RGB if necessary
+    imgs = [img if img.mode == "RGB" else img.convert("RGB") for img in imgs]
+
+    preds = []
+    for start in range(0, len(imgs), batch_size):
+        inputs = processor(images=imgs[start:start + batch_size], return_tensors="np")
+        probs = _softmax(engine(inputs["pixel_values"]).astype(np.float32))
+        top_indices = np.argsort(-probs, axis=-1)[:, :k]
+        for row, indices in zip(probs, top_indices):
+            preds.append([(classes[idx], float(row[idx])) for idx in indices])
+    return preds
+
+
+def predict_classes_from_pil(imgs: list[Image.Image], batch_size: int | None = None) -> list[str]:
+    """PIL 이미지 리스트 → 대표식품명(food_class) 리스트 (top-1)"""
+    return [topk[0][0] for topk in predict_topk_from_pil(imgs, k=1, batch_size=batch_size)]
+
+
+def predict_class_from_pil(img: Image.Image) -> str:
+    """PIL 이미지 → 대표식품명(food_class) 예측"""
+    return predict_classes_from_pil([img])[0]
+
+
+def detect_boxes_batch(imgs: list[Image.Image]) -> list[list[list[float]]]:
+    """PIL 이미지 리스트 → 이미지별 Bounding Box 좌표 리스트 [[x1, y1, x2, y2], ...]"""
+    # conf=0.25 (기본값), save=False, device='cpu' (CUDA 오류 방지)
+    yolo_results = registry.yolo(imgs, verbose=False, device='cpu')
+    return [result.boxes.xyxy.tolist() if len(result.boxes) > 0 else [] for result in yolo_results]
+
+
+# ============================================
+# 3. 동시 요청 마이크로 배칭 (settings.INFERENCE_MICRO_BATCHING)
+#    여러 요청 스레드(추론 서버의 workers, 또는 멀티스레드 웹 워커)의
+#    이미지/crop을 모아 YOLO와 분류기를 한 번에 실행합니다.
+# ============================================
+yolo_batcher = None
+classifier_batcher = None
+
+if getattr(settings, "INFERENCE_MICRO_BATCHING", False):
+    yolo_batcher = MicroBatcher(
+        "yolo",
+        detect_boxes_batch,
+        max_batch_size=settings.YOLO_MAX_BATCH_SIZE,
+        max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS,
+        timeout=settings.INFERENCE_JOB_TIMEOUT,
+    )
+    classifier_batcher = MicroBatcher(
+        "classifier",
+        predict_topk_from_pil,
+        max_batch_size=CLASSIFIER_BATCH_SIZE,
+        max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS,
+        timeout=settings.INFERENCE_JOB_TIMEOUT,
+    )
+
+
+def micro_batch_stats() -> dict:
+    """마이크로 배처별 채움률/대기 지연 통계 (비활성화 시 빈 dict)"""
+    return {
+        batcher.name: batcher.stats.snapshot()
+        for batcher in (yolo_batcher, classifier_batcher)
+        if batcher is not None
+    }
+
+
+def detect_boxes(img: Image.Image) -> list[list[float]]:
+    if yolo_batcher is not None:
+        return yolo_batcher(img)
+    return detect_boxes_batch([img])[0]
+
+
+def classify_crops(crops: list[Image.Image]) -> list[list[tuple[str, float]]]:
+    if classifier_batcher is not None:
+        return classifier_batcher.map(crops)
+    return predict_topk_from_pil(crops)
+
+
+def _is_full_frame(bbox: list[float], img: Image.Image) -> bool:
+    x1, y1, x2, y2 = bbox
+    return (x2 - x1) * (y2 - y1) >= FULL_FRAME_BOX_RATIO * img.width * img.height
+
+
+def _detection(topk: list[tuple[str, float]], bbox: list[float]) -> dict:
+    pred_class, confidence = topk[0]
+    return {
+        "pred_class": pred_class,
+        "confidence": round(confidence, 4),
+        "top_k": [{"pred_class": name, "confidence": round(prob, 4)} for name, prob in topk],
+        "low_confidence": confidence < CLASSIFIER_MIN_CONFIDENCE,
+        "bbox": bbox,
+    }
+
+
+def run_detection(img: Image.Image) -> list[dict]:
+    """
+    PIL 이미지 → [{"pred_class": "국밥", "confidence": 0.93, "top_k": [...],
+                   "low_confidence": False, "bbox": [x1, y1, x2, y2]}, ...]
+    YOLO로 음식 영역을 찾고, 모든 crop을 배치로 분류합니다. YOLO 박스는 모두 결과에 포함됩니다.
+    확신도가 낮은 결과는 재분류하지 않고 low_confidence로 표시만 합니다.
+    """
+    with span("yolo"):
+        bboxes = detect_boxes(img)
+
+    # 탐지된 객체가 없으면 전체 이미지로 1회만 분류
+    if not bboxes:
+        with span("classify"):
+            topk = classify_crops([img])[0]
+        return [_detection(topk, [0, 0, img.width, img.height])]
+
+    # 사진 전체를 덮는 박스(클로즈업한 음식 등)는 Crop해도 원본과 거의 같으므로,
+    # Crop 대신 원본 이미지를 한 번만 분류해서 그런 박스 모두에 사용
+    full_frame = [_is_full_frame(bbox, img) for bbox in bboxes]
+    inputs = [img.crop(tuple(bbox)) for bbox, is_full in zip(bboxes, full_frame) if not is_full]
+    if any(full_frame):
+        inputs.append(img)
+    with span("classify"):
+        topks = classify_crops(inputs)
+
+    full_frame_topk = topks[-1] if any(full_frame) else None
+    crop_topks = iter(topks)
+    return [
+        _detection(full_frame_topk if is_full else next(crop_topks), bbox)
+        for bbox, is_full in zip(bboxes, full_frame)
+    ]
@@ -0,0 +1,183 @@
+# food_app/inference_service.py
+"""
+추론 서비스: 모델을 한 프로세스에서 한 번만 로드하고 웹 워커와 분리합니다.
+
+- 서버: `python manage.py run_inference_server`
+  모델을 소유한 단일 프로세스가 로컬 소켓으로 작업을 받아,
+  크기가 제한된 작업 큐와 추론 스레드로 처리합니다.
+- 클라이언트: `detect(img)`
+  settings.INFERENCE_SERVER_ADDRESS가 설정되어 있으면 서버로 작업을 보내고,
+  비어 있으면 (개발 환경) 요청 스레드에서 직접 추론합니다.
+"""
+import queue
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from PIL import Image
+
+# 클라이언트는 서버의 작업 타임아웃보다 이만큼 더 기다립니다. (응답 전송 여유분)
+CLIENT_GRACE_SECONDS = 5.0
+
+
+class InferenceError(Exception):
+    """추론 서버에서 작업이 실패한 경우"""
+
+
+class InferenceBusy(InferenceError):
+    """작업 큐가 가득 차서 작업을 받을 수 없는 경우 (backpressure)"""
+
+
+class InferenceUnavailable(InferenceError):
+    """추론 서버에 연결할 수 없는 경우"""
+
+
+class InferenceTimeout(InferenceError):
+    """작업이 제한 시간 안에 끝나지 않은 경우"""
+
+
+def parse_address(value: str):
+    """'host:port' → (host, port), 그 외 문자열은 유닉스 소켓 경로로 취급"""
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return value
+
+
+def _authkey() -> bytes:
+    if not settings.INFERENCE_SERVER_AUTHKEY:
+        raise ImproperlyConfigured("추론 서버를 사용하려면 INFERENCE_SERVER_AUTHKEY를 설정해야 합니다.")
+    return settings.INFERENCE_SERVER_AUTHKEY.encode()
+
+
+# ============================================
+# 서버 (모델 소유 프로세스)
+# ============================================
+class _Job:
+    __slots__ = ("image", "done", "result", "error", "cancelled")
+
+    def __init__(self, image: Image.Image):
+        self.image = image
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.cancelled = False
+
+
+class InferenceServer:
+    """
+    연결마다 핸들러 스레드가 작업을 큐에 넣고, `workers`개의 추론 스레드가
+    공유 모델로 작업을 처리합니다.
+    큐가 가득 차면 즉시 'busy', 제한 시간을 넘기면 'timeout'을 응답합니다.
+    """
+
+    def __init__(self, address, workers: int, queue_size: int, job_timeout: float):
+        self.address = address
+        self.workers = max(1, workers)
+        self.job_timeout = job_timeout
+        self.jobs = queue.Queue(maxsize=max(1, queue_size))
+
+    def _worker_loop(self):
+        from . import inference
+
+        while True:
+            job = self.jobs.get()
+            # 클라이언트가 이미 타임아웃으로 포기한 작업은 건너뜀
+            if job.cancelled:
+                continue
+            try:
+                job.result = inference.run_detection(job.image)
+            except Exception as e:
+                job.error = str(e)
+            finally:
+                job.done.set()
+
+    def _handle_job(self, image) -> tuple:
+        job = _Job(image)
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            return ("busy", None)
+
+        if not job.done.wait(self.job_timeout):
+            job.cancelled = True
+            return ("timeout", None)
+        if job.error is not None:
+            return ("error", job.error)
+        return ("ok", job.result)
+
+    def _handle_connection(self, conn):
+        with conn:
+            try:
+                while True:
+                    conn.send(self._handle_job(conn.recv()))
+            except (EOFError, OSError):
+                # 클라이언트가 연결을 끊은 경우
+                return
+
+    def serve_forever(self, ready_callback=None):
+        # 모델을 메인 스레드에서 먼저 로드/웜업해서, 로드 실패 시 바로 종료되도록 함
+        from .inference import registry
+        registry.warmup()
+
+        for _ in range(self.workers):
+            threading.Thread(target=self._worker_loop, daemon=True).start()
+
+        with Listener(self.address, authkey=_authkey()) as listener:
+            if ready_callback:
+                ready_callback(listener.address)
+            while True:
+                try:
+                    conn = listener.accept()
+                except (OSError, AuthenticationError):
+                    # 인증 실패 등 개별 연결 오류는 서버를 멈추지 않음
+                    continue
+                threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+
+# ============================================
+# 클라이언트 (Django 웹 워커)
+# ============================================
+def _detect_remote(img: Image.Image) -> list[dict]:
+    address = parse_address(settings.INFERENCE_SERVER_ADDRESS)
+    try:
+        conn = Client(address, authkey=_authkey())
+    except (OSError, AuthenticationError) as e:
+        raise InferenceUnavailable(f"추론 서버에 연결할 수 없습니다: {e}") from e
+
+    with conn:
+        try:
+            conn.send(img)
+            if not conn.poll(settings.INFERENCE_JOB_TIMEOUT + CLIENT_GRACE_SECONDS):
+                raise InferenceTimeout("추론 서버 응답 시간이 초과되었습니다.")
+            status, payload = conn.recv()
+        except (EOFError, OSError) as e:
+            # 요청 도중 서버가 재시작/종료된 경우 (ConnectionError는 OSError의 하위 클래스)
+            raise InferenceUnavailable(f"추론 서버와의 연결이 끊겼습니다: {e}") from e
+
+    if status == "ok":
+        return payload
+    if status == "busy":
+        raise InferenceBusy("추론 서버의 작업 큐가 가득 찼습니다.")
+    if status == "timeout":
+        raise InferenceTimeout("추론 작업 시간이 초과되었습니다.")
+    raise InferenceError(payload)
+
+
+def detect(img: Image.Image) -> list[dict]:
+    """
+    PIL 이미지 → [{"pred_class": ..., "bbox": [x1, y1, x2, y2]}, ...]
+    추론 서버가 설정되어 있으면 원격으로, 아니면 현재 프로세스에서 실행합니다.
+    """
+    if settings.INFERENCE_SERVER_ADDRESS:
+        return _detect_remote(img)
+
+    from . import inference
+    try:
+        return inference.run_detection(img)
+    except FutureTimeoutError as e:
+        # 마이크로 배처 대기 시간 초과 (settings.INFERENCE_JOB_TIMEOUT)
+        raise InferenceTimeout("이미지 분석 시간이 초과되었습니다.") from e
@@ -0,0 +1,50 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from food_app.search_index import FoodNameIndex, choseong, get_catalog_version
+
+
+class Command(BaseCommand):
+    help = 'Measures food-search index latency (p50/p99) with prefix, partial-syllable and choseong queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=5000, help='실행할 검색 횟수')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        index = FoodNameIndex.build(get_catalog_version())
+        build_ms = (time.perf_counter() - start) * 1000
+        if not index.rows:
+            self.stderr.write(self.style.ERROR("음식 데이터가 없습니다. 먼저 'load_food_data'를 실행해주세요."))
+            return
+        self.stdout.write(f"인덱스 생성: {len(index.rows)}개 음식, {len(index.postings)}개 n-gram, {build_ms:.1f}ms")
+
+        # 실제 입력과 비슷한 검색어: 이름 앞부분(1~N글자), 입력 중인 자모, 초성
+        rng = random.Random(options['seed'])
+        queries = []
+        for _ in range(options['queries']):
+            name = rng.choice(index.rows)[1]
+            kind = rng.random()
+            if kind < 0.6:
+                queries.append(name[:rng.randint(1, len(name))])
+            elif kind < 0.8:
+                cut = rng.randint(0, len(name) - 1)
+                queries.append(name[:cut] + choseong(name[cut]))
+            else:
+                queries.append(choseong(name)[:rng.randint(1, len(name))])
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        latencies.sort()
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+        self.stdout.write(self.style.SUCCESS(
+            f"검색 {len(latencies)}회: p50 {pct(0.5):.3f}ms, p95 {pct(0.95):.3f}ms, "
+            f"p99 {pct(0.99):.3f}ms, max {latencies[-1]:.3f}ms"
+        ))
@@ -0,0 +1,104 @@
+import random
+import tempfile
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from food_app.models import Food
+from food_app.vector_index import NumpyVectorIndex, write_index
+from food_app.vector_service import encode_queries, get_chroma_collection
+
+SAMPLE_QUERIES = [
+    "비오는 날 생각나는 따뜻한 국물 요리",
+    "추운 날에 먹을만한 따뜻한 국물요리",
+    "얼큰하고 시원한 국물 요리",
+    "매콤한 음식",
+    "단백질이 많은 가벼운 저녁",
+    "다이어트 중에 먹을 수 있는 음식",
+    "해장에 좋은 음식",
+    "아이들이 좋아하는 반찬",
+    "여름에 시원하게 먹는 면 요리",
+    "달콤한 디저트",
+    "혼밥하기 좋은 한 그릇 요리",
+    "술안주로 좋은 음식",
+]
+
+
+class Command(BaseCommand):
+    help = 'Compares vector search latency and recall@k: NumPy exact / NumPy IVF / ChromaDB'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=200, help='검색 쿼리 수 (예시 문장 + 음식 이름)')
+        parser.add_argument('--k', type=int, default=20)
+        parser.add_argument('--ivf-lists', type=int, default=0, help='비교용 IVF 인덱스 클러스터 수 (0이면 sqrt(N))')
+        parser.add_argument('--nprobe', type=int, default=settings.VECTOR_IVF_NPROBE)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            index = NumpyVectorIndex(settings.VECTOR_INDEX_DIR)
+        except FileNotFoundError:
+            self.stderr.write(self.style.ERROR(
+                "NumPy 벡터 인덱스가 없습니다. 먼저 'index_food_vectors --backend both'를 실행해주세요."
+            ))
+            return
+
+        k = options['k']
+        rng = random.Random(options['seed'])
+        names = list(Food.objects.values_list('representative_name', flat=True))
+        queries = [
+            rng.choice(SAMPLE_QUERIES) if not names or rng.random() < 0.5 else rng.choice(names)
+            for _ in range(options['queries'])
+        ]
+
+        start = time.perf_counter()
+        embeddings = encode_queries(queries)
+        self.stdout.write(
+            f"인덱스 {len(index)}개 벡터 ({index.meta['dtype']}), 쿼리 {len(queries)}개 인코딩 "
+            f"{(time.perf_counter() - start) * 1000:.0f}ms (검색 시간에는 미포함)"
+        )
+
+        # 기준값: 전체 코사인 exact 검색
+        truth = [set(index.search([embedding], k, exact=True)[0][0]) for embedding in embeddings]
+        self._report("numpy exact", lambda e: index.search([e], k, exact=True)[0][0], embeddings, truth)
+
+        # IVF: 현재 인덱스와 같은 벡터로 임시 IVF 인덱스 생성
+        ivf_lists = options['ivf_lists'] or max(1, int(np.sqrt(len(index))))
+        with tempfile.TemporaryDirectory() as directory:
+            write_index(directory, index.ids, np.asarray(index.embeddings, dtype=np.float32), ivf_lists=ivf_lists)
+            ivf_index = NumpyVectorIndex(directory, nprobe=options['nprobe'])
+            self._report(
+                f"numpy IVF (lists={ivf_lists}, nprobe={options['nprobe']})",
+                lambda e: ivf_index.search([e], k)[0][0], embeddings, truth,
+            )
+
+        try:
+            collection = get_chroma_collection()
+            if collection.count() == 0:
+                raise ValueError("컬렉션이 비어있습니다")
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"ChromaDB 비교 생략: {e}"))
+            return
+
+        def chroma_search(embedding):
+            result = collection.query(query_embeddings=[embedding.tolist()], n_results=k)
+            return [int(food_id) for food_id in result['ids'][0]]
+        # 컬렉션 기본 거리(l2, 비정규화 벡터)는 코사인 순위와 다를 수 있어 recall이 1.0보다 낮을 수 있습니다.
+        self._report("chroma", chroma_search, embeddings, truth)
+
+    def _report(self, label, search, embeddings, truth):
+        latencies, recalls = [], []
+        for embedding, expected in zip(embeddings, truth):
+            start = time.perf_counter()
+            found = search(embedding)
+            latencies.append((time.perf_counter() - start) * 1000)
+            recalls.append(len(expected.intersection(found)) / len(expected) if expected else 1.0)
+
+        latencies.sort()
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+        self.stdout.write(self.style.SUCCESS(
+            f"[{label}] p50 {pct(0.5):.3f}ms, p99 {pct(0.99):.3f}ms, "
+            f"recall@k {sum(recalls) / len(recalls):.3f}"
+        ))
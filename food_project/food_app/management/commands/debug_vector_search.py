@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from food_app.models import Food
-from food_app.vector_service import get_chroma_collection, get_embedding_model, create_document_from_food
+from food_app.vector_service import get_chroma_collection, encode_query, embedding_cache_stats, create_document_from_food
 import pprint
 
 class Command(BaseCommand):
@@ -77,8 +77,7 @@ class Command(BaseCommand):
         self.stdout.write(self.style.HTTP_INFO(f"\n[4/4] 실시간 쿼리 테스트 실행 중..."))
         self.stdout.write(f"  - 테스트 쿼리: '{TEST_QUERY}'")
         try:
-            model = get_embedding_model()
-            query_embedding = model.encode(TEST_QUERY).tolist()
+            query_embedding = encode_query(TEST_QUERY).tolist()
 
             results = collection.query(
                 query_embeddings=[query_embedding],
@@ -90,6 +89,7 @@ class Command(BaseCommand):
             self.stdout.write("-"*20)
             pprint.pprint(results)
             self.stdout.write("-"*20)
+            self.stdout.write(f"  - 쿼리 임베딩 캐시: {embedding_cache_stats()}")
 
             if not results.get('ids') or not results['ids'][0]:
                 self.stdout.write(self.style.WARNING("  [분석] 유사한 음식을 찾지 못했습니다. 쿼리와 데이터 간의 의미적 거리가 먼 것으로 보입니다."))
@@ -0,0 +1,120 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+from tqdm import tqdm
+
+from food_app import classifier_engines
+from food_app.inference import CKPT_PATH
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+class Command(BaseCommand):
+    help = 'Exports the ConvNeXt classifier checkpoint to ONNX or TorchScript (optionally int8) and checks parity'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['onnx', 'torchscript'], default='onnx')
+        parser.add_argument('--quantize', action='store_true', help='int8 동적 양자화 적용')
+        parser.add_argument('--output', help='저장 경로 (기본값: CLASSIFIER_EXPORT_DIR/classifier[.int8].onnx|.ts)')
+        parser.add_argument('--eval-dir', help="정확도 비교용 폴더 ('<대표식품명>/<이미지>' 구조)")
+        parser.add_argument('--eval-limit', type=int, default=500, help='비교에 사용할 최대 이미지 수')
+        parser.add_argument('--batch-size', type=int, default=settings.CLASSIFIER_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        from transformers import AutoImageProcessor
+
+        fmt = options['format']
+        output = options['output'] or classifier_engines.default_artifact_path(
+            settings.CLASSIFIER_EXPORT_DIR, fmt, options['quantize']
+        )
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+
+        # 1. eager 모델 로드
+        self.stdout.write(f"체크포인트를 로드합니다: {CKPT_PATH}")
+        model, classes, model_name = classifier_engines.load_eager_model(CKPT_PATH)
+        processor = AutoImageProcessor.from_pretrained(model_name)
+        sample = processor(images=[Image.new('RGB', (224, 224))], return_tensors='np')['pixel_values']
+
+        # 2. 내보내기
+        self.stdout.write(f"{fmt}{' (int8)' if options['quantize'] else ''} 형식으로 내보냅니다: {output}")
+        start = time.perf_counter()
+        if fmt == 'onnx':
+            classifier_engines.export_onnx(model, sample, output, quantize=options['quantize'])
+        else:
+            classifier_engines.export_torchscript(model, sample, output, quantize=options['quantize'])
+        classifier_engines.write_meta(output, {
+            'classes': classes,
+            'model_name': model_name,
+            'format': fmt,
+            'quantized': options['quantize'],
+        })
+        size_mb = os.path.getsize(output) / 1024 / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f"내보내기 완료! ({time.perf_counter() - start:.1f}s, {size_mb:.1f}MB)"
+        ))
+        self.stdout.write(f"사용하려면: CLASSIFIER_ENGINE={fmt} CLASSIFIER_ARTIFACT_PATH={output}")
+
+        # 3. (선택) eager 모델과 정확도/지연 시간 비교
+        if options['eval_dir']:
+            exported = classifier_engines.load_exported_engine(fmt, output, settings.CLASSIFIER_NUM_THREADS)
+            self._report_parity(
+                classifier_engines.EagerEngine(model), exported, processor, classes,
+                options['eval_dir'], options['eval_limit'], max(1, options['batch_size']),
+            )
+
+    def _collect_images(self, eval_dir, limit):
+        samples = []
+        for label in sorted(os.listdir(eval_dir)):
+            class_dir = os.path.join(eval_dir, label)
+            if not os.path.isdir(class_dir):
+                continue
+            for filename in sorted(os.listdir(class_dir)):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    samples.append((os.path.join(class_dir, filename), label))
+        return samples[:limit]
+
+    def _report_parity(self, eager, exported, processor, classes, eval_dir, limit, batch_size):
+        samples = self._collect_images(eval_dir, limit)
+        if not samples:
+            self.stderr.write(self.style.ERROR(f"'{eval_dir}'에서 평가용 이미지를 찾을 수 없습니다."))
+            return
+
+        agree = eager_correct = exported_correct = labeled = 0
+        eager_time = exported_time = 0.0
+        max_logit_diff = 0.0
+
+        for i in tqdm(range(0, len(samples), batch_size), desc="eager vs exported 비교 중"):
+            batch = samples[i:i + batch_size]
+            images = [Image.open(path).convert('RGB') for path, _ in batch]
+            pixel_values = processor(images=images, return_tensors='np')['pixel_values']
+
+            start = time.perf_counter()
+            eager_logits = eager(pixel_values)
+            eager_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            exported_logits = exported(pixel_values)
+            exported_time += time.perf_counter() - start
+
+            max_logit_diff = max(max_logit_diff, float(abs(eager_logits - exported_logits).max()))
+            for (_, label), e_idx, x_idx in zip(batch, eager_logits.argmax(-1), exported_logits.argmax(-1)):
+                agree += int(e_idx == x_idx)
+                if label in classes:
+                    labeled += 1
+                    eager_correct += int(classes[e_idx] == label)
+                    exported_correct += int(classes[x_idx] == label)
+
+        total = len(samples)
+        self.stdout.write(self.style.SUCCESS(f"\n평가 이미지 {total}개 비교 결과"))
+        self.stdout.write(f"  - top-1 일치율 (eager vs {exported.name}): {agree / total:.2%}")
+        self.stdout.write(f"  - 최대 logit 차이: {max_logit_diff:.4f}")
+        if labeled:
+            self.stdout.write(f"  - 정확도 eager: {eager_correct / labeled:.2%}, {exported.name}: {exported_correct / labeled:.2%} (라벨 {labeled}개)")
+        self.stdout.write(
+            f"  - crop당 평균 지연: eager {eager_time / total * 1000:.1f}ms, "
+            f"{exported.name} {exported_time / total * 1000:.1f}ms "
+            f"(x{eager_time / exported_time:.2f})" if exported_time else ""
+        )
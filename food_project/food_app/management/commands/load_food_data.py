@@ -1,13 +1,75 @@
+import ast
+import time
+
 import pandas as pd
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from food_app.models import Food
-import json
+from food_app.food_index import bump_catalog_version
+
+# CSV 컬럼 -> Food 필드
+NUMERIC_COLUMNS = {
+    '에너지(kcal)': 'energy_kcal',
+    '단백질(g)': 'protein_g',
+    '지방(g)': 'fat_g',
+    '탄수화물(g)': 'carbohydrate_g',
+    '당류(g)': 'sugars_g',
+}
+TEXT_COLUMNS = {
+    'food_class': 'food_class',
+    '설명': 'description',
+    '조리_방식': 'cooking_method',
+}
+LIST_COLUMNS = {
+    '주요_재료': 'main_ingredients',
+    '맛_특징': 'taste_profile',
+    '상황_태그': 'situational_tags',
+}
+FIELDS = [*NUMERIC_COLUMNS.values(), *TEXT_COLUMNS.values(), *LIST_COLUMNS.values()]
+
+
+def parse_list(value):
+    """"['김치', '두부']" 형태의 문자열 -> 리스트 (비어있거나 잘못된 형식이면 빈 리스트)"""
+    if not isinstance(value, str):
+        return []
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return []
+    return list(parsed) if isinstance(parsed, (list, tuple)) else []
+
+
+def build_food_records(df_merged: pd.DataFrame) -> dict[str, dict]:
+    """병합된 데이터프레임 -> {대표식품명: Food 필드 값}
+
+    영양DB에는 대표식품명 하나에 세부 식품 여러 행이 있으므로, 행 단위 update_or_create와 같게
+    마지막 행의 값을 사용합니다. 컬럼 변환은 행 루프 없이 컬럼 단위로 처리합니다.
+    """
+    df = df_merged.dropna(subset=['대표식품명']).drop_duplicates('대표식품명', keep='last')
+
+    columns = {'representative_name': df['대표식품명']}
+    for column, field in NUMERIC_COLUMNS.items():
+        values = pd.to_numeric(df[column], errors='coerce') if column in df else pd.Series(None, index=df.index)
+        # NaN은 DB에 NULL로 저장 (NaN != NaN이라 변경 비교도 깨지지 않도록)
+        columns[field] = values.astype(object).where(values.notna(), None)
+    for column, field in TEXT_COLUMNS.items():
+        columns[field] = df[column].fillna('').astype(str) if column in df else ''
+    for column, field in LIST_COLUMNS.items():
+        columns[field] = df[column].map(parse_list) if column in df else pd.Series([[]] * len(df), index=df.index)
+
+    records = pd.DataFrame(columns).to_dict('records')
+    return {record.pop('representative_name'): record for record in records}
+
 
 class Command(BaseCommand):
     help = 'Loads food data from CSV files into the Food model'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='bulk_create/bulk_update 배치 크기')
+
     def handle(self, *args, **options):
         self.stdout.write("데이터 로딩 프로세스를 시작합니다...")
+        start = time.perf_counter()
 
         # --- 데이터 파일 경로 ---
         nutrition_db_path = 'food_project/data/클래스별_최종_영양DB.csv'
@@ -17,7 +79,7 @@ class Command(BaseCommand):
         try:
             self.stdout.write(f"'{nutrition_db_path}'에서 영양 정보를 로딩합니다.")
             df_nutrition = pd.read_csv(nutrition_db_path)
-            
+
             self.stdout.write(f"'{enriched_db_path}'에서 음식 설명 데이터를 로딩합니다.")
             df_enriched = pd.read_csv(enriched_db_path)
         except FileNotFoundError as e:
@@ -29,66 +91,42 @@ class Command(BaseCommand):
         self.stdout.write("영양 정보와 음식 설명 데이터를 병합합니다.")
         df_merged = pd.merge(df_nutrition, df_enriched, on='대표식품명', how='left')
 
-        # --- 데이터베이스에 저장 ---
-        created_count = 0
-        updated_count = 0
-
         total_rows = len(df_merged)
-        self.stdout.write(f"총 {total_rows}개의 음식 데이터를 데이터베이스에 저장/업데이트합니다.")
-
-        for _, row in df_merged.iterrows():
-            # '대표식품명'이 없는 경우 건너뛰기
-            if pd.isna(row['대표식품명']):
-                continue
-            
-            # JSON 필드에 들어갈 데이터 파싱 (문자열 -> 리스트)
-            # 만약 데이터가 비어있거나(NaN) 잘못된 형식일 경우를 대비
-            try:
-                main_ingredients = json.loads(row['주요_재료'].replace("'", '"')) if pd.notna(row['주요_재료']) else []
-            except (json.JSONDecodeError, TypeError):
-                main_ingredients = []
-
-            try:
-                taste_profile = json.loads(row['맛_특징'].replace("'", '"')) if pd.notna(row['맛_특징']) else []
-            except (json.JSONDecodeError, TypeError):
-                taste_profile = []
-            
-            try:
-                situational_tags = json.loads(row['상황_태그'].replace("'", '"')) if pd.notna(row['상황_태그']) else []
-            except (json.JSONDecodeError, TypeError):
-                situational_tags = []
-
-
-            # update_or_create: '대표식품명'을 기준으로 데이터가 있으면 업데이트, 없으면 생성
-            food_obj, created = Food.objects.update_or_create(
-                representative_name=row['대표식품명'],
-                defaults={
-                    'food_class': row.get('food_class', ''),
-                    'energy_kcal': row.get('에너지(kcal)'),
-                    'protein_g': row.get('단백질(g)'),
-                    'fat_g': row.get('지방(g)'),
-                    'carbohydrate_g': row.get('탄수화물(g)'),
-                    'sugars_g': row.get('당류(g)'),
-                    'description': row.get('설명', ''),
-                    'main_ingredients': main_ingredients,
-                    'taste_profile': taste_profile,
-                    'cooking_method': row.get('조리_방식', ''),
-                    'situational_tags': situational_tags,
-                }
-            )
-
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
-
-            # 진행 상황 표시
-            if (created_count + updated_count) % 100 == 0:
-                self.stdout.write(f"  {created_count + updated_count} / {total_rows} 처리 완료...")
+        records = build_food_records(df_merged)
+        self.stdout.write(f"총 {total_rows}개 행 -> 음식 {len(records)}개를 데이터베이스에 저장/업데이트합니다.")
+
+        # --- 기존 데이터와 비교 (쿼리 1번) ---
+        existing = Food.objects.only('representative_name', *FIELDS).in_bulk(
+            list(records), field_name='representative_name'
+        )
+        to_create, to_update = [], []
+        for name, values in records.items():
+            food = existing.get(name)
+            if food is None:
+                to_create.append(Food(representative_name=name, **values))
+            elif any(getattr(food, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(food, field, value)
+                to_update.append(food)
+        unchanged_count = len(records) - len(to_create) - len(to_update)
+
+        # --- 데이터베이스에 저장 (하나의 트랜잭션) ---
+        # bulk 연산은 post_save 시그널을 보내지 않으므로 카탈로그 버전은 아래에서 직접 갱신합니다.
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            Food.objects.bulk_create(to_create, batch_size=batch_size)
+            Food.objects.bulk_update(to_update, FIELDS, batch_size=batch_size)
+
+        if to_create or to_update:
+            # 웹 서버의 인메모리 음식 인덱스가 새 데이터로 다시 만들어지도록 버전 갱신
+            bump_catalog_version()
 
+        elapsed = time.perf_counter() - start
         self.stdout.write(self.style.SUCCESS(
-            f"데이터 로딩 완료! 총 {total_rows}개 처리."
+            f"데이터 로딩 완료! 총 {total_rows}개 행 처리 ({elapsed:.2f}초, {total_rows / elapsed:.0f} rows/s)."
         ))
         self.stdout.write(self.style.SUCCESS(
-            f"새로 생성된 음식: {created_count}개, 업데이트된 음식: {updated_count}개"
+            f"새로 생성된 음식: {len(to_create)}개, 업데이트된 음식: {len(to_update)}개, 변경 없음: {unchanged_count}개"
         ))
+        if to_create or to_update:
+            self.stdout.write("벡터 검색에 반영하려면 'index_food_vectors'를 실행해주세요 (바뀐 음식만 다시 임베딩합니다).")
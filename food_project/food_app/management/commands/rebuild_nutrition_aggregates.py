@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+from food_app.nutrition import rebuild_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Recomputes stored nutrition on meal items, meal totals and daily nutrition summaries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.stdout.write("식사 영양 합계를 현재 음식 영양 정보로 다시 계산합니다...")
+        start = time.perf_counter()
+        counts = rebuild_aggregates(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"완료: 식사 항목 {counts['items']}개, 식사 {counts['meals']}개, "
+            f"일별 요약 {counts['days']}개 ({time.perf_counter() - start:.2f}초)"
+        ))
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from food_app.inference_service import InferenceServer, parse_address
+
+
+class Command(BaseCommand):
+    help = 'Runs the dedicated inference server that owns the YOLO/ConvNeXt models'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--address', default=settings.INFERENCE_SERVER_ADDRESS or '127.0.0.1:8765',
+                            help="'host:port' 또는 유닉스 소켓 경로 (기본값: INFERENCE_SERVER_ADDRESS)")
+        parser.add_argument('--workers', type=int, default=settings.INFERENCE_WORKERS,
+                            help='동시에 추론을 수행할 스레드 수')
+        parser.add_argument('--queue-size', type=int, default=settings.INFERENCE_QUEUE_SIZE,
+                            help='대기 가능한 최대 작업 수 (초과 시 웹 워커는 503 응답)')
+        parser.add_argument('--job-timeout', type=float, default=settings.INFERENCE_JOB_TIMEOUT,
+                            help='작업 1건당 최대 대기/처리 시간(초)')
+        parser.add_argument('--stats-interval', type=float, default=60,
+                            help='마이크로 배칭 통계를 출력할 주기(초), 0이면 출력하지 않음')
+
+    def handle(self, *args, **options):
+        self.stdout.write("추론 서버를 시작합니다. 모델을 로드하는 중...")
+        server = InferenceServer(
+            address=parse_address(options['address']),
+            workers=options['workers'],
+            queue_size=options['queue_size'],
+            job_timeout=options['job_timeout'],
+        )
+
+        def on_ready(address):
+            self.stdout.write(self.style.SUCCESS(
+                f"추론 서버 준비 완료: {address} "
+                f"(workers={server.workers}, queue={server.jobs.maxsize}, timeout={server.job_timeout}s)"
+            ))
+
+        if options['stats_interval'] > 0 and settings.INFERENCE_MICRO_BATCHING:
+            threading.Thread(target=self._report_stats, args=(options['stats_interval'],), daemon=True).start()
+
+        try:
+            server.serve_forever(ready_callback=on_ready)
+        except KeyboardInterrupt:
+            self.stdout.write("추론 서버를 종료합니다.")
+
+    def _report_stats(self, interval):
+        from food_app import inference
+
+        while True:
+            time.sleep(interval)
+            for name, stats in inference.micro_batch_stats().items():
+                self.stdout.write(
+                    f"[batch:{name}] batches={stats['batches']} avg_size={stats['avg_batch_size']} "
+                    f"fill_rate={stats['fill_rate']:.1%} avg_queue_delay={stats['avg_queue_delay_ms']}ms "
+                    f"max_queue_delay={stats['max_queue_delay_ms']}ms"
+                )
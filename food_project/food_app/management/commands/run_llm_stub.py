@@ -0,0 +1,99 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+STUB_RECOMMENDATION = (
+    "오늘은 단백질이 조금 부족하셨네요. 따뜻한 순두부찌개를 추천드려요. "
+    "부드러운 두부로 단백질을 보충할 수 있고, 칼로리도 부담스럽지 않아요."
+)
+
+
+class Command(BaseCommand):
+    help = 'Runs a local OpenAI-compatible stub server (/v1/chat/completions) for offline testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument('--first-token-ms', type=float, default=300, help='첫 토큰까지의 지연(ms)')
+        parser.add_argument('--token-ms', type=float, default=20, help='토큰 사이 지연(ms)')
+
+    def handle(self, *args, **options):
+        first_token_delay = options['first_token_ms'] / 1000
+        token_delay = options['token_ms'] / 1000
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self._send_json(404, {'error': {'message': 'not found'}})
+                    return
+
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                model = request.get('model', 'stub')
+                if (request.get('response_format') or {}).get('type') == 'json_object':
+                    content = json.dumps({
+                        '설명': '테스트용 음식 설명입니다.',
+                        '주요_재료': ['재료1', '재료2'],
+                        '맛_특징': ['담백한'],
+                        '조리_방식': '찌개',
+                        '상황_태그': ['테스트'],
+                    }, ensure_ascii=False)
+                else:
+                    content = STUB_RECOMMENDATION
+
+                time.sleep(first_token_delay)
+                if request.get('stream'):
+                    self._stream(model, content)
+                else:
+                    self._send_json(200, {
+                        'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': int(time.time()), 'model': model,
+                        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+                        'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+                    })
+
+            def _stream(self, model, content):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+
+                def chunk(delta, finish_reason=None):
+                    payload = {
+                        'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                        'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode())
+                    self.wfile.flush()
+
+                chunk({'role': 'assistant', 'content': ''})
+                for word in content.split(' '):
+                    chunk({'content': word + ' '})
+                    time.sleep(token_delay)
+                chunk({}, finish_reason='stop')
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        self.stdout.write(self.style.SUCCESS(
+            f"LLM 스텁 서버 실행 중: http://{options['host']}:{options['port']}/v1 "
+            f"(OPENAI_BASE_URL로 지정하세요)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("LLM 스텁 서버를 종료합니다.")
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from food_app.inference import registry
+
+
+class Command(BaseCommand):
+    help = 'Loads the YOLO/ConvNeXt models and runs a dummy forward pass to report cold-start latency'
+
+    def handle(self, *args, **options):
+        self.stdout.write("추론 모델 웜업을 시작합니다...")
+        start = time.perf_counter()
+
+        try:
+            timings = registry.warmup()
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f"모델 웜업 중 오류 발생: {e}"))
+            return
+
+        for name, timing in timings.items():
+            engine = f" [{timing['engine']}]" if "engine" in timing else ""
+            self.stdout.write(
+                f"  - {name}{engine}: 로드 {timing['load_s']:.2f}s, 첫 추론 {timing['first_inference_s']:.3f}s"
+            )
+        self.stdout.write(self.style.SUCCESS(f"모델 웜업 완료! (총 {time.perf_counter() - start:.2f}s)"))
@@ -0,0 +1,141 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+# 이 마이그레이션 시점의 필드 이름 (이후 모델/nutrition.py가 바뀌어도 영향받지 않도록 고정)
+NUTRIENT_FIELDS = ['energy_kcal', 'protein_g', 'fat_g', 'carbohydrate_g', 'sugars_g']
+TOTAL_FIELDS = {
+    'energy_kcal': 'total_kcal',
+    'protein_g': 'total_protein_g',
+    'fat_g': 'total_fat_g',
+    'carbohydrate_g': 'total_carbohydrate_g',
+    'sugars_g': 'total_sugars_g',
+}
+BATCH_SIZE = 1000
+
+
+def backfill_aggregates(apps, schema_editor):
+    """기존 식사 항목/식사/일별 요약 값을 채웁니다. (nutrition.rebuild_aggregates와 같은 계산)"""
+    MealItem = apps.get_model('food_app', 'MealItem')
+    Meal = apps.get_model('food_app', 'Meal')
+    DailyNutritionSummary = apps.get_model('food_app', 'DailyNutritionSummary')
+
+    items = []
+    for item in MealItem.objects.select_related('food').iterator(chunk_size=BATCH_SIZE):
+        ratio = item.weight_g / 100.0
+        for field_name in NUTRIENT_FIELDS:
+            base_value = getattr(item.food, field_name)
+            setattr(item, field_name, base_value * ratio if base_value is not None else None)
+        items.append(item)
+        if len(items) >= BATCH_SIZE:
+            MealItem.objects.bulk_update(items, NUTRIENT_FIELDS)
+            items = []
+    MealItem.objects.bulk_update(items, NUTRIENT_FIELDS)
+
+    totals_by_meal = {
+        row.pop('meal_id'): row
+        for row in MealItem.objects.values('meal_id').annotate(**{
+            total_field: Coalesce(Sum(field_name), 0.0) for field_name, total_field in TOTAL_FIELDS.items()
+        })
+    }
+    empty_totals = dict.fromkeys(TOTAL_FIELDS.values(), 0.0)
+    meals = list(Meal.objects.only('id', *TOTAL_FIELDS.values()))
+    for meal in meals:
+        for total_field, value in totals_by_meal.get(meal.id, empty_totals).items():
+            setattr(meal, total_field, value)
+    Meal.objects.bulk_update(meals, list(TOTAL_FIELDS.values()), batch_size=BATCH_SIZE)
+
+    daily_rows = (
+        Meal.objects
+        .annotate(day=TruncDate('created_at'))
+        .values('user_id', 'day')
+        .annotate(meal_count=Count('id'), **{
+            total_field: Coalesce(Sum(total_field), 0.0) for total_field in TOTAL_FIELDS.values()
+        })
+    )
+    DailyNutritionSummary.objects.bulk_create(
+        [DailyNutritionSummary(date=row.pop('day'), **row) for row in daily_rows], batch_size=BATCH_SIZE
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meal',
+            name='total_carbohydrate_g',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='meal',
+            name='total_fat_g',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='meal',
+            name='total_kcal',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='meal',
+            name='total_protein_g',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='meal',
+            name='total_sugars_g',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mealitem',
+            name='carbohydrate_g',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mealitem',
+            name='energy_kcal',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mealitem',
+            name='fat_g',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mealitem',
+            name='protein_g',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mealitem',
+            name='sugars_g',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DailyNutritionSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('meal_count', models.PositiveIntegerField(default=0)),
+                ('total_kcal', models.FloatField(default=0)),
+                ('total_protein_g', models.FloatField(default=0)),
+                ('total_fat_g', models.FloatField(default=0)),
+                ('total_carbohydrate_g', models.FloatField(default=0)),
+                ('total_sugars_g', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_nutrition', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('food_app', '0002_nutrition_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['user', 'created_at'], name='meal_user_created_idx'),
+        ),
+    ]
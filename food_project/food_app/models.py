@@ -74,6 +74,10 @@ class UserProfile(models.Model):
         return int(round(bmr * activity_factor))
 
 
+# 음식/식사 항목 공통 영양소 필드 (100g 기준 값 또는 섭취량 기준 값)
+NUTRIENT_FIELDS = ('energy_kcal', 'protein_g', 'fat_g', 'carbohydrate_g', 'sugars_g')
+
+
 # === Food 모델 정의 (Allergen 필드 추가) ===
 class Food(models.Model):
     """모든 음식에 대한 표준 정보를 담는 모델"""
@@ -118,14 +122,19 @@ class Meal(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="meals")
     created_at = models.DateTimeField(default=timezone.now)
     title = models.CharField(max_length=100, blank=True)
-    
-    @property
-    def total_kcal(self):
-        total = 0
-        for item in self.items.all():
-            if item.food and item.food.energy_kcal:
-                total += (item.food.energy_kcal * item.weight_g) / 100.0
-        return round(total, 2)
+
+    # --- 영양 합계 (MealItem 값의 합, nutrition.recalculate_meal이 갱신) ---
+    total_kcal = models.FloatField(default=0)
+    total_protein_g = models.FloatField(default=0)
+    total_fat_g = models.FloatField(default=0)
+    total_carbohydrate_g = models.FloatField(default=0)
+    total_sugars_g = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            # 사용자별 기간 조회 (기간별 영양 합계)
+            models.Index(fields=['user', 'created_at'], name='meal_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
@@ -135,5 +144,42 @@ class MealItem(models.Model):
     food = models.ForeignKey(Food, on_delete=models.CASCADE, verbose_name="음식")
     weight_g = models.FloatField(verbose_name="섭취량(g)")
 
+    # --- 섭취량 기준 영양 정보 (저장 시점의 음식 영양 정보 x weight_g / 100) ---
+    energy_kcal = models.FloatField(null=True, blank=True)
+    protein_g = models.FloatField(null=True, blank=True)
+    fat_g = models.FloatField(null=True, blank=True)
+    carbohydrate_g = models.FloatField(null=True, blank=True)
+    sugars_g = models.FloatField(null=True, blank=True)
+
+    def fill_nutrition(self):
+        """음식의 100g당 영양 정보와 섭취량으로 영양 필드 계산"""
+        ratio = self.weight_g / 100.0
+        for field_name in NUTRIENT_FIELDS:
+            base_value = getattr(self.food, field_name, None)
+            setattr(self, field_name, base_value * ratio if base_value is not None else None)
+
+    def save(self, *args, **kwargs):
+        self.fill_nutrition()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.food.representative_name} ({self.weight_g} g)"
+
+
+# === 일별 영양 합계 ===
+class DailyNutritionSummary(models.Model):
+    """사용자의 하루(현지 날짜) 식사 영양 합계. 식사 저장/삭제 시 nutrition.recalculate_daily_summary가 갱신"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_nutrition")
+    date = models.DateField()
+    meal_count = models.PositiveIntegerField(default=0)
+    total_kcal = models.FloatField(default=0)
+    total_protein_g = models.FloatField(default=0)
+    total_fat_g = models.FloatField(default=0)
+    total_carbohydrate_g = models.FloatField(default=0)
+    total_sugars_g = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'date')
+
     def __str__(self):
-        return f"{self.food.representative_name} ({self.weight_g} g)"
\ No newline at end of file
+        return f"{self.user.username} - {self.date}: {round(self.total_kcal)} kcal"
@@ -0,0 +1,156 @@
+# food_app/nutrition.py
+"""
+식사 영양 합계 (비정규화 저장값) 관리
+
+- MealItem: 저장 시 음식 영양 정보 x 섭취량으로 영양 필드 계산 (MealItem.fill_nutrition)
+- Meal: 항목 합계 (total_kcal 등)
+- DailyNutritionSummary: (사용자, 현지 날짜)별 식사 합계
+
+조회 시 매번 식사/항목을 순회하지 않도록, 쓰기 경로(MealSerializer.create/update,
+식사 삭제 signal)에서 같은 트랜잭션 안에 합계를 갱신합니다.
+음식 영양 정보가 바뀌어도 이미 기록된 식사 값은 유지되며, 다시 계산하려면
+'rebuild_nutrition_aggregates' 명령을 실행합니다.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import NUTRIENT_FIELDS, DailyNutritionSummary, Meal, MealItem
+
+# MealItem 영양 필드 -> Meal/DailyNutritionSummary 합계 필드
+TOTAL_FIELDS = {field_name: f"total_{field_name}" for field_name in NUTRIENT_FIELDS}
+TOTAL_FIELDS['energy_kcal'] = 'total_kcal'
+
+# 기간 합계 단위 -> 날짜 절사 함수 (주는 월요일 시작)
+GRANULARITIES = {'day': TruncDate, 'week': TruncWeek, 'month': TruncMonth}
+
+
+def meal_date(meal: Meal) -> date:
+    """식사가 속한 날짜 (created_at__date 조회와 같은 현지 시간대 기준)"""
+    return timezone.localdate(meal.created_at)
+
+
+def recalculate_meal(meal: Meal):
+    """항목 영양 값의 합으로 식사 합계 갱신 (쿼리 2번: 집계 + UPDATE)"""
+    totals = meal.items.aggregate(**{
+        total_field: Coalesce(Sum(field_name), 0.0) for field_name, total_field in TOTAL_FIELDS.items()
+    })
+    for total_field, value in totals.items():
+        setattr(meal, total_field, value)
+    meal.save(update_fields=list(totals))
+
+
+def recalculate_daily_summary(user_id: int, day: date) -> DailyNutritionSummary | None:
+    """해당 날짜 식사 합계로 일별 요약 갱신. 식사가 없으면 요약 행을 삭제합니다."""
+    totals = Meal.objects.filter(user_id=user_id, created_at__date=day).aggregate(
+        meal_count=Count('id'),
+        **{total_field: Coalesce(Sum(total_field), 0.0) for total_field in TOTAL_FIELDS.values()},
+    )
+    if not totals['meal_count']:
+        DailyNutritionSummary.objects.filter(user_id=user_id, date=day).delete()
+        return None
+    summary, _ = DailyNutritionSummary.objects.update_or_create(user_id=user_id, date=day, defaults=totals)
+    return summary
+
+
+def refresh_meal_aggregates(meal: Meal):
+    """식사 항목이 바뀐 뒤 호출: 식사 합계와 그날 요약을 함께 갱신"""
+    recalculate_meal(meal)
+    recalculate_daily_summary(meal.user_id, meal_date(meal))
+
+
+def refresh_meals_aggregates(meal_ids):
+    """여러 식사의 합계와 해당 날짜 요약을 갱신 (음식 삭제로 항목이 함께 지워졌을 때)"""
+    days = set()
+    for meal in Meal.objects.filter(pk__in=meal_ids):
+        recalculate_meal(meal)
+        days.add((meal.user_id, meal_date(meal)))
+    for user_id, day in days:
+        recalculate_daily_summary(user_id, day)
+
+
+async def aget_daily_summary(user, day: date | None = None) -> DailyNutritionSummary:
+    """일별 요약 조회 (행 하나). 기록이 없는 날은 저장되지 않은 0 값 요약을 반환합니다."""
+    day = day or timezone.localdate()
+    summary = await DailyNutritionSummary.objects.filter(user=user, date=day).afirst()
+    return summary or DailyNutritionSummary(user=user, date=day)
+
+
+def nutrition_totals(user, start: date, end: date, granularity: str = 'day') -> list[dict]:
+    """
+    start~end(포함) 식사 영양 합계를 일/주/월 단위로 집계 (쿼리 1번)
+    반환: [{"period": date, "meal_count": n, "energy_kcal": ..., "protein_g": ..., ...}, ...] (기간 순)
+    식사가 없는 기간은 포함하지 않습니다.
+    """
+    trunc = GRANULARITIES[granularity]
+    tz = timezone.get_current_timezone()
+    # created_at__date 대신 시각 범위로 걸러야 (user, created_at) 인덱스를 사용할 수 있습니다.
+    rows = (
+        Meal.objects
+        .filter(
+            user=user,
+            created_at__gte=datetime.combine(start, time.min, tzinfo=tz),
+            created_at__lt=datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz),
+        )
+        .annotate(period=trunc('created_at', tzinfo=tz))
+        .values('period')
+        .annotate(meal_count=Count('id'), **{
+            field_name: Coalesce(Sum(total_field), 0.0) for field_name, total_field in TOTAL_FIELDS.items()
+        })
+        .order_by('period')
+    )
+    return [
+        {**row, 'period': row['period'].date() if isinstance(row['period'], datetime) else row['period']}
+        for row in rows
+    ]
+
+
+def rebuild_aggregates(batch_size: int = 1000) -> dict:
+    """모든 식사 항목/식사/일별 요약을 현재 음식 영양 정보로 다시 계산 (한 트랜잭션)"""
+    with transaction.atomic():
+        # 1. 항목별 영양 값
+        items, item_count = [], 0
+        for item in MealItem.objects.select_related('food').iterator(chunk_size=batch_size):
+            ratio = item.weight_g / 100.0
+            for field_name in NUTRIENT_FIELDS:
+                base_value = getattr(item.food, field_name)
+                setattr(item, field_name, base_value * ratio if base_value is not None else None)
+            items.append(item)
+            if len(items) >= batch_size:
+                MealItem.objects.bulk_update(items, NUTRIENT_FIELDS)
+                item_count += len(items)
+                items = []
+        MealItem.objects.bulk_update(items, NUTRIENT_FIELDS)
+        item_count += len(items)
+
+        # 2. 식사 합계: 항목을 식사별로 한 번에 집계
+        totals_by_meal = {
+            row.pop('meal_id'): row
+            for row in MealItem.objects.values('meal_id').annotate(**{
+                total_field: Coalesce(Sum(field_name), 0.0) for field_name, total_field in TOTAL_FIELDS.items()
+            })
+        }
+        empty_totals = dict.fromkeys(TOTAL_FIELDS.values(), 0.0)
+        meals = list(Meal.objects.only('id', *TOTAL_FIELDS.values()))
+        for meal in meals:
+            for total_field, value in totals_by_meal.get(meal.id, empty_totals).items():
+                setattr(meal, total_field, value)
+        Meal.objects.bulk_update(meals, list(TOTAL_FIELDS.values()), batch_size=batch_size)
+
+        # 3. 일별 요약: (사용자, 현지 날짜)별 식사 합계
+        DailyNutritionSummary.objects.all().delete()
+        daily_rows = (
+            Meal.objects
+            .annotate(day=TruncDate('created_at'))
+            .values('user_id', 'day')
+            .annotate(meal_count=Count('id'), **{
+                total_field: Coalesce(Sum(total_field), 0.0) for total_field in TOTAL_FIELDS.values()
+            })
+        )
+        summaries = [DailyNutritionSummary(date=row.pop('day'), **row) for row in daily_rows]
+        DailyNutritionSummary.objects.bulk_create(summaries, batch_size=batch_size)
+
+    return {"items": item_count, "meals": len(meals), "days": len(summaries)}
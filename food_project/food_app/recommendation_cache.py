@@ -0,0 +1,140 @@
+# food_app/recommendation_cache.py
+"""
+/api/recommend-menu/ LLM 응답 캐시 (semantic cache)
+
+같은 사용자가 짧은 시간 안에 거의 같은 요청("비오는 날 국물 요리" → "비 오는 날 국물요리")을
+다시 보냈고 그 사이 식사 기록/선호도가 바뀌지 않았다면, LLM을 다시 호출하지 않고
+이전 추천 문장을 그대로 돌려줍니다.
+
+- 사용자 상태 지문: 오늘의 영양 요약, 알러지, 좋아요/싫어요 음식, 채식 여부, 후보 음식 ID,
+  카탈로그 버전의 SHA-256. 하나라도 바뀌면 지문이 달라져 적중하지 않습니다.
+- 쿼리 임베딩: 지문이 같은 항목 중 코사인 유사도가
+  settings.RECOMMENDATION_CACHE_MIN_SIMILARITY 이상인 가장 가까운 쿼리를 적중으로 봅니다.
+
+무효화: TTL + LRU 크기 제한, 그리고 식사/선호도/프로필 변경 시(signals) 해당 사용자 항목 삭제.
+캐시는 프로세스 단위입니다. 다른 워커에서 생긴 변경도 지문에 반영되므로 오래된 추천을 돌려주지는 않습니다.
+"""
+import hashlib
+import json
+import threading
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+
+from .caching import LRUTTLCache
+
+
+class RecommendationKey(NamedTuple):
+    user_id: int
+    fingerprint: str
+    query: str              # 공백/대소문자 정규화된 쿼리
+    embedding: np.ndarray   # 단위 벡터
+
+    @property
+    def lookup(self) -> tuple[int, str, str]:
+        return self.user_id, self.fingerprint, self.query
+
+
+def user_fingerprint(
+    nutrition_summary: dict,
+    allergy_ids,
+    liked_food_ids,
+    disliked_food_ids,
+    is_vegetarian: bool,
+    candidate_ids,
+    catalog_version: int,
+) -> str:
+    """추천 결과에 영향을 주는 사용자 상태 → SHA-256 hex"""
+    state = {
+        "nutrition": nutrition_summary,
+        "allergies": sorted(allergy_ids),
+        "likes": sorted(liked_food_ids),
+        "dislikes": sorted(disliked_food_ids),
+        "vegetarian": is_vegetarian,
+        "candidates": sorted(candidate_ids),
+        "catalog": catalog_version,
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()
+
+
+def _unit(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def make_key(user_id: int, fingerprint: str, query_text: str, query_embedding) -> RecommendationKey:
+    query = " ".join(query_text.lower().split())
+    return RecommendationKey(user_id, fingerprint, query, _unit(query_embedding))
+
+
+class RecommendationCache:
+    """(사용자, 지문, 쿼리) → (쿼리 임베딩, 추천 문장) + 유사 쿼리 검색, 적중률 카운터"""
+
+    def __init__(self, max_entries: int, ttl: float, min_similarity: float, enabled: bool = True):
+        self.entries = LRUTTLCache(max_entries, ttl)
+        self.min_similarity = min_similarity
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _find(self, key: RecommendationKey):
+        entry = self.entries.get(key.lookup)
+        if entry is not None:
+            return entry[1], "exact"
+
+        # 같은 사용자/지문의 항목 중 쿼리 임베딩이 가장 가까운 것
+        best, best_similarity = None, self.min_similarity
+        for (user_id, fingerprint, _), (embedding, recommendation) in self.entries.items():
+            if user_id != key.user_id or fingerprint != key.fingerprint:
+                continue
+            similarity = float(np.dot(embedding, key.embedding))
+            if similarity >= best_similarity:
+                best, best_similarity = recommendation, similarity
+        return (best, "semantic") if best is not None else (None, None)
+
+    def get(self, key: RecommendationKey) -> str | None:
+        if not self.enabled:
+            return None
+        recommendation, kind = self._find(key)
+        with self._lock:
+            if kind == "exact":
+                self.exact_hits += 1
+            elif kind == "semantic":
+                self.semantic_hits += 1
+            else:
+                self.misses += 1
+        return recommendation
+
+    def set(self, key: RecommendationKey, recommendation: str):
+        if self.enabled and recommendation:
+            self.entries.set(key.lookup, (key.embedding, recommendation))
+
+    def invalidate_user(self, user_id: int):
+        for lookup, _ in self.entries.items():
+            if lookup[0] == user_id:
+                self.entries.delete(lookup)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.entries.evictions,
+            }
+
+
+recommendation_cache = RecommendationCache(
+    settings.RECOMMENDATION_CACHE_MAX_ENTRIES,
+    settings.RECOMMENDATION_CACHE_TTL,
+    settings.RECOMMENDATION_CACHE_MIN_SIMILARITY,
+    enabled=settings.RECOMMENDATION_CACHE_ENABLED,
+)
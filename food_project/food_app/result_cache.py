@@ -0,0 +1,160 @@
+# food_app/result_cache.py
+"""
+/api/predict/ 결과 캐시
+
+같은 사진을 다시 올리거나(재시도) 거의 같은 사진을 연속 촬영한 경우
+YOLO/분류기를 다시 돌리지 않고 이전 탐지 결과(pred_class, confidence, top_k, low_confidence,
+원본 해상도 bbox)를 재사용합니다. 식품 후보(food_options)는 카탈로그가 바뀔 수 있으므로
+캐시하지 않고 적중 시에도 food_index에서 다시 조회합니다.
+
+- 1차 키: 업로드 파일 내용의 SHA-256 (완전히 같은 파일)
+- 2차 키: 디코딩된 이미지의 perceptual hash(dHash, 64bit) + 이미지 크기 (거의 같은 사진)
+  settings.PREDICTION_CACHE_PERCEPTUAL=true일 때만 사용 (기본값 꺼짐)
+
+백엔드 (settings.PREDICTION_CACHE_BACKEND)
+- "local":  프로세스 내 LRU + TTL 캐시, dHash 해밍 거리로 유사 이미지 검색
+- "django": Django 캐시 프레임워크 (settings.CACHES), 워커 간 공유. dHash는 정확히 같은 값만 매칭
+- "none":   캐시 사용 안 함
+"""
+import hashlib
+import threading
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import caches
+from PIL import Image
+
+from .caching import LRUTTLCache
+
+
+class PredictionKey(NamedTuple):
+    content_hash: str
+    phash: int | None
+    size: tuple[int, int]
+
+
+def dhash(img: Image.Image, hash_size: int = 8) -> int:
+    """difference hash: 축소한 흑백 이미지에서 인접 픽셀의 밝기 증감을 비트로 기록"""
+    small = img.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return value
+
+
+def make_key(content: bytes, img: Image.Image, size: tuple[int, int] | None = None) -> PredictionKey:
+    """size: 결과 bbox의 기준 해상도 (축소한 작업 이미지로 해시할 때 원본 크기를 넘김)"""
+    phash = dhash(img) if settings.PREDICTION_CACHE_PERCEPTUAL else None
+    return PredictionKey(hashlib.sha256(content).hexdigest(), phash, size or img.size)
+
+
+class LocalBackend:
+    def __init__(self, max_entries: int, ttl: float, max_distance: int):
+        self.entries = LRUTTLCache(max_entries, ttl)
+        self.max_distance = max_distance
+
+    def get(self, key: PredictionKey):
+        entry = self.entries.get(key.content_hash)
+        if entry is not None:
+            return entry[2], "exact"
+        if key.phash is None:
+            return None, None
+
+        # 같은 크기의 이미지 중 해밍 거리가 가장 가까운 항목
+        best, best_distance = None, self.max_distance + 1
+        for _, (phash, size, payload) in self.entries.items():
+            if phash is None or size != key.size:
+                continue
+            distance = (phash ^ key.phash).bit_count()
+            if distance < best_distance:
+                best, best_distance = payload, distance
+        return (best, "perceptual") if best is not None else (None, None)
+
+    def set(self, key: PredictionKey, payload):
+        self.entries.set(key.content_hash, (key.phash, key.size, payload))
+
+
+class DjangoCacheBackend:
+    def __init__(self, alias: str, ttl: float):
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    @staticmethod
+    def _phash_key(key: PredictionKey) -> str:
+        return f"predict:phash:{key.phash:016x}:{key.size[0]}x{key.size[1]}"
+
+    def get(self, key: PredictionKey):
+        payload = self.cache.get(f"predict:sha:{key.content_hash}")
+        if payload is not None:
+            return payload, "exact"
+        if key.phash is not None:
+            payload = self.cache.get(self._phash_key(key))
+            if payload is not None:
+                return payload, "perceptual"
+        return None, None
+
+    def set(self, key: PredictionKey, payload):
+        values = {f"predict:sha:{key.content_hash}": payload}
+        if key.phash is not None:
+            values[self._phash_key(key)] = payload
+        self.cache.set_many(values, timeout=self.ttl)
+
+
+class PredictionCache:
+    """백엔드 선택 + 적중률 카운터 (카운터는 프로세스 단위)"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+
+    def get(self, key: PredictionKey):
+        if self.backend is None:
+            return None
+        payload, kind = self.backend.get(key)
+        with self._lock:
+            if kind == "exact":
+                self.exact_hits += 1
+            elif kind == "perceptual":
+                self.perceptual_hits += 1
+            else:
+                self.misses += 1
+        return payload
+
+    def set(self, key: PredictionKey, payload):
+        if self.backend is not None:
+            self.backend.set(key, payload)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.perceptual_hits
+            lookups = hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "perceptual_hits": self.perceptual_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+def _create_backend():
+    name = settings.PREDICTION_CACHE_BACKEND
+    if name == "local":
+        return LocalBackend(
+            settings.PREDICTION_CACHE_MAX_ENTRIES,
+            settings.PREDICTION_CACHE_TTL,
+            settings.PREDICTION_CACHE_MAX_DISTANCE,
+        )
+    if name == "django":
+        return DjangoCacheBackend(settings.PREDICTION_CACHE_ALIAS, settings.PREDICTION_CACHE_TTL)
+    if name == "none":
+        return None
+    raise ValueError(f"알 수 없는 PREDICTION_CACHE_BACKEND 값입니다: {name}")
+
+
+prediction_cache = PredictionCache(_create_backend())
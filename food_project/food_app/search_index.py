@@ -0,0 +1,182 @@
+# food_app/search_index.py
+"""
+음식 이름 자동완성/검색용 인메모리 인덱스
+
+- 완성된 음절은 글자 그대로 부분 문자열로 매칭합니다. ("김" → "김밥"은 되지만 "기무치"는 안 됨)
+- 마지막 글자가 입력 중인 미완성 음절(자모 하나, 또는 받침 없는 음절)이면 그 글자만
+  이름의 다음 음절과 자모 앞부분으로 매칭합니다. ("김치ㅉ" → "김치찌개", "기" → "김밥")
+- 한글 음절을 기본 자모로 분해한 문자열(예: "김치찌개" → "ㄱㅣㅁㅊㅣㅉㅣㄱㅐ")의
+  3-gram 역색인으로 후보를 좁힌 뒤 위 조건을 확인합니다.
+- 초성만 입력한 경우("ㄱㅊㅉㄱ")는 이름의 초성 문자열과 매칭합니다.
+
+인덱스는 food_index와 같은 카탈로그 버전을 사용해 무효화됩니다.
+"""
+import threading
+
+from .food_index import get_catalog_version
+
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+
+# 호환용 자모 (사용자가 키보드로 입력하는 형태)
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+             "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+
+# 겹자음/겹모음 → 기본 자모 (입력 중 "닭" = "달" + "ㄱ" 같은 경우를 위해)
+COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+CONSONANTS = set(CHOSEONG) | {jong for jong in JONGSEONG if jong}
+
+NGRAM = 3
+
+
+def _normalize(text: str) -> str:
+    return "".join(text.lower().split())
+
+
+def decompose(text: str) -> str:
+    """문자열 → 기본 자모 문자열 (한글이 아닌 문자는 그대로)"""
+    out = []
+    for ch in _normalize(text):
+        code = ord(ch)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            index = code - HANGUL_BASE
+            parts = (CHOSEONG[index // 588], JUNGSEONG[(index % 588) // 28], JONGSEONG[index % 28])
+            out.extend(COMPOUND_JAMO.get(part, part) for part in parts)
+        else:
+            out.append(COMPOUND_JAMO.get(ch, ch))
+    return "".join(out)
+
+
+def choseong(text: str) -> str:
+    """문자열 → 초성 문자열 (예: "김치찌개" → "ㄱㅊㅉㄱ")"""
+    out = []
+    for ch in _normalize(text):
+        code = ord(ch)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            out.append(CHOSEONG[(code - HANGUL_BASE) // 588])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def is_choseong_query(query: str) -> bool:
+    normalized = _normalize(query)
+    return bool(normalized) and all(ch in CONSONANTS for ch in normalized)
+
+
+def is_incomplete(ch: str) -> bool:
+    """입력 중일 수 있는 글자: 호환용 자모 하나 또는 받침 없는 음절 (뒤에 자모가 더 붙을 수 있음)"""
+    code = ord(ch)
+    if HANGUL_BASE <= code <= HANGUL_LAST:
+        return (code - HANGUL_BASE) % 28 == 0
+    return ch in CONSONANTS or ch in JUNGSEONG
+
+
+def match_position(name: str, query: str, last_jamo: str | None) -> int:
+    """
+    정규화된 이름에서 검색어가 일치하는 글자 위치 (없으면 -1)
+    last_jamo가 있으면 검색어의 마지막 글자는 이름의 다음 음절과 자모 앞부분으로 비교합니다.
+    """
+    if last_jamo is None:
+        return name.find(query)
+    head = query[:-1]
+    start = name.find(head)
+    while 0 <= start and start + len(head) < len(name):
+        if decompose(name[start + len(head)]).startswith(last_jamo):
+            return start
+        start = name.find(head, start + 1)
+    return -1
+
+
+def _ngrams(text: str) -> set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class FoodNameIndex:
+    """Food.representative_name 자모 n-gram 인덱스 (불변, 카탈로그 버전별로 생성)"""
+
+    def __init__(self, version: int, rows: list[tuple[int, str, str]]):
+        self.version = version
+        self.rows = tuple(rows)                                    # (id, 이름, food_class)
+        self.names = tuple(_normalize(name) for _, name, _ in rows)
+        self.jamo = tuple(decompose(name) for _, name, _ in rows)
+        self.initials = tuple(choseong(name) for _, name, _ in rows)
+
+        postings: dict[str, set[int]] = {}
+        for position, jamo in enumerate(self.jamo):
+            for gram in _ngrams(jamo):
+                postings.setdefault(gram, set()).add(position)
+        self.postings = {gram: frozenset(positions) for gram, positions in postings.items()}
+
+    @classmethod
+    def build(cls, version: int) -> "FoodNameIndex":
+        from .models import Food
+
+        rows = Food.objects.values_list('id', 'representative_name', 'food_class').order_by('id')
+        return cls(version, list(rows))
+
+    def _candidates(self, query_jamo: str):
+        grams = _ngrams(query_jamo)
+        if not grams:
+            # 자모 1~2개짜리 짧은 입력은 전체(수천 건) 확인이 색인 조회보다 빠름
+            return range(len(self.rows))
+        posting_lists = sorted((self.postings.get(gram, frozenset()) for gram in grams), key=len)
+        return frozenset.intersection(*posting_lists)
+
+    def search(self, query: str) -> list[int]:
+        """
+        검색어 → 순위순 행 위치 목록
+        순위: 이름 완전 일치 > 앞부분 일치 > 일치 위치가 앞인 순 > 짧은 이름 순
+        """
+        normalized = _normalize(query)
+        if not normalized:
+            return []
+
+        if is_choseong_query(normalized):
+            haystacks, candidates, last_jamo = self.initials, range(len(self.rows)), None
+        else:
+            haystacks, candidates = self.names, self._candidates(decompose(normalized))
+            last_jamo = decompose(normalized[-1]) if is_incomplete(normalized[-1]) else None
+
+        ranked = []
+        for position in candidates:
+            found_at = match_position(haystacks[position], normalized, last_jamo)
+            if found_at < 0:
+                continue
+            exact = self.names[position] == normalized
+            ranked.append((not exact, found_at, len(self.names[position]), self.rows[position][0], position))
+        ranked.sort()
+        return [item[-1] for item in ranked]
+
+
+_index: FoodNameIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> FoodNameIndex:
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = FoodNameIndex.build(version)
+            index = _index
+    return index
+
+
+def search_foods(query: str, limit: int, offset: int = 0) -> tuple[int, list[dict]]:
+    """검색어 → (전체 일치 수, 요청한 페이지의 [{id, representative_name, food_class}, ...])"""
+    index = get_index()
+    positions = index.search(query)
+    page = [
+        {'id': food_id, 'representative_name': name, 'food_class': food_class}
+        for food_id, name, food_class in (index.rows[p] for p in positions[offset:offset + limit])
+    ]
+    return len(positions), page
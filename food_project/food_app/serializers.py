@@ -1,7 +1,9 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
+from django.db import transaction
 from django.utils import timezone
-from .models import UserProfile, Meal, MealItem, Food, Allergen, UserFoodPreference
+from .models import NUTRIENT_FIELDS, UserProfile, Meal, MealItem, Food, Allergen, UserFoodPreference
+from .nutrition import refresh_meal_aggregates
 
 
 class AllergenSerializer(serializers.ModelSerializer):
@@ -69,9 +71,8 @@ class MealItemSerializer(serializers.ModelSerializer):
     # For reading, show nested food details
     food = FoodSerializer(read_only=True)
     # For writing, accept just the food ID
-    food_id = serializers.PrimaryKeyRelatedField(
-        queryset=Food.objects.all(), source='food', write_only=True
-    )
+    # (resolved to Food objects for all items at once in MealSerializer.validate_items)
+    food_id = serializers.IntegerField(write_only=True)
     # NEW: Calculate and include nutrition info on read
     nutrition = serializers.SerializerMethodField()
 
@@ -82,33 +83,19 @@ class MealItemSerializer(serializers.ModelSerializer):
     def get_nutrition(self, obj):
         """
         This obj is a MealItem instance.
-        Calculate nutrition based on the food's base nutrition and the item's weight.
+        Nutrition is stored on the item when it is saved (MealItem.fill_nutrition).
         """
-        if not obj.food:
-            return None
-
-        ratio = obj.weight_g / 100.0
-        
-        nutrition_data = {}
-        nutrition_fields = [
-            'energy_kcal', 'protein_g', 'fat_g', 'carbohydrate_g', 'sugars_g'
-        ]
-        
-        for field_name in nutrition_fields:
-            base_value = getattr(obj.food, field_name, None)
-            if base_value is not None:
-                nutrition_data[field_name] = round(base_value * ratio, 2)
-            else:
-                nutrition_data[field_name] = None
-        
         # Return raw keys matching frontend expectations
-        return nutrition_data
+        return {
+            field_name: round(value, 2) if (value := getattr(obj, field_name)) is not None else None
+            for field_name in NUTRIENT_FIELDS
+        }
 
 # --- REVISED: Serializer for Meal ---
 class MealSerializer(serializers.ModelSerializer):
     items = MealItemSerializer(many=True)
-    # total_kcal is now a read-only field from the model's property
-    total_kcal = serializers.FloatField(read_only=True)
+    # total_kcal is a stored aggregate (see nutrition.recalculate_meal)
+    total_kcal = serializers.SerializerMethodField()
     
     class Meta:
         model = Meal
@@ -128,33 +115,53 @@ class MealSerializer(serializers.ModelSerializer):
         )
         return meal, created
 
+    def validate_items(self, items):
+        """Look up every item's food in one query instead of one query per item."""
+        foods = Food.objects.in_bulk({item['food_id'] for item in items})
+        missing = sorted({item['food_id'] for item in items} - foods.keys())
+        if missing:
+            raise serializers.ValidationError(f'Invalid pk "{missing[0]}" - object does not exist.')
+        for item in items:
+            item['food'] = foods[item.pop('food_id')]
+        return items
+
+    def get_total_kcal(self, obj):
+        return round(obj.total_kcal, 2)
+
+    def _replace_items(self, meal, items_data):
+        """Replace the meal's items and refresh the stored meal/day totals."""
+        meal.items.all().delete()
+        items = [MealItem(meal=meal, **item_data) for item_data in items_data]
+        for item in items:
+            item.fill_nutrition()
+        MealItem.objects.bulk_create(items)
+
+        refresh_meal_aggregates(meal)
+
+    def _reload(self, meal):
+        """Fresh copy of the meal with items and foods prefetched for the response."""
+        return Meal.objects.prefetch_related('items__food').get(pk=meal.pk)
+
     def create(self, validated_data):
         user = self.context['request'].user
         items_data = validated_data.pop("items", [])
-        
-        meal, _ = self._update_or_create_meal(user, validated_data)
 
-        # Clear old items before adding new ones
-        meal.items.all().delete()
-        
-        # Create new MealItem instances
-        for item_data in items_data:
-            MealItem.objects.create(meal=meal, **item_data)
-        
-        meal.refresh_from_db()
-        return meal
+        with transaction.atomic():
+            meal, _ = self._update_or_create_meal(user, validated_data)
+            # Clear old items and add the new ones
+            self._replace_items(meal, items_data)
+
+        return self._reload(meal)
 
     def update(self, instance, validated_data):
         items_data = validated_data.pop('items', [])
         
-        # Update Meal instance fields
-        instance.title = validated_data.get('title', instance.title)
-        instance.save()
-
-        # Clear and create new items
-        instance.items.all().delete()
-        for item_data in items_data:
-            MealItem.objects.create(meal=instance, **item_data)
-        
-        instance.refresh_from_db()
-        return instance
+        with transaction.atomic():
+            # Update Meal instance fields
+            instance.title = validated_data.get('title', instance.title)
+            instance.save()
+
+            # Clear and create new items
+            self._replace_items(instance, items_data)
+
+        return self._reload(instance)
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .food_index import bump_catalog_version
+from .models import Food, Meal, MealItem, UserFoodPreference, UserProfile
+from .nutrition import meal_date, recalculate_daily_summary, refresh_meals_aggregates
+from .recommendation_cache import recommendation_cache
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+def food_catalog_changed(sender, **kwargs):
+    """음식 데이터가 바뀌면 카탈로그 버전을 올려 인메모리 인덱스를 무효화"""
+    bump_catalog_version()
+    _schedule_vector_reindex()
+
+
+@receiver(m2m_changed, sender=Food.allergens.through)
+def food_allergens_changed(sender, action, **kwargs):
+    """음식의 알러지 항원이 바뀌면 추천 프롬프트/검색 필터도 바뀌므로 같은 방식으로 무효화"""
+    if action.startswith("post_"):
+        bump_catalog_version()
+        _schedule_vector_reindex()
+
+
+def _schedule_vector_reindex():
+    # 설정된 경우에만: 커밋 후 백그라운드에서 바뀐 음식만 다시 임베딩 (vector_indexing 참고)
+    if settings.VECTOR_AUTO_REINDEX:
+        from .vector_indexing import schedule_reindex
+
+        transaction.on_commit(schedule_reindex)
+
+
+# --- 일별 영양 합계: 식사가 삭제되면 그날 요약을 다시 계산 ---
+# (식사 저장/수정은 MealSerializer가 같은 트랜잭션 안에서 직접 갱신)
+@receiver(post_delete, sender=Meal)
+def meal_deleted(sender, instance, **kwargs):
+    recalculate_daily_summary(instance.user_id, meal_date(instance))
+
+
+# --- 음식 삭제: 그 음식을 쓴 식사 항목도 CASCADE로 지워지므로 식사/일별 합계를 다시 계산 ---
+@receiver(pre_delete, sender=Food)
+def food_deleting(sender, instance, **kwargs):
+    instance._affected_meal_ids = list(
+        MealItem.objects.filter(food=instance).values_list('meal_id', flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=Food)
+def food_deleted(sender, instance, **kwargs):
+    # 항목 삭제 후에 호출되므로 남은 항목만으로 합계가 계산됨
+    refresh_meals_aggregates(getattr(instance, '_affected_meal_ids', ()))
+
+
+# --- 추천 캐시: 사용자 상태가 바뀌면 해당 사용자의 캐시 항목 삭제 ---
+# (바뀐 상태는 캐시 키의 지문에도 반영되므로, 여기서는 쓸모없어진 항목을 바로 비우는 역할)
+@receiver(post_save, sender=Meal)
+@receiver(post_delete, sender=Meal)
+def meal_changed(sender, instance, **kwargs):
+    recommendation_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=MealItem)
+@receiver(post_delete, sender=MealItem)
+def meal_item_changed(sender, instance, **kwargs):
+    # 식사 저장 시에는 instance.meal이 이미 로드되어 있으므로 추가 쿼리 없음
+    if MealItem.meal.is_cached(instance):
+        user_id = instance.meal.user_id
+    else:
+        user_id = Meal.objects.filter(pk=instance.meal_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        recommendation_cache.invalidate_user(user_id)
+
+
+@receiver(post_save, sender=UserProfile)
+def profile_changed(sender, instance, **kwargs):
+    recommendation_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=UserFoodPreference)
+@receiver(post_delete, sender=UserFoodPreference)
+def food_preference_changed(sender, instance, **kwargs):
+    if UserFoodPreference.user_profile.is_cached(instance):
+        user_id = instance.user_profile.user_id
+    else:
+        user_id = UserProfile.objects.filter(pk=instance.user_profile_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        recommendation_cache.invalidate_user(user_id)
+
+
+@receiver(m2m_changed, sender=UserProfile.allergies.through)
+def allergies_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        recommendation_cache.invalidate_user(instance.user_id)
+    elif pk_set:
+        for user_id in UserProfile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True):
+            recommendation_cache.invalidate_user(user_id)
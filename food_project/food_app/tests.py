@@ -1,3 +1,1315 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import date, datetime, time as dt_time, timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import ExifTags, Image
+from rest_framework.test import APIClient
+
+from . import food_index, inference
+from .batching import MicroBatcher
+from .image_decode import decode_upload
+from .inference_service import InferenceUnavailable, detect
+from .models import Allergen, DailyNutritionSummary, Food, Meal, MealItem, UserFoodPreference, UserProfile
+from .nutrition import TOTAL_FIELDS, rebuild_aggregates, refresh_meal_aggregates
+from .recommendation_cache import RecommendationCache, recommendation_cache
+from .recommendation_cache import make_key as make_recommendation_key
+from .result_cache import LocalBackend, PredictionCache, prediction_cache
+from .result_cache import make_key as make_prediction_key
+from .search_index import FoodNameIndex
+from .vector_index import GENERATION_PREFIX, NumpyVectorIndex, write_index
+from .vector_indexing import Encoder, sync_vector_index
+from .views import aprepare_recommendation
+
+
+def fake_completion(content):
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def fake_async_openai(texts):
+    """AsyncOpenAI() 대체: stream=True면 texts를 토큰으로 스트리밍, 아니면 합친 문장 한 번에 반환"""
+    async def create(**kwargs):
+        if kwargs.get('stream'):
+            return FakeAsyncStream(texts)
+        return fake_completion(''.join(texts))
+
+    client = mock.MagicMock()
+    client.__aenter__.return_value = client
+    client.chat.completions.create = mock.AsyncMock(side_effect=create)
+    return client
+
+
+class RecommendationQueryCountTests(TestCase):
+    """추천 경로의 쿼리 수는 선호도/후보/알러지 수와 관계없이 일정해야 합니다 (N+1 회귀 방지)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='pw')
+        cls.profile = UserProfile.objects.create(user=cls.user)
+        allergens = [Allergen.objects.create(name=name) for name in ('대두', '밀', '새우')]
+        cls.profile.allergies.set(allergens[:2])
+
+        cls.foods = [
+            Food.objects.create(
+                representative_name=f'음식{i}', food_class='국 및 탕', energy_kcal=100 + i,
+                taste_profile=['얼큰한'], situational_tags=['비오는 날'],
+            )
+            for i in range(30)
+        ]
+        for food in cls.foods[:5]:
+            food.allergens.set(allergens)
+
+    def setUp(self):
+        recommendation_cache.entries.clear()
+        # 벡터 검색/임베딩은 이 테스트의 관심사가 아니므로 고정 결과로 대체
+        candidates = [(food.id, 1.0 - i * 0.01) for i, food in enumerate(self.foods[:5])]
+        patches = [
+            mock.patch('food_app.views.encode_query', return_value=np.ones(4, dtype=np.float32)),
+            mock.patch('food_app.views.search_similar_foods', return_value=candidates),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def add_preferences(self, count):
+        UserFoodPreference.objects.filter(user_profile=self.profile).delete()
+        for i, food in enumerate(self.foods[5:5 + count]):
+            UserFoodPreference.objects.create(
+                user_profile=self.profile, food=food, preference='LIKE' if i % 2 else 'DISLIKE',
+            )
+
+    def test_prepare_recommendation_query_count_is_constant(self):
+        # 프로필, 알러지, 선호도(+음식), 일별 영양 요약, 후보 음식, 후보 알러지
+        for count in (1, 20):
+            with self.subTest(preferences=count):
+                self.add_preferences(count)
+                recommendation_cache.entries.clear()
+                with self.assertNumQueries(6):
+                    prepared = async_to_sync(aprepare_recommendation)(self.user, '비오는 날 국물 요리')
+                self.assertIsNotNone(prepared.prompt)
+                self.assertIn('대두, 밀, 새우', prepared.prompt)
+
+    @mock.patch('food_app.async_views.AsyncOpenAI', return_value=fake_async_openai(['순두부찌개를 ', '추천해요.']))
+    def test_recommend_view_query_count_is_constant(self, openai_class):
+        self.client.force_login(self.user)
+
+        for count in (1, 20):
+            with self.subTest(preferences=count):
+                self.add_preferences(count)
+                recommendation_cache.entries.clear()
+                # + 세션, 사용자
+                with self.assertNumQueries(8):
+                    response = self.client.post(
+                        '/api/recommend-menu/', {'query': '비오는 날 국물 요리'}, content_type='application/json',
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), {'recommendation': '순두부찌개를 추천해요.', 'cached': False})
+
+    def test_preference_list_query_count_is_constant(self):
+        self.client.force_login(self.user)
+
+        for count in (1, 20):
+            with self.subTest(preferences=count):
+                self.add_preferences(count)
+                # 세션, 사용자, 프로필, 선호도(+음식)
+                with self.assertNumQueries(4):
+                    response = self.client.get('/api/food-preferences/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()), count)
+
+
+LLM_DELAY_SECONDS = 0.2
+CONCURRENT_REQUESTS = 10
+
+
+def cache_key(user_id, query, embedding, fingerprint='state'):
+    return make_recommendation_key(user_id, fingerprint, query, embedding)
+
+
+class RecommendationCacheTests(SimpleTestCase):
+    """고정 임베딩으로 확인하는 추천 캐시 적중 조건 (유사도 기준, 지문, TTL, LRU)"""
+
+    def setUp(self):
+        self.cache = RecommendationCache(max_entries=3, ttl=60, min_similarity=0.9)
+        self.cache.set(cache_key(1, '비오는 날 국물 요리', [1, 0, 0]), '순두부찌개')
+
+    def test_exact_hit_normalizes_query(self):
+        self.assertEqual(self.cache.get(cache_key(1, ' 비오는 날  국물 요리 ', [0, 1, 0])), '순두부찌개')
+        self.assertEqual(self.cache.stats()['exact_hits'], 1)
+
+    def test_similarity_threshold(self):
+        # cos = 0.95 / 0.8
+        self.assertEqual(self.cache.get(cache_key(1, '비 오는 날 국물요리', [0.95, np.sqrt(1 - 0.95 ** 2), 0])), '순두부찌개')
+        self.assertIsNone(self.cache.get(cache_key(1, '매운 볶음 요리', [0.8, 0.6, 0])))
+        stats = self.cache.stats()
+        self.assertEqual((stats['semantic_hits'], stats['misses']), (1, 1))
+
+    def test_fingerprint_and_user_must_match(self):
+        self.assertIsNone(self.cache.get(cache_key(1, '비오는 날 국물 요리', [1, 0, 0], fingerprint='changed')))
+        self.assertIsNone(self.cache.get(cache_key(2, '비오는 날 국물 요리', [1, 0, 0])))
+
+    def test_ttl(self):
+        now = time.monotonic()
+        with mock.patch('food_app.caching.time.monotonic', return_value=now + 61):
+            self.assertIsNone(self.cache.get(cache_key(1, '비오는 날 국물 요리', [1, 0, 0])))
+
+    def test_lru_bound(self):
+        for i in range(3):
+            self.cache.set(cache_key(1, f'쿼리 {i}', [0, 1, i]), f'추천 {i}')
+        self.assertEqual(len(self.cache.entries), 3)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        self.assertIsNone(self.cache.get(cache_key(1, '비오는 날 국물 요리', [1, 0, 0])))
+
+    def test_empty_recommendation_is_not_stored(self):
+        self.cache.set(cache_key(1, '빈 응답', [0, 0, 1]), '')
+        self.assertIsNone(self.cache.get(cache_key(1, '빈 응답', [0, 0, 1])))
+
+
+class RecommendationCacheSignalTests(TestCase):
+    """식사/항목/선호도/알러지/프로필이 바뀌면 그 사용자의 추천 캐시 항목만 지워야 합니다."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('signal-tester', password='pw')
+        cls.other = User.objects.create_user('signal-other', password='pw')
+        cls.profile = UserProfile.objects.create(user=cls.user)
+        UserProfile.objects.create(user=cls.other)
+        cls.food = Food.objects.create(representative_name='비빔밥', energy_kcal=500)
+        cls.allergen = Allergen.objects.create(name='땅콩')
+
+    def setUp(self):
+        recommendation_cache.entries.clear()
+
+    def seed(self):
+        recommendation_cache.set(cache_key(self.user.id, '국물 요리', [1, 0]), '순두부찌개')
+        recommendation_cache.set(cache_key(self.other.id, '국물 요리', [1, 0]), '된장찌개')
+
+    def assertInvalidated(self):
+        users = {lookup[0] for lookup, _ in recommendation_cache.entries.items()}
+        self.assertEqual(users, {self.other.id})
+
+    def test_meal_and_item_changes(self):
+        self.seed()
+        meal = Meal.objects.create(user=self.user, title='점심')
+        self.assertInvalidated()
+
+        self.seed()
+        item = MealItem.objects.create(meal=meal, food=self.food, weight_g=100)
+        self.assertInvalidated()
+
+        self.seed()
+        item.delete()
+        self.assertInvalidated()
+
+        self.seed()
+        meal.delete()
+        self.assertInvalidated()
+
+    def test_preference_changes(self):
+        self.seed()
+        preference = UserFoodPreference.objects.create(user_profile=self.profile, food=self.food, preference='LIKE')
+        self.assertInvalidated()
+
+        self.seed()
+        preference.delete()
+        self.assertInvalidated()
+
+    def test_allergy_changes(self):
+        self.seed()
+        self.profile.allergies.add(self.allergen)
+        self.assertInvalidated()
+
+        # 항원 쪽에서 바꾸는 경우 (reverse m2m)
+        self.seed()
+        self.allergen.users_with_allergy.remove(self.profile)
+        self.assertInvalidated()
+
+    def test_profile_change(self):
+        self.seed()
+        self.profile.save()
+        self.assertInvalidated()
+
+
+class AsyncRecommendationTests(TestCase):
+    """추천 API는 async 뷰이므로 LLM 응답을 기다리는 요청끼리 스레드 없이 겹쳐 실행되어야 합니다."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('async-tester', password='pw')
+        UserProfile.objects.create(user=cls.user)
+        cls.foods = [Food.objects.create(representative_name=f'비동기음식{i}', energy_kcal=100) for i in range(5)]
+
+    def setUp(self):
+        recommendation_cache.entries.clear()
+        candidates = [(food.id, 1.0) for food in self.foods]
+
+        async def slow_create(**kwargs):
+            await asyncio.sleep(LLM_DELAY_SECONDS)
+            return fake_completion('순두부찌개를 추천해요.')
+
+        self.openai_client = openai_client = mock.MagicMock()
+        openai_client.__aenter__.return_value = openai_client
+        openai_client.chat.completions.create = mock.AsyncMock(side_effect=slow_create)
+        patches = [
+            mock.patch('food_app.views.encode_query', return_value=np.ones(4, dtype=np.float32)),
+            mock.patch('food_app.views.search_similar_foods', return_value=candidates),
+            mock.patch('food_app.async_views.AsyncOpenAI', return_value=openai_client),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_concurrent_requests_overlap_llm_wait(self):
+        await self.async_client.aforce_login(self.user)
+        start = time.perf_counter()
+        # 쿼리가 달라야 추천 캐시에 걸리지 않고 모두 LLM을 호출
+        responses = await asyncio.gather(*[
+            self.async_client.post('/api/recommend-menu/', {'query': f'국물 요리 {i}'}, content_type='application/json')
+            for i in range(CONCURRENT_REQUESTS)
+        ])
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([response.status_code for response in responses], [200] * CONCURRENT_REQUESTS)
+        self.assertLess(elapsed, LLM_DELAY_SECONDS * CONCURRENT_REQUESTS / 2)
+        # 요청마다 만든 클라이언트는 응답 후 바로 닫혀야 함 (연결을 GC에 맡기지 않음)
+        self.assertEqual(self.openai_client.__aexit__.await_count, CONCURRENT_REQUESTS)
+
+
+class RecommendStreamTests(TestCase):
+    """스트리밍 추천: 연결이 끊기면 업스트림 스트림을 닫고, 빈 응답은 캐시하지 않아야 합니다."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('stream-tester', password='pw')
+        UserProfile.objects.create(user=cls.user)
+        cls.food = Food.objects.create(representative_name='순두부찌개', energy_kcal=100)
+
+    def setUp(self):
+        recommendation_cache.entries.clear()
+        self.openai_client = mock.MagicMock()
+        self.openai_client.__aenter__.return_value = self.openai_client
+        patches = [
+            mock.patch('food_app.views.encode_query', return_value=np.ones(4, dtype=np.float32)),
+            mock.patch('food_app.views.search_similar_foods', return_value=[(self.food.id, 1.0)]),
+            mock.patch('food_app.async_views.AsyncOpenAI', return_value=self.openai_client),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def post(self, stream):
+        self.openai_client.chat.completions.create = mock.AsyncMock(return_value=stream)
+        await self.async_client.aforce_login(self.user)
+        return await self.async_client.post(
+            '/api/recommend-menu/stream/', {'query': '국물 요리'}, content_type='application/json'
+        )
+
+    async def test_disconnect_closes_upstream_stream(self):
+        stream = FakeAsyncStream(['순두부찌개를 '], hang=True)
+        response = await self.post(stream)
+        first_token = asyncio.Event()
+
+        async def consume():
+            async for _ in response.streaming_content:
+                first_token.set()
+
+        # ASGI 서버는 클라이언트 연결이 끊기면 응답을 보내던 태스크를 취소
+        task = asyncio.create_task(consume())
+        await first_token.wait()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertTrue(stream.closed)
+        self.assertEqual(len(recommendation_cache.entries), 0)
+
+    async def test_empty_completion_is_not_cached(self):
+        stream = FakeAsyncStream([])
+        response = await self.post(stream)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn('event: done', body)
+        self.assertTrue(stream.closed)
+        self.assertEqual(len(recommendation_cache.entries), 0)
+
+    async def test_full_completion_is_cached(self):
+        response = await self.post(FakeAsyncStream(['순두부찌개를 ', '추천해요.']))
+        b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(recommendation_cache.entries), 1)
+
+
+class TracingTests(TestCase):
+    """구간별 소요 시간이 Server-Timing 헤더와 /api/metrics 히스토그램으로 나와야 합니다."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tracer', password='pw')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        detections = [{'pred_class': '분류1', 'confidence': 0.9, 'top_k': [], 'bbox': [0, 0, 8, 8]}]
+        patches = [
+            mock.patch('food_app.async_views.detect', return_value=detections),
+            mock.patch.object(prediction_cache, 'get', return_value=None),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post_image(self):
+        image = io.BytesIO()
+        Image.new('RGB', (16, 16), 'orange').save(image, format='PNG')
+        image.seek(0)
+        return self.client.post('/api/predict/', {'image': image})
+
+    def test_server_timing_header_has_stages(self):
+        response = self.post_image()
+        self.assertEqual(response.status_code, 200)
+        stages = {entry.split(';')[0].strip() for entry in response['Server-Timing'].split(',')}
+        self.assertTrue({'decode', 'detect', 'db', 'total'} <= stages, response['Server-Timing'])
+
+    def test_metrics_exports_histograms(self):
+        self.post_image()
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('food_app_stage_duration_seconds_bucket{stage="detect",le="+Inf"}', body)
+        self.assertIn('food_app_request_duration_seconds_count{view="predict_food",method="POST",status="200"}', body)
+        self.assertIn('food_app_cache_hit_ratio{cache="prediction"}', body)
+
+    @override_settings(TRACING_ENABLED=False)
+    def test_disabled_tracing_skips_middleware(self):
+        self.client = self.client_class()
+        self.client.force_login(self.user)
+        response = self.post_image()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+
+
+class PredictionCacheTests(TestCase):
+    """같은 사진은 탐지를 다시 하지 않되, 식품 후보는 현재 카탈로그 기준이어야 합니다."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cache-tester', password='pw')
+        cls.food = Food.objects.create(representative_name='김치찌개', food_class='찌개')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.detect = mock.patch('food_app.async_views.detect', return_value=[
+            {'pred_class': '찌개', 'confidence': 0.9, 'top_k': [], 'bbox': [0, 0, 8, 8]},
+        ]).start()
+        mock.patch.object(prediction_cache, 'backend', LocalBackend(16, 60, 4)).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def post_image(self):
+        image = io.BytesIO()
+        Image.new('RGB', (16, 16), 'orange').save(image, format='PNG')
+        image.seek(0)
+        return self.client.post('/api/predict/', {'image': image})
+
+    def test_hit_uses_current_catalog(self):
+        self.post_image()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.food.representative_name = '돼지고기 김치찌개'
+            self.food.save()
+            Food.objects.create(representative_name='참치 김치찌개', food_class='찌개')
+
+        response = self.post_image()
+        self.assertEqual(self.detect.call_count, 1)
+        options = response.json()['detected_foods'][0]['food_options']
+        self.assertEqual([option['representative_name'] for option in options], ['돼지고기 김치찌개', '참치 김치찌개'])
+
+
+@override_settings(PREDICTION_CACHE_PERCEPTUAL=True)
+class PredictionCacheLookupTests(SimpleTestCase):
+    """같은 파일은 항상, 거의 같은 사진은 같은 크기이고 해밍 거리가 작을 때만 적중해야 합니다."""
+
+    def setUp(self):
+        self.cache = PredictionCache(LocalBackend(16, 60, 4))
+        self.photo = Image.linear_gradient('L').rotate(90).resize((64, 48)).convert('RGB')
+
+    def key(self, content, img):
+        return make_prediction_key(content, img)
+
+    def test_exact_hit(self):
+        self.cache.set(self.key(b'photo', self.photo), ['detections'])
+        self.assertEqual(self.cache.get(self.key(b'photo', Image.new('RGB', (8, 8)))), ['detections'])
+        self.assertEqual(self.cache.stats()['exact_hits'], 1)
+
+    def test_near_hit(self):
+        self.cache.set(self.key(b'photo', self.photo), ['detections'])
+        brighter = self.photo.point(lambda value: min(255, value + 3))
+        self.assertEqual(self.cache.get(self.key(b'recompressed', brighter)), ['detections'])
+        self.assertEqual(self.cache.stats()['perceptual_hits'], 1)
+
+    def test_no_hit_on_size_mismatch(self):
+        self.cache.set(self.key(b'photo', self.photo), ['detections'])
+        self.assertIsNone(self.cache.get(self.key(b'resized', self.photo.resize((32, 24)))))
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_no_hit_on_different_photo(self):
+        self.cache.set(self.key(b'photo', self.photo), ['detections'])
+        other = self.photo.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+        self.assertIsNone(self.cache.get(self.key(b'other', other)))
+
+    @override_settings(PREDICTION_CACHE_PERCEPTUAL=False)
+    def test_perceptual_disabled(self):
+        self.cache.set(self.key(b'photo', self.photo), ['detections'])
+        self.assertIsNone(self.cache.get(self.key(b'recompressed', self.photo)))
+
+
+def jpeg_upload(size, orientation=None, name='photo.jpg'):
+    exif = Image.Exif()
+    if orientation is not None:
+        exif[ExifTags.Base.Orientation] = orientation
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, format='JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(PREDICT_MAX_IMAGE_SIDE=1000)
+class ImageDecodeTests(TestCase):
+    """큰 사진은 작업 해상도로 줄여 탐지하고, 응답 bbox는 원본 해상도 좌표로 돌려줘야 합니다."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('photographer', password='pw')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.detect = mock.patch('food_app.async_views.detect', return_value=[
+            {'pred_class': '분류1', 'confidence': 0.9, 'top_k': [], 'bbox': [100.0, 50.0, 500.0, 250.0]},
+        ]).start()
+        mock.patch.object(prediction_cache, 'get', return_value=None).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_large_jpeg_is_downscaled_and_rotated(self):
+        decoded = decode_upload(jpeg_upload((4000, 3000), orientation=6))
+        self.assertEqual(decoded.original_size, (3000, 4000))
+        self.assertEqual(decoded.img.size, (750, 1000))
+        self.assertEqual(decoded.img.mode, 'RGB')
+        self.assertEqual(decoded.to_original([0, 0, 750, 1000]), [0, 0, 3000, 4000])
+
+    def test_small_image_is_unchanged(self):
+        decoded = decode_upload(jpeg_upload((640, 480)))
+        self.assertEqual(decoded.img.size, (640, 480))
+        self.assertEqual(decoded.to_original([1, 2, 3, 4]), [1, 2, 3, 4])
+
+    def test_predict_returns_boxes_in_original_coordinates(self):
+        response = self.client.post('/api/predict/', {'image': jpeg_upload((2000, 1500))})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.detect.call_args.args[0].size, (1000, 750))
+        self.assertEqual(response.json()['detected_foods'][0]['bbox'], [200.0, 100.0, 1000.0, 500.0])
+
+    @override_settings(PREDICT_MAX_UPLOAD_BYTES=1024)
+    def test_oversized_upload_is_rejected(self):
+        response = self.client.post('/api/predict/', {'image': jpeg_upload((2000, 1500))})
+        self.assertEqual(response.status_code, 413)
+        self.detect.assert_not_called()
+
+
+@override_settings(
+    CACHES={**settings.CACHES, 'short': {
+        # FileBasedCache.incr는 기본 TIMEOUT으로 다시 저장하는 백엔드 (짧은 TIMEOUT으로 만료 재현)
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'food_app_catalog_version_test'),
+        'TIMEOUT': 0.05,
+    }},
+    FOOD_CATALOG_CACHE_ALIAS='short',
+)
+class CatalogVersionTests(TestCase):
+    """카탈로그 버전은 캐시 기본 TIMEOUT이 지나도 0으로 돌아가면 안 됩니다."""
+
+    def setUp(self):
+        caches['short'].clear()
+
+    def test_bumped_version_does_not_expire(self):
+        before = food_index.get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            food_index.bump_catalog_version()
+        bumped = food_index.get_catalog_version()
+        self.assertNotEqual(bumped, before)
+
+        time.sleep(0.1)
+        self.assertEqual(food_index.get_catalog_version(), bumped)
+
+    def test_each_bump_gives_a_new_version(self):
+        versions = set()
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                food_index.bump_catalog_version()
+            versions.add(food_index.get_catalog_version())
+        self.assertEqual(len(versions), 3)
+
+
+class MealAggregateTests(TestCase):
+    """식사/항목이 어떤 경로로 바뀌어도 저장된 식사 합계와 일별 요약이 실제 항목 합과 같아야 합니다."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('aggregate-tester', password='pw')
+        cls.rice = Food.objects.create(representative_name='쌀밥', energy_kcal=150, protein_g=3)
+        cls.soup = Food.objects.create(representative_name='된장국', energy_kcal=40, protein_g=2)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create_meal(self, items, created_at=None):
+        meal = Meal.objects.create(user=self.user, title='점심', created_at=created_at or timezone.now())
+        for food, weight_g in items:
+            MealItem.objects.create(meal=meal, food=food, weight_g=weight_g)
+        refresh_meal_aggregates(meal)
+        return meal
+
+    def summary(self, day=None):
+        return DailyNutritionSummary.objects.filter(user=self.user, date=day or timezone.localdate()).first()
+
+    def post_meal(self, items):
+        return self.client.post('/api/meals/', {
+            'title': '점심', 'items': [{'food_id': food.id, 'weight_g': weight_g} for food, weight_g in items],
+        }, content_type='application/json')
+
+    def test_create_replace_and_delete_through_api(self):
+        response = self.post_meal([(self.rice, 200), (self.soup, 100)])
+        self.assertEqual(response.status_code, 201)
+        meal = Meal.objects.get(user=self.user)
+        self.assertEqual(meal.total_kcal, 340)
+        self.assertEqual(meal.total_protein_g, 8)
+        self.assertEqual(sorted(meal.items.values_list('energy_kcal', flat=True)), [40, 300])
+        self.assertEqual((self.summary().meal_count, self.summary().total_kcal), (1, 340))
+
+        # 같은 날 같은 제목으로 다시 저장하면 항목 교체
+        response = self.post_meal([(self.rice, 100)])
+        self.assertEqual(response.status_code, 201)
+        meal.refresh_from_db()
+        self.assertEqual(meal.total_kcal, 150)
+        self.assertEqual((self.summary().meal_count, self.summary().total_kcal), (1, 150))
+
+        # 항목이 없으면 식사 삭제 → 그날 요약도 삭제
+        response = self.post_meal([])
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Meal.objects.filter(user=self.user).exists())
+        self.assertIsNone(self.summary())
+
+    def test_meal_delete_updates_day(self):
+        first = self.create_meal([(self.rice, 100)])
+        self.create_meal([(self.soup, 100)])
+        self.assertEqual((self.summary().meal_count, self.summary().total_kcal), (2, 190))
+        first.delete()
+        self.assertEqual((self.summary().meal_count, self.summary().total_kcal), (1, 40))
+
+    def test_rebuild_aggregates(self):
+        meal = self.create_meal([(self.rice, 200)])
+        # 음식 영양 정보가 바뀌어도 기록된 값은 유지되다가 rebuild에서 다시 계산
+        Food.objects.filter(pk=self.rice.pk).update(energy_kcal=100)
+        Meal.objects.filter(pk=meal.pk).update(total_kcal=0)
+        DailyNutritionSummary.objects.all().delete()
+
+        counts = rebuild_aggregates()
+        self.assertEqual(counts, {'items': 1, 'meals': 1, 'days': 1})
+        meal.refresh_from_db()
+        self.assertEqual(meal.items.get().energy_kcal, 200)
+        self.assertEqual(meal.total_kcal, 200)
+        self.assertEqual((self.summary().meal_count, self.summary().total_kcal), (1, 200))
+
+    def test_food_delete_updates_meals_and_days(self):
+        meal = self.create_meal([(self.rice, 200), (self.soup, 100)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.soup.delete()
+        meal.refresh_from_db()
+        self.assertEqual(meal.total_kcal, 300)
+        self.assertEqual(self.summary().total_kcal, 300)
+
+    def test_admin_date_change_updates_old_day(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        meal = self.create_meal([(self.rice, 100)])
+        item = meal.items.get()
+        admin_user = User.objects.create_superuser('admin', password='pw')
+        self.client.force_login(admin_user)
+
+        response = self.client.post(f'/admin/food_app/meal/{meal.id}/change/', {
+            'user': self.user.id, 'title': '점심',
+            'created_at_0': yesterday.isoformat(), 'created_at_1': '12:00:00',
+            'items-TOTAL_FORMS': 1, 'items-INITIAL_FORMS': 1, 'items-MIN_NUM_FORMS': 0, 'items-MAX_NUM_FORMS': 1000,
+            'items-0-id': item.id, 'items-0-meal': meal.id, 'items-0-food': self.rice.id, 'items-0-weight_g': 100,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNone(self.summary())
+        self.assertEqual(self.summary(yesterday).total_kcal, 150)
+
+
+class NutritionSummaryDateRangeTests(TestCase):
+    """date 범위 끝의 날짜는 OverflowError(500)가 아니라 400이어야 합니다."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('summary-tester', password='pw')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_out_of_range_dates(self):
+        for params in ({'to': '9999-12-31'}, {'from': '9999-12-31', 'to': '9999-12-31'}, {'to': '0001-01-02'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/nutrition/summary/', params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_last_allowed_date(self):
+        response = self.client.get('/api/nutrition/summary/', {'from': '9999-12-24', 'to': '9999-12-30'})
+        self.assertEqual(response.status_code, 200)
+
+
+class RunDetectionTests(SimpleTestCase):
+    """사진 전체를 덮는 박스도 결과에서 빠지면 안 되고, Crop 없이 원본 이미지로 분류합니다."""
+
+    def run_detection(self, bboxes):
+        img = Image.new('RGB', (100, 100))
+        classified = []
+
+        def classify(inputs):
+            classified.append([item.size for item in inputs])
+            return [[(f'음식{i}', 0.9)] for i in range(len(inputs))]
+
+        with mock.patch('food_app.inference.detect_boxes', return_value=bboxes), \
+                mock.patch('food_app.inference.classify_crops', side_effect=classify):
+            return inference.run_detection(img), classified
+
+    def test_full_frame_box_is_kept_next_to_small_box(self):
+        detections, classified = self.run_detection([[0, 0, 100, 98], [10, 10, 30, 30]])
+        self.assertEqual([d['bbox'] for d in detections], [[0, 0, 100, 98], [10, 10, 30, 30]])
+        self.assertEqual([d['pred_class'] for d in detections], ['음식1', '음식0'])
+        # 작은 박스만 Crop, 큰 박스는 원본 이미지
+        self.assertEqual(classified, [[(20, 20), (100, 100)]])
+
+    def test_every_full_frame_box_is_returned(self):
+        detections, classified = self.run_detection([[0, 0, 100, 100], [1, 1, 99, 99]])
+        self.assertEqual(len(detections), 2)
+        self.assertEqual(classified, [[(100, 100)]])
+
+    def test_no_boxes_classifies_whole_image(self):
+        detections, _ = self.run_detection([])
+        self.assertEqual([d['bbox'] for d in detections], [[0, 0, 100, 100]])
+
+
+class MicroBatcherTests(SimpleTestCase):
+    """배치 함수가 잘못된 결과를 내거나 멈춰도 호출자가 무한히 기다리면 안 됩니다."""
+
+    def test_output_count_mismatch_fails_every_caller(self):
+        batcher = MicroBatcher('short', lambda items: items[:1], max_batch_size=4, max_wait_ms=50, timeout=5)
+        with self.assertRaises(RuntimeError):
+            batcher.map([1, 2, 3])
+
+    def test_default_timeout(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        batcher = MicroBatcher('stuck', lambda items: release.wait() and items, max_batch_size=1, max_wait_ms=0, timeout=0.1)
+        with self.assertRaises(FutureTimeoutError):
+            batcher(1)
+
+
+class FoodOptionsNameSearchTests(TestCase):
+    """/api/food-options/?name=은 자동완성 검색 규칙(공백 무시, 입력 중인 마지막 글자, 순위)을 따릅니다."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('options-tester', password='pw')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        # 카탈로그 버전이 올라가야 검색 인덱스를 다시 만듦
+        with self.captureOnCommitCallbacks(execute=True):
+            for name in ['김치찜', '김치찌개', '김밥', '기무치', '유부 초밥']:
+                Food.objects.create(representative_name=name, food_class='분류')
+
+    def names(self, query):
+        response = self.client.get('/api/food-options/', {'name': query})
+        self.assertEqual(response.status_code, 200)
+        return [option['representative_name'] for option in response.json()['food_options']]
+
+    def test_name_search_semantics(self):
+        self.assertEqual(self.names('김치찌'), ['김치찜', '김치찌개'])
+        self.assertEqual(self.names('기'), ['김밥', '김치찜', '기무치', '김치찌개'])
+        self.assertEqual(self.names('유부초밥'), ['유부 초밥'])
+        self.assertEqual(self.names(' '), [])
+
+    def test_class_only(self):
+        response = self.client.get('/api/food-options/', {'class': '분류'})
+        self.assertEqual(len(response.json()['food_options']), 5)
+
+
+class LoadFoodDataTests(TestCase):
+    """load_food_data는 다시 실행해도 바뀐 음식만 저장해야 합니다."""
+
+    def setUp(self):
+        self.nutrition = pd.DataFrame({
+            '대표식품명': ['김치찌개', '김치찌개', '비빔밥', None],
+            'food_class': ['찌개', '찌개', '밥', '기타'],
+            '에너지(kcal)': [80, 95, float('nan'), 10],
+            '단백질(g)': [5, 6, 7, 1],
+        })
+        self.enriched = pd.DataFrame({
+            '대표식품명': ['김치찌개', '비빔밥'],
+            '설명': ['얼큰한 찌개', float('nan')],
+            '주요_재료': ["['김치', '두부']", 'not a list'],
+        })
+
+    def load(self):
+        frames = {'영양DB': self.nutrition, 'enriched': self.enriched}
+
+        def read_csv(path):
+            return next(frame for key, frame in frames.items() if key in path).copy()
+
+        out = io.StringIO()
+        with mock.patch('food_app.management.commands.load_food_data.pd.read_csv', side_effect=read_csv):
+            call_command('load_food_data', stdout=out)
+        return out.getvalue()
+
+    def test_idempotent_load(self):
+        self.assertIn('새로 생성된 음식: 2개, 업데이트된 음식: 0개', self.load())
+        self.assertIn('새로 생성된 음식: 0개, 업데이트된 음식: 0개, 변경 없음: 2개', self.load())
+
+        kimchi = Food.objects.get(representative_name='김치찌개')
+        bibimbap = Food.objects.get(representative_name='비빔밥')
+        # 같은 대표식품명이 여러 행이면 마지막 행 값
+        self.assertEqual((kimchi.energy_kcal, kimchi.protein_g, kimchi.food_class), (95, 6, '찌개'))
+        self.assertEqual(kimchi.main_ingredients, ['김치', '두부'])
+        self.assertEqual(kimchi.description, '얼큰한 찌개')
+        # NaN → NULL, 잘못된 리스트 문자열 → 빈 리스트
+        self.assertIsNone(bibimbap.energy_kcal)
+        self.assertEqual(bibimbap.main_ingredients, [])
+        self.assertEqual(bibimbap.description, '')
+
+        self.nutrition.loc[2, '에너지(kcal)'] = 550
+        self.assertIn('새로 생성된 음식: 0개, 업데이트된 음식: 1개, 변경 없음: 1개', self.load())
+        self.assertEqual(Food.objects.get(representative_name='비빔밥').energy_kcal, 550)
+
+
+class VectorIndexGenerationTests(SimpleTestCase):
+    """다시 쓰는 도중에 로드해도 한 세대의 파일만 함께 읽어야 합니다."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+
+    def write(self, ids):
+        embeddings = np.random.default_rng(len(ids)).normal(size=(len(ids), 4))
+        write_index(self.directory, ids, embeddings, attributes={'kcal': np.array(ids) * 10.0})
+
+    def test_reader_uses_generation_from_meta(self):
+        self.write([1, 2])
+        real_load = json.load
+        swapped = []
+
+        def load_then_rewrite(f):
+            # 읽는 쪽이 meta.json을 읽은 직후 새 인덱스로 교체되는 상황
+            meta = real_load(f)
+            if not swapped:
+                swapped.append(True)
+                self.write([3, 4, 5])
+            return meta
+
+        with mock.patch('food_app.vector_index.json.load', side_effect=load_then_rewrite):
+            index = NumpyVectorIndex(self.directory)
+        self.assertEqual(index.ids.tolist(), [1, 2])
+        self.assertEqual(index.embeddings.shape, (2, 4))
+        self.assertEqual(index.attributes['kcal'].tolist(), [10.0, 20.0])
+        self.assertEqual(NumpyVectorIndex(self.directory).ids.tolist(), [3, 4, 5])
+
+    def test_keeps_current_and_previous_generation(self):
+        for ids in ([1], [1, 2], [1, 2, 3]):
+            self.write(ids)
+        generations = [name for name in os.listdir(self.directory) if name.startswith(GENERATION_PREFIX)]
+        self.assertEqual(len(generations), 2)
+        self.assertEqual(NumpyVectorIndex(self.directory).ids.tolist(), [1, 2, 3])
+
+
+def stub_embeddings(documents):
+    """문서별로 고정된 임베딩 (모델 없이 인코딩 대체)"""
+    return np.stack([
+        np.random.default_rng(int(hashlib.sha256(document.encode()).hexdigest()[:8], 16)).normal(size=8)
+        for document in documents
+    ]).astype(np.float32)
+
+
+class VectorIndexSyncTests(TestCase):
+    """NumPy 백엔드 증분 동기화: 바뀐 문서만 다시 임베딩하고, 메타데이터만 바뀌면 벡터를 재사용합니다."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.foods = [
+            Food.objects.create(representative_name=name, energy_kcal=100, description='설명')
+            for name in ('김치찌개', '된장찌개', '비빔밥')
+        ]
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+        overrides = override_settings(VECTOR_INDEX_DIR=tmp.name, VECTOR_INDEX_DTYPE='float32', VECTOR_IVF_LISTS=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.encode = mock.patch.object(Encoder, 'encode', side_effect=stub_embeddings).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def sync(self, **kwargs):
+        self.encode.reset_mock()
+        return sync_vector_index(backends=('numpy',), workers=1, **kwargs)
+
+    def vectors(self):
+        index = NumpyVectorIndex(self.directory)
+        return {food_id: (np.asarray(index.embeddings[row]), index.attributes['kcal'][row])
+                for row, food_id in enumerate(index.ids.tolist())}
+
+    def test_incremental_sync(self):
+        result = self.sync(full=True)
+        self.assertEqual((result.total, result.embedded), (3, 3))
+        before = self.vectors()
+
+        # 변경 없음: 인코딩하지 않음
+        result = self.sync()
+        self.assertEqual((result.embedded, result.deleted), (0, 0))
+        self.encode.assert_not_called()
+
+        # 문서에 없는 값(kcal)만 바뀜: 벡터는 그대로, 속성만 갱신
+        kimchi, doenjang, bibimbap = self.foods
+        Food.objects.filter(pk=kimchi.pk).update(energy_kcal=250)
+        result = self.sync()
+        self.assertEqual(result.embedded, 0)
+        self.encode.assert_not_called()
+        after = self.vectors()
+        np.testing.assert_array_equal(after[kimchi.id][0], before[kimchi.id][0])
+        self.assertEqual(after[kimchi.id][1], 250)
+
+        # 문서가 바뀐 음식만 다시 임베딩
+        Food.objects.filter(pk=doenjang.pk).update(description='구수한 찌개')
+        result = self.sync()
+        self.assertEqual(result.embedded, 1)
+        self.assertEqual(len(self.encode.call_args.args[0]), 1)
+        self.assertFalse(np.array_equal(self.vectors()[doenjang.id][0], before[doenjang.id][0]))
+
+        # 삭제된 음식은 인덱스에서도 제거
+        bibimbap.delete()
+        result = self.sync()
+        self.assertEqual((result.total, result.embedded, result.deleted), (2, 0, 1))
+        self.assertEqual(sorted(self.vectors()), sorted([kimchi.id, doenjang.id]))
+
+
+class FoodNameSearchTests(SimpleTestCase):
+    """완성된 음절은 글자 그대로, 마지막 미완성 글자만 자모 앞부분으로 매칭해야 합니다."""
+
+    NAMES = ['달걀찜', '닭갈비', '김밥', '기무치', '김치찌개', '가지나물', '김치', '된장찌개']
+
+    def setUp(self):
+        self.index = FoodNameIndex(0, [(i + 1, name, 'c') for i, name in enumerate(self.NAMES)])
+
+    def search(self, query):
+        return [self.index.rows[position][1] for position in self.index.search(query)]
+
+    def test_complete_syllables_match_as_text(self):
+        self.assertEqual(self.search('닭'), ['닭갈비'])
+        self.assertEqual(self.search('김'), ['김밥', '김치', '김치찌개'])
+        self.assertEqual(self.search('갖'), [])
+
+    def test_incomplete_last_syllable(self):
+        self.assertEqual(self.search('김치ㅉ'), ['김치찌개'])
+        self.assertEqual(self.search('기'), ['김밥', '김치', '기무치', '김치찌개'])
+
+    def test_initial_consonants(self):
+        self.assertEqual(self.search('ㄱㅊㅉㄱ'), ['김치찌개'])
+        self.assertEqual(self.search('ㄱㅊ'), ['김치', '김치찌개'])
+
+    def test_ranking(self):
+        # 완전 일치 > 앞쪽 위치 > 짧은 이름
+        self.assertEqual(self.search('김치'), ['김치', '김치찌개'])
+        self.assertEqual(self.search('찌개'), ['김치찌개', '된장찌개'])
+        self.assertEqual(self.search('치'), ['김치', '김치찌개', '기무치'])
+
+
+@override_settings(INFERENCE_SERVER_ADDRESS='127.0.0.1:8765', INFERENCE_SERVER_AUTHKEY='test-key')
+class InferenceClientTests(SimpleTestCase):
+    """추론 서버가 요청 도중 끊기면 500이 아니라 InferenceUnavailable(→ 503)이어야 합니다."""
+
+    def test_connection_lost_mid_request(self):
+        conn = mock.MagicMock()
+        conn.__enter__.return_value = conn
+        conn.poll.return_value = True
+        conn.recv.side_effect = EOFError
+        with mock.patch('food_app.inference_service.Client', return_value=conn):
+            with self.assertRaises(InferenceUnavailable):
+                detect(Image.new('RGB', (8, 8)))
+
+    @override_settings(INFERENCE_SERVER_AUTHKEY='')
+    def test_authkey_is_required(self):
+        with self.assertRaises(ImproperlyConfigured):
+            detect(Image.new('RGB', (8, 8)))
+
+
+# ============================================
+# /api/ 엔드포인트 쿼리 수/지연 시간 예산
+# ============================================
+# 실제 서비스 규모에 가까운 합성 데이터: 음식 수천 개, 사용자 수백 명, 몇 달 치 식사 기록
+SEED_FOODS = 3000
+SEED_FOOD_CLASSES = 150
+SEED_ALLERGENS = 20
+SEED_USERS = 200
+SEED_DAYS = 90
+SEED_MEALS_PER_DAY = 3
+SEED_ITEMS_PER_MEAL = 2
+SEED_PREFERENCES_PER_USER = 30
+BUDGET_ITERATIONS = 20
+# 데이터 생성에 시간이 걸리므로 API_BUDGET_TESTS=1일 때만 실행
+BUDGET_TESTS_ENABLED = os.getenv('API_BUDGET_TESTS', '').lower() in ('1', 'true')
+# 지연 시간 보고서 (기본값은 임시 디렉터리, API_BUDGET_REPORT로 경로 지정)
+BUDGET_REPORT_PATH = os.getenv('API_BUDGET_REPORT', os.path.join(tempfile.gettempdir(), 'api_budget_report.json'))
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def consume_streaming_content(response) -> bytes:
+    if not response.is_async:
+        return b''.join(response.streaming_content)
+
+    async def consume():
+        return b''.join([chunk async for chunk in response.streaming_content])
+    return async_to_sync(consume)()
+
+
+class FakeAsyncStream:
+    """AsyncOpenAI 스트리밍 응답 대체 (chunk.choices[0].delta.content). hang=True면 마지막 토큰 뒤에 멈춤"""
+
+    def __init__(self, texts, hang=False):
+        self.texts = texts
+        self.hang = hang
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        self.closed = True
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for text in self.texts:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+        if self.hang:
+            await asyncio.Event().wait()
+
+
+@unittest.skipUnless(BUDGET_TESTS_ENABLED, 'API_BUDGET_TESTS=1일 때만 실행')
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ApiBudgetTests(TestCase):
+    """
+    urls.py의 모든 경로를 DRF 테스트 클라이언트로 호출해 엔드포인트별 최대 쿼리 수를 검사하고,
+    p50/p95 지연 시간을 JSON 보고서로 남깁니다. 모델 추론, 벡터 검색, OpenAI 호출은 고정 응답으로 대체합니다.
+    쿼리 수는 데이터 양(선호도, 식사 기록, 후보 수)과 관계없이 일정해야 합니다.
+
+        API_BUDGET_TESTS=1 python manage.py test food_app.tests.ApiBudgetTests
+    """
+    client_class = APIClient
+    report = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        start = time.perf_counter()
+
+        allergens = Allergen.objects.bulk_create([Allergen(name=f'항원{i}') for i in range(SEED_ALLERGENS)])
+        foods = Food.objects.bulk_create([
+            Food(
+                representative_name=f'음식{i}', food_class=f'분류{i % SEED_FOOD_CLASSES}',
+                energy_kcal=rng.uniform(20, 400), protein_g=rng.uniform(0, 30), fat_g=rng.uniform(0, 25),
+                carbohydrate_g=rng.uniform(0, 60), sugars_g=rng.uniform(0, 15),
+                description='합성 데이터', main_ingredients=['재료'], taste_profile=['담백한'],
+                situational_tags=['평범한 저녁 식사'],
+            )
+            for i in range(SEED_FOODS)
+        ], batch_size=500)
+        Food.allergens.through.objects.bulk_create([
+            Food.allergens.through(food_id=food.id, allergen_id=allergen.id)
+            for food in foods[::5] for allergen in rng.sample(allergens, 2)
+        ], batch_size=500)
+
+        password = make_password('pw')
+        users = User.objects.bulk_create(
+            [User(username=f'user{i}', password=password) for i in range(SEED_USERS)], batch_size=500
+        )
+        profiles = UserProfile.objects.bulk_create([
+            UserProfile(user=user, gender='F', height_cm=165, weight_kg=58, birth_date=date(1995, 5, 5), activity_level='light')
+            for user in users
+        ], batch_size=500)
+        UserProfile.allergies.through.objects.bulk_create([
+            UserProfile.allergies.through(userprofile_id=profile.id, allergen_id=allergen.id)
+            for profile in profiles for allergen in rng.sample(allergens, 2)
+        ], batch_size=500)
+        UserFoodPreference.objects.bulk_create([
+            UserFoodPreference(user_profile=profile, food=food, preference=rng.choice(['LIKE', 'DISLIKE']))
+            for profile in profiles for food in rng.sample(foods, SEED_PREFERENCES_PER_USER)
+        ], batch_size=500)
+
+        # 식사/항목/일별 요약은 저장 경로와 같은 값으로 미리 계산해 한 번에 저장
+        today = timezone.localdate()
+        meals, meal_items, daily = [], [], {}
+        for user in users:
+            for days_ago in range(SEED_DAYS):
+                day = today - timedelta(days=days_ago)
+                for hour in (8, 12, 19)[:SEED_MEALS_PER_DAY]:
+                    meal = Meal(
+                        user=user, title=f'{hour}시',
+                        created_at=datetime.combine(day, dt_time(hour), tzinfo=timezone.get_current_timezone()),
+                    )
+                    items = [MealItem(meal=meal, food=food, weight_g=rng.uniform(50, 400))
+                             for food in rng.sample(foods, SEED_ITEMS_PER_MEAL)]
+                    summary = daily.setdefault((user.id, day), DailyNutritionSummary(user=user, date=day))
+                    summary.meal_count += 1
+                    for item in items:
+                        item.fill_nutrition()
+                        for field_name, total_field in TOTAL_FIELDS.items():
+                            value = getattr(item, field_name) or 0
+                            setattr(meal, total_field, getattr(meal, total_field) + value)
+                            setattr(summary, total_field, getattr(summary, total_field) + value)
+                    meals.append(meal)
+                    meal_items.extend(items)
+        Meal.objects.bulk_create(meals, batch_size=1000)
+        MealItem.objects.bulk_create(meal_items, batch_size=1000)
+        DailyNutritionSummary.objects.bulk_create(daily.values(), batch_size=1000)
+
+        cls.user = users[0]
+        cls.profile = profiles[0]
+        cls.foods = foods
+        cls.seed_seconds = time.perf_counter() - start
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if cls.report:
+            with open(BUDGET_REPORT_PATH, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'dataset': {
+                        'foods': SEED_FOODS, 'users': SEED_USERS,
+                        'meals': SEED_USERS * SEED_DAYS * SEED_MEALS_PER_DAY,
+                        'meal_items': SEED_USERS * SEED_DAYS * SEED_MEALS_PER_DAY * SEED_ITEMS_PER_MEAL,
+                        'seed_seconds': round(cls.seed_seconds, 2),
+                    },
+                    'iterations': BUDGET_ITERATIONS,
+                    'endpoints': dict(sorted(cls.report.items())),
+                }, f, ensure_ascii=False, indent=2)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        recommendation_cache.entries.clear()
+        # 모델/벡터 검색/LLM 없이 실행
+        candidates = [(food.id, 1.0 - i * 0.01) for i, food in enumerate(self.foods[:5])]
+        detections = [
+            {'pred_class': '분류1', 'confidence': 0.9, 'top_k': [], 'bbox': [0, 0, 32, 32]},
+            {'pred_class': '분류2', 'confidence': 0.8, 'top_k': [], 'bbox': [8, 8, 40, 40]},
+        ]
+        patches = [
+            mock.patch('food_app.views.encode_query', return_value=np.ones(4, dtype=np.float32)),
+            mock.patch('food_app.views.search_similar_foods', return_value=candidates),
+            mock.patch('food_app.async_views.detect', return_value=detections),
+            mock.patch.object(prediction_cache, 'get', return_value=None),
+            mock.patch('food_app.async_views.AsyncOpenAI', return_value=fake_async_openai(['순두부찌개를 ', '추천해요.'])),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def measure(self, name, request, max_queries, expected_status=200, prepare=None):
+        """
+        request(): 응답 반환. prepare(): 매 호출 전 실행 (측정 제외).
+        첫 호출은 인메모리 인덱스 생성 등 준비 단계로 보고 측정하지 않습니다.
+        """
+        latencies, query_counts = [], []
+        for iteration in range(BUDGET_ITERATIONS + 1):
+            if prepare is not None:
+                prepare()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = request()
+                if response.streaming:
+                    consume_streaming_content(response)
+                elapsed = time.perf_counter() - start
+            self.assertEqual(response.status_code, expected_status, f'{name}: {getattr(response, "data", None)}')
+            if iteration == 0:
+                continue
+            latencies.append(elapsed * 1000)
+            query_counts.append(len(queries))
+
+        latencies.sort()
+        self.report[name] = {
+            'max_queries': max_queries,
+            'queries': max(query_counts),
+            'p50_ms': round(percentile(latencies, 0.5), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+        }
+        self.assertLessEqual(max(query_counts), max_queries, f'{name}: 쿼리 수 예산 초과')
+
+    # --- 음식/예측 ---
+    def test_predict(self):
+        image = io.BytesIO()
+        Image.new('RGB', (64, 64), 'orange').save(image, format='PNG')
+
+        def request():
+            image.seek(0)
+            return self.client.post('/api/predict/', {'image': image}, format='multipart')
+        self.measure('POST /api/predict/', request, max_queries=2)
+
+    def test_food_options(self):
+        self.measure('GET /api/food-options/?class=', lambda: self.client.get('/api/food-options/', {'class': '분류1'}), max_queries=2)
+        self.measure('GET /api/food-options/?name=', lambda: self.client.get('/api/food-options/', {'name': '음식1'}), max_queries=2)
+        self.measure(
+            'GET /api/food-options/?class=&name=',
+            lambda: self.client.get('/api/food-options/', {'class': '분류1', 'name': '음식1'}), max_queries=3,
+        )
+
+    def test_food_search(self):
+        self.measure('GET /api/food-search/', lambda: self.client.get('/api/food-search/', {'q': '음식1'}), max_queries=2)
+
+    def test_calc_nutrition(self):
+        food = self.foods[0]
+        self.measure(
+            'POST /api/calc-nutrition/',
+            lambda: self.client.post('/api/calc-nutrition/', {'food_id': food.id, 'weight_g': 250}, format='json'),
+            max_queries=3,
+        )
+
+    # --- 프로필/식사 ---
+    def test_profile(self):
+        self.measure('GET /api/profile/', lambda: self.client.get('/api/profile/'), max_queries=4)
+        self.measure(
+            'PUT /api/profile/',
+            lambda: self.client.put('/api/profile/', {'weight_kg': 57, 'allergy_ids': []}, format='json'),
+            max_queries=6,
+        )
+
+    def test_meals(self):
+        self.measure('GET /api/meals/', lambda: self.client.get('/api/meals/'), max_queries=5)
+        items = [{'food_id': food.id, 'weight_g': 150} for food in self.foods[10:20]]
+        self.measure(
+            'POST /api/meals/',
+            lambda: self.client.post('/api/meals/', {'title': '간식', 'items': items}, format='json'),
+            max_queries=19, expected_status=201,
+        )
+
+    def test_nutrition_summary(self):
+        start = (timezone.localdate() - timedelta(days=SEED_DAYS - 1)).isoformat()
+        for granularity in ('day', 'week', 'month'):
+            self.measure(
+                f'GET /api/nutrition/summary/?granularity={granularity}',
+                lambda: self.client.get('/api/nutrition/summary/', {'from': start, 'granularity': granularity}),
+                max_queries=3,
+            )
+
+    # --- 선호도/알러지 ---
+    def test_food_preferences(self):
+        self.measure('GET /api/food-preferences/', lambda: self.client.get('/api/food-preferences/'), max_queries=4)
+        food = self.foods[-1]
+        self.measure(
+            'POST /api/food-preferences/',
+            lambda: self.client.post('/api/food-preferences/', {'food_id': food.id, 'preference': 'LIKE'}, format='json'),
+            max_queries=10, expected_status=201,
+            prepare=lambda: UserFoodPreference.objects.filter(user_profile=self.profile, food=food).delete(),
+        )
+        self.measure(
+            'DELETE /api/food-preferences/<food_id>/',
+            lambda: self.client.delete(f'/api/food-preferences/{food.id}/'),
+            max_queries=7, expected_status=204,
+            prepare=lambda: UserFoodPreference.objects.get_or_create(
+                user_profile=self.profile, food=food, defaults={'preference': 'DISLIKE'}
+            ),
+        )
+
+    def test_allergens(self):
+        self.measure('GET /api/allergens/', lambda: self.client.get('/api/allergens/'), max_queries=3)
+        self.measure(
+            'POST /api/allergens/',
+            lambda: self.client.post('/api/allergens/', {'name': '항원0'}, format='json'),
+            max_queries=3, expected_status=201,
+        )
+        allergen = {}
+
+        def prepare():
+            allergen['id'] = Allergen.objects.create(name=f'임시항원{len(allergen)}{time.perf_counter_ns()}').id
+        self.measure(
+            'DELETE /api/allergens/<pk>/',
+            lambda: self.client.delete(f"/api/allergens/{allergen['id']}/"),
+            max_queries=6, expected_status=204, prepare=prepare,
+        )
+
+    # --- 인증 ---
+    def test_auth(self):
+        self.client.logout()
+        counter = iter(range(10 ** 6))
+        self.measure(
+            'POST /api/auth/register/',
+            lambda: self.client.post('/api/auth/register/', {'username': f'new{next(counter)}', 'password': 'pw'}, format='json'),
+            max_queries=14, expected_status=201, prepare=self.client.logout,
+        )
+        self.measure(
+            'POST /api/auth/login/',
+            lambda: self.client.post('/api/auth/login/', {'username': 'user1', 'password': 'pw'}, format='json'),
+            max_queries=9, prepare=self.client.logout,
+        )
+        self.measure(
+            'POST /api/auth/logout/',
+            lambda: self.client.post('/api/auth/logout/'),
+            max_queries=4, prepare=lambda: self.client.force_login(self.user),
+        )
+
+    # --- 운영 지표 ---
+    def test_metrics(self):
+        self.measure('GET /api/metrics', lambda: self.client.get('/api/metrics'), max_queries=0)
+
+    # --- 추천 ---
+    def test_recommend_menu(self):
+        self.measure(
+            'POST /api/recommend-menu/',
+            lambda: self.client.post('/api/recommend-menu/', {'query': '비오는 날 국물 요리'}, format='json'),
+            max_queries=8, prepare=recommendation_cache.entries.clear,
+        )
+        self.measure(
+            'POST /api/recommend-menu/ (cached)',
+            lambda: self.client.post('/api/recommend-menu/', {'query': '비오는 날 국물 요리'}, format='json'),
+            max_queries=8,
+        )
+
+    def test_recommend_menu_stream(self):
+        self.measure(
+            'POST /api/recommend-menu/stream/',
+            lambda: self.client.post('/api/recommend-menu/stream/', {'query': '비오는 날 국물 요리'}, format='json'),
+            max_queries=8, prepare=recommendation_cache.entries.clear,
+        )
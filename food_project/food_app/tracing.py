@@ -0,0 +1,253 @@
+# food_app/tracing.py
+"""
+요청 단위 구간별 소요 시간 측정 (Server-Timing 헤더 + /api/metrics 히스토그램)
+
+    with span("detect"):
+        detections = detect(img)
+
+- TracingMiddleware가 요청마다 RequestTrace를 만들고, 그 요청 안에서 열린 span의
+  시간을 구간 이름별로 합산해 응답의 Server-Timing 헤더로 내보냅니다.
+  (예: `Server-Timing: decode;dur=3.1, detect;dur=182.4, db;dur=1.2;desc="2 queries", total;dur=190.0`)
+- ORM 쿼리는 connection.execute_wrapper로 "db" 구간에 자동 집계됩니다.
+- 구간/요청 시간은 프로세스 내 히스토그램에도 기록되어 /api/metrics(Prometheus text)로 노출됩니다.
+  값은 프로세스 단위이므로 워커가 여러 개면 Prometheus 쪽에서 합산하세요.
+- settings.TRACING_ENABLED=false면 미들웨어는 로드되지 않고, span()은 아무 일도 하지 않는
+  공유 객체를 반환합니다.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+
+# 1ms ~ 10s (LLM 호출까지 포함하도록 위쪽을 넓게)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# ============================================
+# 1. Prometheus 히스토그램
+# ============================================
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs) -> str:
+    return ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs)
+
+
+class Histogram:
+    """라벨 조합별 버킷 히스토그램 (스레드 안전)"""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        # 라벨 값 -> [버킷별 개수(누적 아님)..., 합계, 개수]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(snapshot.items()):
+            pairs = list(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{{{_format_labels(pairs + [('le', bound)])}}} {cumulative}")
+            lines.append(f"{self.name}_bucket{{{_format_labels(pairs + [('le', '+Inf')])}}} {series[-1]}")
+            labels = f"{{{_format_labels(pairs)}}}" if pairs else ""
+            lines.append(f"{self.name}_sum{labels} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+stage_seconds = Histogram(
+    "food_app_stage_duration_seconds", "Time spent in each traced stage (decode, detect, db, llm, ...)", ("stage",)
+)
+request_seconds = Histogram(
+    "food_app_request_duration_seconds", "Request latency until the response headers are ready",
+    ("view", "method", "status"),
+)
+
+
+# ============================================
+# 2. 요청 단위 트레이스 + span
+# ============================================
+class RequestTrace:
+    """요청 하나에서 구간 이름별 [누적 시간(초), 횟수]"""
+
+    __slots__ = ("stages",)
+
+    def __init__(self):
+        self.stages: dict[str, list] = {}
+
+    def add(self, name: str, seconds: float):
+        stage = self.stages.get(name)
+        if stage is None:
+            self.stages[name] = [seconds, 1]
+        else:
+            stage[0] += seconds
+            stage[1] += 1
+
+    def server_timing(self, total_seconds: float) -> str:
+        entries = []
+        for name, (seconds, count) in self.stages.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if name == "db":
+                entry += f';desc="{count} queries"'
+            entries.append(entry)
+        entries.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(entries)
+
+
+# asyncio 태스크/스레드별로 분리되고, sync_to_async로 실행되는 동기 코드에도 전달됩니다.
+_current_trace: ContextVar[RequestTrace | None] = ContextVar("food_app_trace", default=None)
+
+
+def record(name: str, seconds: float):
+    """구간 시간 기록: 히스토그램 + (요청 처리 중이면) 현재 요청 트레이스"""
+    stage_seconds.observe(seconds, name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self.start)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str):
+    """`with span("detect"):` 블록의 소요 시간을 기록 (예외가 나도 기록)"""
+    if not settings.TRACING_ENABLED:
+        return _NOOP_SPAN
+    return _Span(name)
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    """connection.execute_wrappers용: 요청 처리 중인 쿼리만 "db" 구간으로 기록"""
+    if _current_trace.get() is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record("db", time.perf_counter() - start)
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """connection_created signal 핸들러 (FoodAppConfig.ready에서 연결)"""
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+# ============================================
+# 3. 미들웨어
+# ============================================
+def _finish(request, response, trace: RequestTrace, start: float):
+    elapsed = time.perf_counter() - start
+    match = request.resolver_match
+    view_name = (match.url_name or match.view_name) if match is not None else "unmatched"
+    request_seconds.observe(elapsed, view_name, request.method, response.status_code)
+    # 스트리밍 응답은 헤더를 보낼 때까지의 시간만 포함 (이후 LLM 토큰 시간은 히스토그램에만 기록)
+    response["Server-Timing"] = trace.server_timing(elapsed)
+    return response
+
+
+@sync_and_async_middleware
+def tracing_middleware(get_response):
+    if not settings.TRACING_ENABLED:
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            trace, start = RequestTrace(), time.perf_counter()
+            token = _current_trace.set(trace)
+            try:
+                response = await get_response(request)
+            finally:
+                _current_trace.reset(token)
+            return _finish(request, response, trace, start)
+    else:
+        def middleware(request):
+            trace, start = RequestTrace(), time.perf_counter()
+            token = _current_trace.set(trace)
+            try:
+                response = get_response(request)
+            finally:
+                _current_trace.reset(token)
+            return _finish(request, response, trace, start)
+
+    return middleware
+
+
+# ============================================
+# 4. /api/metrics 출력
+# ============================================
+def _gauge_lines(name: str, help_text: str, samples: list[tuple[dict, float]]) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        label_text = f"{{{_format_labels(labels.items())}}}" if labels else ""
+        lines.append(f"{name}{label_text} {value}")
+    return lines
+
+
+def _stats_lines(prefix: str, help_prefix: str, stats_by_label: dict[str, dict], label_name: str) -> list[str]:
+    """{라벨 값: stats() dict} -> 숫자 항목별 gauge (예: food_app_cache_hit_ratio{cache="prediction"})"""
+    samples: dict[str, list] = {}
+    for label_value, stats in stats_by_label.items():
+        for key, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                samples.setdefault(key, []).append(({label_name: label_value}, value))
+    lines = []
+    for key, key_samples in samples.items():
+        lines.extend(_gauge_lines(f"{prefix}_{key}", f"{help_prefix} {key}", key_samples))
+    return lines
+
+
+def render_metrics(cache_stats: dict[str, dict], batcher_stats: dict[str, dict]) -> str:
+    lines = stage_seconds.render() + request_seconds.render()
+    lines += _stats_lines("food_app_cache", "In-process cache", cache_stats, "cache")
+    lines += _stats_lines("food_app_micro_batch", "Inference micro-batcher", batcher_stats, "batcher")
+    return "\n".join(lines) + "\n"
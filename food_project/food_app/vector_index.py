@@ -0,0 +1,316 @@
+# food_app/vector_index.py
+"""
+프로세스 내 NumPy 벡터 인덱스 (settings.VECTOR_BACKEND = "numpy")
+
+음식 카탈로그는 수천 건 규모라서, ChromaDB(SQLite + 직렬화)를 거치는 것보다
+정규화된 임베딩 행렬과 쿼리 벡터의 내적(= 코사인 유사도) 한 번이 훨씬 빠릅니다.
+
+디스크 형식 (index_food_vectors가 생성, settings.VECTOR_INDEX_DIR)
+- meta.json      : 현재 세대 포인터. 세대 디렉터리 이름(generation)과 아래 meta 내용
+- gen-<번호>/     : 한 번의 쓰기로 만든 파일 묶음. 읽는 쪽은 meta.json이 가리키는 세대의 파일만 엽니다.
+- embeddings.npy : (N, D) 정규화된 임베딩 (float32 또는 float16), mmap으로 로드
+- ids.npy        : (N,) int64 Food ID
+- ivf_centroids.npy, ivf_offsets.npy : IVF 모드일 때만. 행은 클러스터 순서로 정렬되어
+                   리스트 i는 embeddings[offsets[i]:offsets[i+1]] 입니다.
+- attr_<이름>.npy : 행별 필터용 속성 (예: kcal, 식단 플래그, 알러지 비트마스크). 행 순서는 ids.npy와 같음
+- meta 내용      : 차원/개수/dtype/모델 이름/IVF 리스트 수/속성 목록 등
+
+새 세대를 다 쓴 뒤 meta.json 하나만 os.replace로 교체하므로, 로드 중인 프로세스가
+새 embeddings와 이전 ids/속성을 섞어 읽는 일이 없습니다.
+
+검색 모드
+- exact: 전체 행렬 내적 + argpartition top-k
+- IVF  : 쿼리와 가까운 클러스터 nprobe개 안에서만 exact 검색 (카탈로그가 커졌을 때)
+두 모드 모두 행 마스크(허용할 행 = True)를 받아 점수 계산 단계에서 제외합니다.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+
+EMBEDDINGS_FILE = "embeddings.npy"
+IDS_FILE = "ids.npy"
+CENTROIDS_FILE = "ivf_centroids.npy"
+OFFSETS_FILE = "ivf_offsets.npy"
+META_FILE = "meta.json"
+GENERATION_PREFIX = "gen-"
+
+
+def normalize_rows(matrix) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """1차원 점수 배열에서 상위 k개 위치 (점수 내림차순)"""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(scores.size)
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 20, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """구면 k-means (코사인). → (정규화된 중심 (K, D), 각 행의 클러스터 번호 (N,))"""
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].astype(np.float32)
+    assignments = np.zeros(len(vectors), dtype=np.int64)
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for cluster in range(n_clusters):
+            members = vectors[assignments == cluster]
+            if len(members):
+                centroids[cluster] = members.sum(axis=0)
+            else:
+                # 빈 클러스터는 임의의 행으로 다시 시작
+                centroids[cluster] = vectors[rng.integers(len(vectors))]
+        centroids = normalize_rows(centroids)
+    return centroids, assignments
+
+
+def _attribute_file(name: str) -> str:
+    return f"attr_{name}.npy"
+
+
+# 스트리밍 쓰기/IVF 배정 시 한 번에 다루는 행 수 (메모리 사용량 상한)
+WRITE_CHUNK_ROWS = 4096
+# IVF 중심 학습에 사용할 최대 표본 수
+KMEANS_SAMPLE_ROWS = 20000
+
+
+class IndexWriter:
+    """
+    인덱스 파일을 청크 단위로 씁니다. (전체 임베딩 행렬을 메모리에 올리지 않음)
+    쓰기마다 새 세대 디렉터리에 모든 파일을 만들고, finish()의 마지막 단계에서 meta.json
+    포인터를 교체합니다. 읽는 쪽은 meta.json 변경으로 재로드합니다.
+    """
+
+    def __init__(self, directory: str, dtype: str = "float32"):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        # 세대 이름은 쓰기마다 고유하게 (같은 디렉터리에 동시에 쓰는 경우 대비), 이름순 = 생성순
+        self._tag = f"{os.getpid()}.{uuid.uuid4().hex[:8]}"
+        self.generation = f"{GENERATION_PREFIX}{time.time_ns()}.{self._tag}"
+        self.path = os.path.join(directory, self.generation)
+        os.makedirs(self.path)
+        self._raw_path = os.path.join(self.path, ".embeddings.raw")
+        self._raw = open(self._raw_path, "wb")
+        self.count = 0
+        self.dim = 0
+        self._ids: list[np.ndarray] = []
+        self._attributes: dict[str, list[np.ndarray]] = {}
+
+    def append(self, ids, embeddings, attributes: dict[str, np.ndarray] | None = None):
+        vectors = normalize_rows(embeddings)
+        if len(vectors) == 0:
+            return
+        self.dim = vectors.shape[1]
+        self._raw.write(vectors.astype(self.dtype).tobytes())
+        self._ids.append(np.asarray(ids, dtype=np.int64))
+        for name, values in (attributes or {}).items():
+            self._attributes.setdefault(name, []).append(np.asarray(values))
+        self.count += len(vectors)
+
+    def abort(self):
+        """쓰던 세대 디렉터리 삭제 (기존 인덱스는 그대로)"""
+        self._raw.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _save(self, name: str, array: np.ndarray):
+        # 세대 디렉터리는 아직 아무도 읽지 않으므로 바로 씀
+        with open(os.path.join(self.path, name), "wb") as f:
+            np.save(f, array)
+
+    def _current_generation(self) -> str | None:
+        try:
+            with open(os.path.join(self.directory, META_FILE)) as f:
+                return json.load(f).get("generation")
+        except FileNotFoundError:
+            return None
+
+    def _remove_old_generations(self, previous: str | None):
+        """
+        방금 교체된 직전 세대보다 오래된 세대만 삭제
+        (직전 세대는 교체 직전에 meta.json을 읽고 아직 파일을 열지 않은 프로세스용으로 남김)
+        """
+        if previous is None:
+            return
+        for name in os.listdir(self.directory):
+            if name.startswith(GENERATION_PREFIX) and name < previous:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def _ivf_order(self, vectors: np.ndarray, ivf_lists: int):
+        """표본으로 중심 학습 → 전체 행을 청크 단위로 배정 → (중심, 정렬 순서, 리스트 경계)"""
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(self.count, min(self.count, KMEANS_SAMPLE_ROWS), replace=False))
+        centroids, _ = kmeans(np.asarray(vectors[sample_rows], dtype=np.float32), ivf_lists)
+        assignments = np.concatenate([
+            np.argmax(np.asarray(vectors[i:i + WRITE_CHUNK_ROWS], dtype=np.float32) @ centroids.T, axis=1)
+            for i in range(0, self.count, WRITE_CHUNK_ROWS)
+        ])
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+        return centroids, order, offsets.astype(np.int64)
+
+    def finish(self, ivf_lists: int = 0, model_name: str = "", extra_meta: dict | None = None):
+        self._raw.close()
+        try:
+            ids = np.concatenate(self._ids) if self._ids else np.empty(0, dtype=np.int64)
+            attributes = {name: np.concatenate(parts) for name, parts in self._attributes.items()}
+            raw = (
+                np.memmap(self._raw_path, dtype=self.dtype, mode="r", shape=(self.count, self.dim))
+                if self.count else np.empty((0, self.dim), dtype=self.dtype)
+            )
+
+            centroids = order = offsets = None
+            if ivf_lists and self.count > ivf_lists:
+                centroids, order, offsets = self._ivf_order(raw, ivf_lists)
+                ids = ids[order]
+                attributes = {name: values[order] for name, values in attributes.items()}
+
+            # 최종 embeddings.npy (IVF면 클러스터 순서로 재배열하며 청크 단위 복사)
+            out = np.lib.format.open_memmap(
+                os.path.join(self.path, EMBEDDINGS_FILE), mode="w+", dtype=self.dtype, shape=(self.count, self.dim)
+            )
+            for i in range(0, self.count, WRITE_CHUNK_ROWS):
+                rows = order[i:i + WRITE_CHUNK_ROWS] if order is not None else slice(i, i + WRITE_CHUNK_ROWS)
+                out[i:i + WRITE_CHUNK_ROWS] = raw[rows]
+            out.flush()
+            del out, raw
+            os.remove(self._raw_path)
+
+            self._save(IDS_FILE, ids)
+            if centroids is not None:
+                self._save(CENTROIDS_FILE, centroids)
+                self._save(OFFSETS_FILE, offsets)
+            for name, values in attributes.items():
+                self._save(_attribute_file(name), values)
+        except BaseException:
+            shutil.rmtree(self.path, ignore_errors=True)
+            raise
+
+        meta = {
+            "generation": self.generation,
+            "count": int(self.count),
+            "dim": int(self.dim),
+            "dtype": self.dtype.name,
+            "model": model_name,
+            "ivf_lists": int(len(centroids)) if centroids is not None else 0,
+            "attributes": sorted(attributes),
+            **(extra_meta or {}),
+        }
+        tmp_path = os.path.join(self.directory, f".{META_FILE}.{self._tag}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        previous = self._current_generation()
+        # 이 교체 한 번으로 새 세대가 보이게 됨
+        os.replace(tmp_path, os.path.join(self.directory, META_FILE))
+        self._remove_old_generations(previous)
+
+
+def write_index(
+    directory: str,
+    ids,
+    embeddings,
+    dtype: str = "float32",
+    ivf_lists: int = 0,
+    model_name: str = "",
+    attributes: dict[str, np.ndarray] | None = None,
+    extra_meta: dict | None = None,
+):
+    """Food ID와 임베딩(+ 행별 속성)으로 인덱스 파일을 한 번에 씁니다. (IndexWriter 참고)"""
+    writer = IndexWriter(directory, dtype)
+    writer.append(ids, embeddings, attributes)
+    writer.finish(ivf_lists=ivf_lists, model_name=model_name, extra_meta=extra_meta)
+
+
+class NumpyVectorIndex:
+    def __init__(self, directory: str, nprobe: int = 8):
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta = json.load(f)
+        # meta.json을 한 번만 읽고 그 세대의 파일만 엶 (세대가 없으면 이전 형식: 디렉터리 바로 아래)
+        directory = os.path.join(directory, self.meta.get("generation", ""))
+        self.embeddings = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode="r")
+        self.ids = np.load(os.path.join(directory, IDS_FILE))
+        self.nprobe = nprobe
+        self.centroids = self.offsets = None
+        if self.meta.get("ivf_lists"):
+            self.centroids = np.load(os.path.join(directory, CENTROIDS_FILE))
+            self.offsets = np.load(os.path.join(directory, OFFSETS_FILE))
+        self.attributes = {
+            name: np.load(os.path.join(directory, _attribute_file(name)))
+            for name in self.meta.get("attributes", [])
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _search_rows(self, query: np.ndarray, k: int, start: int = 0, stop: int | None = None, mask=None):
+        rows = self.embeddings[start:stop]
+        if rows.dtype != np.float32:
+            # float16은 메모리를 절반으로 줄이는 대신 계산 전에 float32로 변환 (NumPy float16 행렬곱은 느림)
+            rows = rows.astype(np.float32)
+        scores = rows @ query
+        if mask is not None:
+            scores[~mask[start:stop]] = -np.inf
+        top = _top_k(scores, k)
+        top = top[np.isfinite(scores[top])]
+        return top + start, scores[top]
+
+    def search_one(self, query: np.ndarray, k: int, exact: bool = False, mask=None) -> tuple[np.ndarray, np.ndarray]:
+        """정규화된 쿼리 벡터 1개 → (행 위치, 코사인 유사도) 상위 k개 (mask가 False인 행 제외)"""
+        query = np.asarray(query, dtype=np.float32)
+        if self.centroids is None or exact:
+            return self._search_rows(query, k, mask=mask)
+
+        # IVF: 가까운 클러스터 nprobe개만 검색 (각 클러스터는 연속된 행 구간)
+        lists = _top_k(self.centroids @ query, self.nprobe)
+        positions, scores = [], []
+        for cluster in lists:
+            found, found_scores = self._search_rows(query, k, self.offsets[cluster], self.offsets[cluster + 1], mask)
+            positions.append(found)
+            scores.append(found_scores)
+        positions, scores = np.concatenate(positions), np.concatenate(scores)
+        top = _top_k(scores, k)
+        return positions[top], scores[top]
+
+    def search(self, queries, k: int, exact: bool = False, mask=None) -> list[tuple[list[int], list[float]]]:
+        """쿼리 벡터 목록 → 쿼리별 (Food ID 목록, 유사도 목록)"""
+        results = []
+        for query in normalize_rows(np.atleast_2d(queries)):
+            positions, scores = self.search_one(query, k, exact=exact, mask=mask)
+            results.append((self.ids[positions].tolist(), scores.astype(float).tolist()))
+        return results
+
+
+_index: NumpyVectorIndex | None = None
+_index_stamp = None
+_index_lock = threading.Lock()
+
+
+def get_numpy_index(directory: str, nprobe: int = 8) -> NumpyVectorIndex:
+    """인덱스 로드 (index_food_vectors가 다시 쓰면 meta.json 변경을 감지해 재로드)"""
+    global _index, _index_stamp
+    meta_path = os.path.join(directory, META_FILE)
+    try:
+        stat = os.stat(meta_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"NumPy 벡터 인덱스가 없습니다: {meta_path} (python manage.py index_food_vectors 실행 필요)"
+        ) from None
+    stamp = (meta_path, stat.st_mtime_ns, stat.st_size)
+    if _index is None or _index_stamp != stamp:
+        with _index_lock:
+            if _index is None or _index_stamp != stamp:
+                _index = NumpyVectorIndex(directory, nprobe)
+                _index_stamp = stamp
+    return _index
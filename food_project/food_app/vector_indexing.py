@@ -0,0 +1,356 @@
+# food_app/vector_indexing.py
+"""
+Food → 벡터 인덱스(ChromaDB / NumPy) 증분 동기화
+
+각 음식 문서(create_document_from_food)의 해시를 메타데이터 doc_hash로 저장해 두고,
+다시 인덱싱할 때는
+- 새 음식 / 문서가 바뀐 음식만 임베딩을 다시 계산하고
+- 문서는 같고 필터용 메타데이터(알러지, 칼로리 등)만 바뀐 음식은 메타데이터만 갱신하고
+- DB에서 삭제된 음식은 인덱스에서도 삭제합니다.
+
+settings.VECTOR_AUTO_REINDEX=true면 Food 변경 시그널이 schedule_reindex()를 호출해
+웹 프로세스의 백그라운드 스레드에서 (짧게 모아서) 동기화합니다.
+"""
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator, NamedTuple
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+
+from .models import Allergen, Food
+from .vector_index import IndexWriter, NumpyVectorIndex
+from .vector_service import (
+    EMBEDDING_MODEL_NAME,
+    create_document_from_food,
+    create_metadata_from_food,
+    get_chroma_collection,
+    get_embedding_model,
+)
+
+logger = logging.getLogger(__name__)
+
+# DB에서 읽어 문서를 만들고 인코딩/저장하는 단위 (음식 수)
+CHUNK_SIZE = 256
+# 문서 생성(생산자)과 인코딩(소비자) 사이 대기열 길이 → 동시에 메모리에 있는 청크 수 상한
+PIPELINE_DEPTH = 2
+# ChromaDB에서 기존 메타데이터를 읽을 때 페이지 크기
+CHROMA_PAGE_SIZE = 1000
+
+
+def document_hash(document: str) -> str:
+    """문서 + 임베딩 모델 이름의 해시 (모델이 바뀌어도 다시 임베딩)"""
+    return hashlib.sha256(f"{EMBEDDING_MODEL_NAME}\n{document}".encode()).hexdigest()[:32]
+
+
+def _metadata_digest(metadata: dict) -> str:
+    return hashlib.sha1(json.dumps(metadata, sort_keys=True).encode()).hexdigest()
+
+
+class IndexEntry(NamedTuple):
+    food_id: int
+    document: str
+    metadata: dict   # create_metadata_from_food + doc_hash
+
+
+@dataclass
+class SyncResult:
+    total: int = 0
+    embedded: int = 0
+    metadata_updated: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+    encode_seconds: float = 0.0
+
+    @property
+    def unchanged(self) -> int:
+        return self.total - self.embedded - self.metadata_updated
+
+    @property
+    def docs_per_second(self) -> float:
+        """인코딩 처리량 (다시 임베딩한 문서 기준)"""
+        return self.embedded / self.encode_seconds if self.encode_seconds else 0.0
+
+
+def iter_entry_chunks(allergen_ids: list[int], chunk_size: int = CHUNK_SIZE) -> Iterator[list[IndexEntry]]:
+    """카탈로그를 ID 순으로 chunk_size개씩 읽어 인덱스 항목으로 변환 (전체를 메모리에 올리지 않음)"""
+    chunk = []
+    foods = Food.objects.prefetch_related('allergens').order_by('id').iterator(chunk_size=chunk_size)
+    for food in foods:
+        document = create_document_from_food(food)
+        metadata = create_metadata_from_food(food, allergen_ids)
+        metadata['doc_hash'] = document_hash(document)
+        chunk.append(IndexEntry(food.id, document, metadata))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def numpy_attributes(metadatas: list[dict], allergen_ids: list[int]) -> dict[str, np.ndarray]:
+    """메타데이터 → NumPy 인덱스 행별 속성 배열 (알러지는 (N, 항원 수) bool 행렬)"""
+    return {
+        'vegetarian': np.array([m['vegetarian'] for m in metadatas], dtype=bool),
+        'vegan': np.array([m['vegan'] for m in metadatas], dtype=bool),
+        'kcal': np.array([m.get('kcal', np.nan) for m in metadatas], dtype=np.float32),
+        'allergens': np.array(
+            [[m[f'allergen_{a}'] for a in allergen_ids] for m in metadatas], dtype=bool
+        ).reshape(len(metadatas), len(allergen_ids)),
+        'doc_hash': np.array([m['doc_hash'] for m in metadatas], dtype='S32'),
+    }
+
+
+class Encoder:
+    """
+    문서 임베딩. workers > 1이면 SentenceTransformer 멀티프로세스 풀(CPU 코어별 프로세스)을 사용합니다.
+    결과는 NumPy 배열 그대로 전달합니다. (리스트 변환 없음)
+    """
+
+    def __init__(self, workers: int = 1, batch_size: int = 64):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.model = None
+        self.pool = None
+
+    def encode(self, documents: list[str]) -> np.ndarray:
+        # 모델/프로세스 풀은 실제로 인코딩할 문서가 있을 때 처음 준비 (변경 없는 동기화는 모델 로드 없음)
+        if self.model is None:
+            self.model = get_embedding_model()
+            if self.workers > 1:
+                self.pool = self.model.start_multi_process_pool(target_devices=['cpu'] * self.workers)
+        if self.pool is not None:
+            return self.model.encode_multi_process(documents, self.pool, batch_size=self.batch_size)
+        return self.model.encode(documents, batch_size=self.batch_size, convert_to_numpy=True)
+
+    def close(self):
+        if self.pool is not None:
+            self.model.stop_multi_process_pool(self.pool)
+            self.pool = None
+
+
+def _chroma_state(collection) -> dict[str, tuple[str | None, str]]:
+    """ChromaDB에 저장된 {id: (doc_hash, 메타데이터 digest)} (페이지 단위로 읽음)"""
+    state = {}
+    offset = 0
+    while True:
+        page = collection.get(include=['metadatas'], limit=CHROMA_PAGE_SIZE, offset=offset)
+        if not page['ids']:
+            return state
+        for food_id, metadata in zip(page['ids'], page['metadatas']):
+            metadata = metadata or {}
+            state[food_id] = (metadata.get('doc_hash'), _metadata_digest(metadata))
+        offset += len(page['ids'])
+
+
+def _existing_numpy_index(directory: str) -> NumpyVectorIndex | None:
+    """재사용 가능한 기존 NumPy 인덱스 (없거나 모델/형식이 다르면 None)"""
+    try:
+        index = NumpyVectorIndex(directory)
+    except FileNotFoundError:
+        return None
+    if index.meta.get('model') != EMBEDDING_MODEL_NAME or 'doc_hash' not in index.attributes:
+        return None
+    return index
+
+
+_sync_lock = threading.Lock()
+
+
+def sync_vector_index(
+    backends=('chroma',),
+    full: bool = False,
+    dtype: str | None = None,
+    ivf_lists: int | None = None,
+    workers: int | None = None,
+    progress=None,
+) -> SyncResult:
+    """
+    DB의 Food 전체와 벡터 인덱스를 동기화합니다.
+    생산자(메인 스레드: DB 조회 + 문서 생성)와 소비자(인코딩 + 저장 스레드)가 길이 PIPELINE_DEPTH의
+    대기열로 연결되어, 카탈로그 크기와 관계없이 메모리에는 청크 몇 개만 올라갑니다.
+
+    :param backends: 'chroma', 'numpy' 중 동기화할 백엔드
+    :param full: True면 모든 문서를 다시 임베딩
+    :param workers: 인코딩 프로세스 수 (기본값 settings.VECTOR_INDEX_WORKERS)
+    :param progress: 처리한 음식 수를 받는 콜백 (진행률 표시용)
+    """
+    # 같은 프로세스 안에서는 한 번에 하나만 (명령어 실행 중 시그널로 예약된 동기화 등)
+    with _sync_lock:
+        return _sync_vector_index(backends, full, dtype, ivf_lists, workers, progress)
+
+
+def _sync_vector_index(backends, full, dtype, ivf_lists, workers, progress) -> SyncResult:
+    start = time.perf_counter()
+    result = SyncResult()
+    allergen_ids = list(Allergen.objects.order_by('id').values_list('id', flat=True))
+    seen_ids: set[int] = set()
+
+    collection = chroma_state = None
+    if 'chroma' in backends:
+        collection = get_chroma_collection()
+        chroma_state = _chroma_state(collection)
+
+    writer = old_index = None
+    old_rows: dict[int, int] = {}
+    if 'numpy' in backends:
+        writer = IndexWriter(settings.VECTOR_INDEX_DIR, dtype or settings.VECTOR_INDEX_DTYPE)
+        old_index = None if full else _existing_numpy_index(settings.VECTOR_INDEX_DIR)
+        if old_index is not None:
+            old_rows = {int(food_id): row for row, food_id in enumerate(old_index.ids)}
+
+    encoder = Encoder(workers or settings.VECTOR_INDEX_WORKERS, settings.VECTOR_ENCODE_BATCH_SIZE)
+
+    def process(chunk: list[IndexEntry]):
+        """청크 1개: 바뀐 문서만 인코딩 → 백엔드별 저장"""
+        to_embed, chroma_upserts, chroma_metadata_only = [], [], []
+        for entry in chunk:
+            doc_hash = entry.metadata['doc_hash']
+            embed = False
+            if chroma_state is not None:
+                old = chroma_state.get(str(entry.food_id))
+                if full or old is None or old[0] != doc_hash:
+                    chroma_upserts.append(entry)
+                    embed = True
+                elif old[1] != _metadata_digest(entry.metadata):
+                    chroma_metadata_only.append(entry)
+            if writer is not None:
+                row = old_rows.get(entry.food_id)
+                if row is None or old_index.attributes['doc_hash'][row].decode() != doc_hash:
+                    embed = True
+            if embed:
+                to_embed.append(entry)
+
+        embeddings = {}
+        if to_embed:
+            encode_start = time.perf_counter()
+            vectors = encoder.encode([entry.document for entry in to_embed])
+            result.encode_seconds += time.perf_counter() - encode_start
+            embeddings = dict(zip((entry.food_id for entry in to_embed), vectors))
+
+        if chroma_upserts:
+            collection.upsert(
+                ids=[str(entry.food_id) for entry in chroma_upserts],
+                embeddings=np.stack([embeddings[entry.food_id] for entry in chroma_upserts]),
+                documents=[entry.document for entry in chroma_upserts],
+                metadatas=[entry.metadata for entry in chroma_upserts],
+            )
+        if chroma_metadata_only:
+            collection.update(
+                ids=[str(entry.food_id) for entry in chroma_metadata_only],
+                metadatas=[entry.metadata for entry in chroma_metadata_only],
+            )
+
+        # NumPy: 바뀌지 않은 행은 기존 인덱스의 벡터를 재사용 (메타데이터는 항상 최신으로)
+        if writer is not None:
+            vectors = np.stack([
+                embeddings[entry.food_id] if entry.food_id in embeddings
+                else np.asarray(old_index.embeddings[old_rows[entry.food_id]], dtype=np.float32)
+                for entry in chunk
+            ])
+            writer.append(
+                [entry.food_id for entry in chunk],
+                vectors,
+                numpy_attributes([entry.metadata for entry in chunk], allergen_ids),
+            )
+
+        result.embedded += len(to_embed)
+        result.metadata_updated += len(chroma_metadata_only)
+        if progress:
+            progress(len(chunk))
+
+    # 소비자 스레드: 인코딩/저장 (DB는 생산자인 메인 스레드에서만 사용)
+    chunks: queue.Queue = queue.Queue(maxsize=PIPELINE_DEPTH)
+    errors: list[BaseException] = []
+
+    def consume():
+        while (chunk := chunks.get()) is not None:
+            if errors:
+                continue  # 오류 이후에는 생산자가 막히지 않도록 비우기만 함
+            try:
+                process(chunk)
+            except BaseException as e:
+                errors.append(e)
+
+    consumer = threading.Thread(target=consume, name="vector-index-encoder", daemon=True)
+    consumer.start()
+    try:
+        for chunk in iter_entry_chunks(allergen_ids):
+            if errors:
+                break
+            seen_ids.update(entry.food_id for entry in chunk)
+            result.total += len(chunk)
+            chunks.put(chunk)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        chunks.put(None)
+        consumer.join()
+        encoder.close()
+    if errors:
+        if writer is not None:
+            writer.abort()
+        raise errors[0]
+
+    # 삭제된 음식 정리 + 마무리
+    if collection is not None:
+        removed = [food_id for food_id in chroma_state if int(food_id) not in seen_ids]
+        if removed:
+            collection.delete(ids=removed)
+        # 필터에서 allergen_<id> 플래그가 있는 항원 (이후 추가된 항원은 검색 시 RDB로 확인)
+        collection.modify(metadata={**(collection.metadata or {}), 'allergen_ids': ','.join(map(str, allergen_ids))})
+        result.deleted = len(removed)
+
+    if writer is not None:
+        writer.finish(
+            ivf_lists=settings.VECTOR_IVF_LISTS if ivf_lists is None else ivf_lists,
+            model_name=EMBEDDING_MODEL_NAME,
+            extra_meta={'allergen_ids': allergen_ids},
+        )
+        if collection is None:
+            result.deleted = len(old_rows.keys() - seen_ids)
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+# --- Food 변경 시그널 → 백그라운드 증분 동기화 ---
+_reindex_requested = threading.Event()
+_reindex_thread: threading.Thread | None = None
+_reindex_thread_lock = threading.Lock()
+
+
+def _reindex_worker():
+    while True:
+        _reindex_requested.wait()
+        # 연속된 변경(관리자 화면 일괄 수정 등)을 모아서 한 번에 처리
+        time.sleep(settings.VECTOR_REINDEX_DEBOUNCE)
+        _reindex_requested.clear()
+        try:
+            result = sync_vector_index(backends=(settings.VECTOR_BACKEND,))
+            logger.info(
+                "vector index synced: embedded=%d metadata=%d deleted=%d (%.2fs)",
+                result.embedded, result.metadata_updated, result.deleted, result.seconds,
+            )
+        except Exception:
+            logger.exception("vector index sync failed")
+        finally:
+            connections.close_all()  # 이 스레드의 DB 연결 정리
+
+
+def schedule_reindex():
+    """벡터 인덱스 동기화 예약 (워커 스레드는 처음 호출될 때 시작)"""
+    global _reindex_thread
+    with _reindex_thread_lock:
+        if _reindex_thread is None:
+            _reindex_thread = threading.Thread(target=_reindex_worker, name="vector-reindex", daemon=True)
+            _reindex_thread.start()
+    _reindex_requested.set()
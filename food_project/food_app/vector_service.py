@@ -1,9 +1,18 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
+from dataclasses import dataclass
 from typing import List
+import logging
 import os
+import threading
+import time
+import unicodedata
+
+import numpy as np
 from django.conf import settings # Import Django settings
+from food_app.caching import LRUTTLCache
 from food_app.models import Food 
+from food_app.vector_index import get_numpy_index
+
+logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 # 프로젝트 루트에 'chroma_db_data'라는 이름으로 절대 경로를 지정합니다.
@@ -19,6 +28,12 @@ _embedding_model = None
 _chroma_client = None
 _collection = None
 
+# 쿼리 임베딩 캐시: 정규화된 쿼리 텍스트 → float32 벡터 (읽기 전용)
+# 임베딩 모델 forward가 추천 API에서 가장 큰 CPU 비용이므로 같은 문장은 다시 계산하지 않습니다.
+_query_embedding_cache = LRUTTLCache(settings.QUERY_EMBEDDING_CACHE_MAX_ENTRIES, settings.QUERY_EMBEDDING_CACHE_TTL)
+_encode_stats_lock = threading.Lock()
+_encode_stats = {"calls": 0, "texts": 0, "seconds": 0.0}
+
 
 def create_document_from_food(food: Food) -> str:
     """
@@ -41,6 +56,133 @@ def create_document_from_food(food: Food) -> str:
     return document
 
 
+# --- 식단 판별용 재료 키워드 (주요_재료 문자열에 포함되면 해당) ---
+# 재료 데이터가 자유 형식이므로 보수적으로 판단합니다. ("소고기 또는 다시마 육수" → 채식 아님)
+MEAT_SEAFOOD_KEYWORDS = (
+    "고기", "쇠고기", "소고기", "돼지", "닭", "오리", "햄", "베이컨", "소시지", "스팸", "다짐육", "육포",
+    "갈비", "삼겹", "목살", "차돌", "양지", "사태", "곱창", "막창", "족발", "순대", "선지", "사골", "불고기", "제육",
+    "생선", "멸치", "새우", "오징어", "문어", "낙지", "주꾸미", "쭈꾸미", "조개", "바지락", "홍합", "굴", "전복",
+    "게", "맛살", "어묵", "참치", "연어", "고등어", "꽁치", "갈치", "조기", "명태", "동태", "황태", "북어", "코다리",
+    "대구", "장어", "명란", "젓", "액젓", "해물", "해산물", "멍게", "미더덕", "가리비", "꼬막", "미꾸라지", "홍어",
+    "가쓰오", "페퍼로니", "살라미", "육수", "김치",  # 김치는 대부분 젓갈이 들어감
+)
+ANIMAL_PRODUCT_KEYWORDS = (
+    "계란", "달걀", "메추리알", "우유", "치즈", "버터", "크림", "요거트", "요구르트", "연유", "꿀", "마요네즈",
+)
+
+
+def diet_flags(ingredients: List[str]) -> tuple[bool, bool]:
+    """주요 재료 목록 → (채식 가능, 비건 가능)"""
+    text = " ".join(ingredients)
+    vegetarian = bool(ingredients) and not any(keyword in text for keyword in MEAT_SEAFOOD_KEYWORDS)
+    vegan = vegetarian and not any(keyword in text for keyword in ANIMAL_PRODUCT_KEYWORDS)
+    return vegetarian, vegan
+
+
+def create_metadata_from_food(food: Food, allergen_ids: List[int]) -> dict:
+    """
+    검색 필터용 메타데이터 (ChromaDB 메타데이터는 스칼라 값만 허용)
+    allergen_ids: 인덱싱 시점의 전체 알러지 항원 ID. 항원마다 allergen_<id> 플래그를 둡니다.
+    food.allergens는 prefetch_related('allergens')로 미리 가져와 주세요.
+    """
+    vegetarian, vegan = diet_flags(food.main_ingredients)
+    food_allergen_ids = {allergen.id for allergen in food.allergens.all()}
+    metadata = {
+        'name': food.representative_name,
+        'food_id': food.id,
+        'vegetarian': vegetarian,
+        'vegan': vegan,
+        **{f'allergen_{allergen_id}': allergen_id in food_allergen_ids for allergen_id in allergen_ids},
+    }
+    if food.energy_kcal is not None:
+        metadata['kcal'] = float(food.energy_kcal)
+    return metadata
+
+
+@dataclass(frozen=True)
+class FoodFilters:
+    """유사 음식 검색 조건 (벡터 검색 단계에서 적용)"""
+    exclude_allergen_ids: frozenset = frozenset()
+    exclude_food_ids: frozenset = frozenset()
+    vegetarian: bool = False
+    vegan: bool = False
+    min_kcal: float | None = None    # 100g당 kcal 범위 (값이 없는 음식은 범위 조건이 있으면 제외)
+    max_kcal: float | None = None
+
+    @classmethod
+    def for_profile(cls, profile, exclude_food_ids=()) -> "FoodFilters":
+        return cls(
+            exclude_allergen_ids=frozenset(allergen.id for allergen in profile.allergies.all()),
+            exclude_food_ids=frozenset(exclude_food_ids),
+            vegetarian=profile.is_vegetarian,
+            vegan=profile.is_vegan,
+        )
+
+
+def _allergen_food_ids(allergen_ids) -> set[int]:
+    """인덱스에 플래그가 없는(인덱싱 이후 추가된) 알러지 항원 → 해당 음식 ID (RDB 조회)"""
+    if not allergen_ids:
+        return set()
+    return set(
+        Food.allergens.through.objects.filter(allergen_id__in=allergen_ids).values_list('food_id', flat=True)
+    )
+
+
+def _numpy_filter_mask(index, filters: FoodFilters | None):
+    """NumPy 인덱스 행 마스크 (True = 허용). 조건이 없으면 None"""
+    if filters is None or filters == FoodFilters():
+        return None
+    attributes = index.attributes
+    if not {"vegetarian", "vegan", "kcal", "allergens"} <= attributes.keys():
+        raise RuntimeError("NumPy 벡터 인덱스에 필터용 속성이 없습니다. index_food_vectors를 다시 실행해주세요.")
+    mask = np.ones(len(index), dtype=bool)
+
+    indexed_allergens = index.meta.get("allergen_ids", [])
+    columns = [indexed_allergens.index(a) for a in filters.exclude_allergen_ids if a in indexed_allergens]
+    if columns:
+        mask &= ~attributes["allergens"][:, columns].any(axis=1)
+    exclude_ids = set(filters.exclude_food_ids)
+    exclude_ids |= _allergen_food_ids([a for a in filters.exclude_allergen_ids if a not in indexed_allergens])
+    if exclude_ids:
+        mask &= ~np.isin(index.ids, list(exclude_ids))
+
+    if filters.vegetarian:
+        mask &= attributes["vegetarian"]
+    if filters.vegan:
+        mask &= attributes["vegan"]
+    kcal = attributes["kcal"]  # 값이 없으면 NaN → 비교 결과 False
+    if filters.min_kcal is not None:
+        mask &= kcal >= filters.min_kcal
+    if filters.max_kcal is not None:
+        mask &= kcal <= filters.max_kcal
+    return mask
+
+
+def _chroma_where(collection, filters: FoodFilters | None) -> dict | None:
+    """ChromaDB where 절 (조건이 없으면 None)"""
+    if filters is None:
+        return None
+    indexed_allergens = {
+        int(allergen_id) for allergen_id in (collection.metadata or {}).get('allergen_ids', '').split(',') if allergen_id
+    }
+    clauses = [{f'allergen_{a}': False} for a in sorted(filters.exclude_allergen_ids) if a in indexed_allergens]
+    exclude_ids = set(filters.exclude_food_ids)
+    exclude_ids |= _allergen_food_ids([a for a in filters.exclude_allergen_ids if a not in indexed_allergens])
+    if exclude_ids:
+        clauses.append({'food_id': {'$nin': sorted(exclude_ids)}})
+    if filters.vegetarian:
+        clauses.append({'vegetarian': True})
+    if filters.vegan:
+        clauses.append({'vegan': True})
+    if filters.min_kcal is not None:
+        clauses.append({'kcal': {'$gte': filters.min_kcal}})
+    if filters.max_kcal is not None:
+        clauses.append({'kcal': {'$lte': filters.max_kcal}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
 def get_embedding_model():
     """
     SentenceTransformer 임베딩 모델을 로드하고 반환합니다.
@@ -48,9 +190,12 @@ def get_embedding_model():
     """
     global _embedding_model
     if _embedding_model is None:
-        print(f"임베딩 모델 '{EMBEDDING_MODEL_NAME}'을 CPU로 로드합니다... (최초 실행 시 시간이 걸릴 수 있습니다)")
+        # sentence_transformers(torch) import는 무거우므로 실제로 필요할 때 수행
+        from sentence_transformers import SentenceTransformer
+
+        logger.info("임베딩 모델 '%s'을 CPU로 로드합니다... (최초 실행 시 시간이 걸릴 수 있습니다)", EMBEDDING_MODEL_NAME)
         _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME, device='cpu')
-        print("임베딩 모델 로드 완료.")
+        logger.info("임베딩 모델 로드 완료.")
     return _embedding_model
 
 def get_chroma_collection():
@@ -60,10 +205,12 @@ def get_chroma_collection():
     """
     global _chroma_client, _collection
     if _collection is None:
+        import chromadb
+
         if not os.path.exists(CHROMA_PERSIST_DIRECTORY):
             os.makedirs(CHROMA_PERSIST_DIRECTORY)
         
-        print(f"ChromaDB를 '{CHROMA_PERSIST_DIRECTORY}' 경로에서 로드/생성합니다.")
+        logger.info("ChromaDB를 '%s' 경로에서 로드/생성합니다.", CHROMA_PERSIST_DIRECTORY)
         # 데이터를 디스크에 저장하는 PersistentClient 사용
         _chroma_client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIRECTORY)
         
@@ -71,40 +218,161 @@ def get_chroma_collection():
         # model = get_embedding_model()
         # embedding_function = chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL_NAME)
 
-        print(f"컬렉션 '{COLLECTION_NAME}'을 가져옵니다/생성합니다.")
+        logger.info("컬렉션 '%s'을 가져옵니다/생성합니다.", COLLECTION_NAME)
         _collection = _chroma_client.get_or_create_collection(
             name=COLLECTION_NAME,
             # embedding_function=embedding_function # embedding_function을 지정하면 upsert 시 자동으로 텍스트를 벡터로 변환해줍니다.
         )
-        print("ChromaDB 컬렉션 준비 완료.")
+        logger.info("ChromaDB 컬렉션 준비 완료.")
     return _collection
 
 
-def query_similar_foods(query_text: str, n_results: int = 5) -> List[int]:
+def normalize_query(query_text: str) -> str:
+    """캐시 키용 쿼리 정규화 (유니코드 NFC + 연속 공백 정리)"""
+    return " ".join(unicodedata.normalize("NFC", query_text).split())
+
+
+def encode_queries(query_texts: List[str]) -> List[np.ndarray]:
+    """
+    쿼리 텍스트 목록 → 임베딩 벡터 목록 (인덱싱 때와 같은 모델/설정)
+    캐시에 없는 쿼리만 모아서 한 번의 forward로 인코딩합니다.
+    """
+    keys = [normalize_query(text) for text in query_texts]
+    embeddings = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        cached = _query_embedding_cache.get(key)
+        if cached is None:
+            missing.append(key)
+        else:
+            embeddings[key] = cached
+
+    if missing:
+        start = time.perf_counter()
+        encoded = get_embedding_model().encode(missing, batch_size=len(missing), convert_to_numpy=True)
+        elapsed = time.perf_counter() - start
+        with _encode_stats_lock:
+            _encode_stats["calls"] += 1
+            _encode_stats["texts"] += len(missing)
+            _encode_stats["seconds"] += elapsed
+
+        for key, embedding in zip(missing, encoded):
+            embedding = np.array(embedding, dtype=np.float32)
+            embedding.setflags(write=False)  # 캐시에 공유되는 배열이므로 수정 금지
+            _query_embedding_cache.set(key, embedding)
+            embeddings[key] = embedding
+
+    return [embeddings[key] for key in keys]
+
+
+def encode_query(query_text: str) -> np.ndarray:
+    """쿼리 텍스트 → 임베딩 벡터 (캐시 사용)"""
+    return encode_queries([query_text])[0]
+
+
+def embedding_cache_stats() -> dict:
+    """쿼리 임베딩 캐시 적중률/메모리 사용량과 인코딩 횟수/시간"""
+    stats = _query_embedding_cache.stats()
+    stats["memory_bytes"] = sum(embedding.nbytes for _, embedding in _query_embedding_cache.items())
+    with _encode_stats_lock:
+        calls, texts, seconds = _encode_stats["calls"], _encode_stats["texts"], _encode_stats["seconds"]
+    stats.update({
+        "encode_calls": calls,
+        "encoded_texts": texts,
+        "avg_encode_ms": round(seconds / calls * 1000, 2) if calls else 0.0,
+    })
+    return stats
+
+
+def _query_collection(
+    query_embeddings: List[np.ndarray], n_results: int, filters: FoodFilters | None = None
+) -> List[List[tuple[int, float]]]:
+    """
+    설정된 벡터 백엔드(settings.VECTOR_BACKEND)에서 쿼리별 유사 음식 검색
+    :return: 쿼리별 [(음식 ID, 점수), ...] (점수 내림차순, 점수가 클수록 유사)
+    """
+    backend = settings.VECTOR_BACKEND
+    if backend == "numpy":
+        index = get_numpy_index(settings.VECTOR_INDEX_DIR, settings.VECTOR_IVF_NPROBE)
+        mask = _numpy_filter_mask(index, filters)
+        return [list(zip(food_ids, scores)) for food_ids, scores in index.search(query_embeddings, n_results, mask=mask)]
+    if backend != "chroma":
+        raise ValueError(f"알 수 없는 VECTOR_BACKEND 값입니다: {backend}")
+
+    collection = get_chroma_collection()
+
+    # ChromaDB에 쿼리 실행 (여러 벡터를 한 번에, 필터는 where 절로)
+    results = collection.query(
+        query_embeddings=[np.asarray(embedding).tolist() for embedding in query_embeddings],
+        n_results=n_results,
+        where=_chroma_where(collection, filters),
+        include=['distances'],
+    )
+
+    # 결과에서 음식 ID (문자열로 저장됨)를 정수로, 거리는 점수로 변환
+    # (cosine 공간이면 1 - 거리 = 코사인 유사도, 기본 l2 공간이면 -거리)
+    cosine = (collection.metadata or {}).get('hnsw:space') == 'cosine'
+    return [
+        [(int(id), 1.0 - distance if cosine else -distance) for id, distance in zip(ids, distances)]
+        for ids, distances in zip(results['ids'], results['distances'])
+    ]
+
+
+def search_similar_foods(
+    query_text: str,
+    n_results: int = 5,
+    filters: FoodFilters | None = None,
+    query_embedding: np.ndarray | None = None,
+) -> List[tuple[int, float]]:
+    """
+    조건(filters)을 만족하는 음식 중 주어진 텍스트와 의미적으로 유사한 순서대로 반환합니다.
+
+    :param query_text: 사용자 쿼리 (예: "얼큰하고 시원한 국물 요리")
+    :param n_results: 반환할 결과의 수 (조건을 만족하는 음식이 적으면 더 적을 수 있음)
+    :param filters: 알러지/비선호 음식/채식/칼로리 조건
+    :param query_embedding: 이미 계산한 쿼리 임베딩 (없으면 여기서 계산)
+    :return: [(음식 ID, 점수), ...] 유사도 내림차순
+    """
+    # 쿼리 텍스트를 벡터로 변환
+    if query_embedding is None:
+        query_embedding = encode_query(query_text)
+
+    ranked = _query_collection([query_embedding], n_results, filters)[0]
+
+    logger.debug("'%s'와 유사한 음식 ID 검색 결과: %s", query_text, [food_id for food_id, _ in ranked])
+    return ranked
+
+
+def query_similar_foods(
+    query_text: str,
+    n_results: int = 5,
+    query_embedding: np.ndarray | None = None,
+    filters: FoodFilters | None = None,
+) -> List[int]:
     """
     주어진 텍스트와 의미적으로 유사한 음식의 ID 목록을 반환합니다.
 
     :param query_text: 사용자 쿼리 (예: "얼큰하고 시원한 국물 요리")
     :param n_results: 반환할 결과의 수
-    :return: 유사한 음식의 ID 리스트 (예: [101, 25, 432])
+    :param query_embedding: 이미 계산한 쿼리 임베딩 (없으면 여기서 계산)
+    :param filters: 검색 조건 (search_similar_foods 참고)
+    :return: 유사한 음식의 ID 리스트 (예: [101, 25, 432]), 유사도 순
     """
-    collection = get_chroma_collection()
-    model = get_embedding_model()
+    return [food_id for food_id, _ in search_similar_foods(query_text, n_results, filters, query_embedding)]
 
-    # 쿼리 텍스트를 벡터로 변환
-    query_embedding = model.encode(query_text).tolist()
 
-    # ChromaDB에 쿼리 실행
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=n_results
-    )
+def query_similar_foods_batch(
+    query_texts: List[str], n_results: int = 5, filters: FoodFilters | None = None
+) -> List[List[int]]:
+    """
+    여러 쿼리를 한 번에 검색합니다. (인코딩 1회 + 컬렉션 쿼리 1회)
 
-    # 결과에서 음식 ID (문자열로 저장됨)를 추출하여 정수 리스트로 변환
-    food_ids = [int(id) for id in results['ids'][0]]
-    
-    print(f"'{query_text}'와 유사한 음식 ID 검색 결과: {food_ids}")
-    return food_ids
+    :return: 쿼리 순서대로 유사한 음식 ID 리스트의 리스트
+    """
+    if not query_texts:
+        return []
+    results = _query_collection(encode_queries(query_texts), n_results, filters)
+    return [[food_id for food_id, _ in ranked] for ranked in results]
 
 # 이 파일이 직접 실행될 때 테스트용으로 사용할 수 있습니다.
 if __name__ == '__main__':
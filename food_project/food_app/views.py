@@ -1,13 +1,10 @@
 # food_app/views.py
-import os
+import logging
 import re
-import pandas as pd
-import torch
-from PIL import Image
-import json
-from openai import OpenAI
+import sys
+from typing import NamedTuple
 
-from django.conf import settings
+from asgiref.sync import sync_to_async
 from rest_framework.decorators import api_view, parser_classes, permission_classes, authentication_classes
 from rest_framework.permissions import AllowAny
 from django.contrib.auth import login
@@ -15,24 +12,30 @@ from rest_framework.permissions import IsAuthenticated
 
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse
 from rest_framework import status
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from transformers import AutoImageProcessor, AutoModelForImageClassification
+from rest_framework.parsers import JSONParser
 
 # --- Model and Service Imports ---
-from .models import UserProfile, Food, UserFoodPreference, Allergen
+from .models import NUTRIENT_FIELDS, UserProfile, Food, UserFoodPreference, Allergen
 from .serializers import UserProfileSerializer, AllergenSerializer, UserFoodPreferenceSerializer
-from .models import Meal
-from .serializers import MealSerializer
-from .vector_service import query_similar_foods
+from .nutrition import GRANULARITIES, aget_daily_summary, nutrition_totals
+from .vector_service import FoodFilters, embedding_cache_stats, encode_query, search_similar_foods
+from . import food_index, search_index
+from .search_index import search_foods
+from .result_cache import prediction_cache
+from .recommendation_cache import RecommendationKey, recommendation_cache, user_fingerprint, make_key as make_recommendation_key
+from .tracing import render_metrics, span
 
 #Auth
 from django.contrib.auth import authenticate, login, logout
 from django.utils import timezone
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from django.contrib.auth.models import User
 from .serializers import UserSerializer
 
+logger = logging.getLogger(__name__)
+
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated]) # Changed to IsAuthenticated to prevent spam
 def allergen_list_view(request):
@@ -72,113 +75,117 @@ def allergen_delete_view(request, pk):
 # ============================================
 # NEW: RAG 기반 메뉴 추천 API
 # ============================================
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def recommend_menu_view(request):
-    """
-    RAG 기반으로 사용자에게 메뉴를 추천합니다. (고도화 버전)
-    오늘의 섭취량을 분석하여 프롬프트에 포함합니다.
-    """
-    user = request.user
-    query_text = request.data.get("query")
+NO_CANDIDATES_MESSAGE = "관련된 음식을 찾지 못했습니다. 다른 표현으로 질문해주세요."
+RECOMMENDATION_MODEL = "gpt-4.1-mini"
+# LLM에 전달할 후보 음식 수 (조건에 맞는 유사도 상위 N개)
+RECOMMENDATION_CANDIDATES = 5
+RECOMMENDATION_SYSTEM_PROMPT = "당신은 사용자의 영양 상태와 요청을 분석하여 개인화된 메뉴를 추천하는 최고의 영양사입니다."
 
-    if not query_text:
-        return Response({"detail": "'query'는 필수 항목입니다."}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        # 1. 사용자 정보 및 제약 조건 조회 (RDB)
-        profile = UserProfile.objects.get(user=user)
-        user_allergies = profile.allergies.all()
-        disliked_food_prefs = UserFoodPreference.objects.filter(user_profile=profile, preference='DISLIKE')
-        liked_food_prefs = UserFoodPreference.objects.filter(user_profile=profile, preference='LIKE') # NEW
-        disliked_food_ids = [pref.food.id for pref in disliked_food_prefs]
-
-        # --- NEW: 오늘의 섭취량 계산 ---
-        today = timezone.now().date()
-        todays_meals = Meal.objects.filter(user=user, created_at__date=today).prefetch_related('items__food')
-        
-        total_kcal = 0
-        total_carbs = 0
-        total_protein = 0
-        total_fat = 0
-
-        for meal in todays_meals:
-            for item in meal.items.all():
-                ratio = item.weight_g / 100.0
-                if item.food:
-                    total_kcal += (item.food.energy_kcal or 0) * ratio
-                    total_carbs += (item.food.carbohydrate_g or 0) * ratio
-                    total_protein += (item.food.protein_g or 0) * ratio
-                    total_fat += (item.food.fat_g or 0) * ratio
-        
-        # 영양소 총합 및 비율 계산
-        total_macros = total_carbs + total_protein + total_fat
-        carb_percent = int((total_carbs / total_macros) * 100) if total_macros > 0 else 0
-        protein_percent = int((total_protein / total_macros) * 100) if total_macros > 0 else 0
-        fat_percent = 100 - carb_percent - protein_percent if total_macros > 0 else 0
-
-        nutrition_summary = {
-            "total_kcal": round(total_kcal),
-            "recommended_kcal": profile.get_recommended_kcal(),
-            "carb_percent": carb_percent,
-            "protein_percent": protein_percent,
-            "fat_percent": fat_percent
-        }
-        # --- 계산 완료 ---
+def recommendation_messages(prompt: str) -> list[dict]:
+    return [
+        {"role": "system", "content": RECOMMENDATION_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
 
-        # 2. 유사 음식 검색 (Vector DB)
-        candidate_food_ids = query_similar_foods(query_text, n_results=20)
-        if not candidate_food_ids:
-             return Response({"recommendation": "관련된 음식을 찾지 못했습니다. 다른 표현으로 질문해주세요."})
 
-        # 3. 후보 상세 정보 조회 (RDB) - 필터링은 LLM에 위임
-        candidates = Food.objects.filter(id__in=candidate_food_ids)
-        
-        # LLM에 전달할 최종 후보 (상위 5개)
-        final_candidates_for_llm = list(candidates[:5]) 
-
-        if not final_candidates_for_llm:
-            return Response({"recommendation": "관련된 음식을 찾지 못했습니다. 다른 표현으로 질문해주세요."})
-
-        # 4. LLM 프롬프트 구성 및 생성 (영양 정보 요약, 알러지, 비선호 음식 전달)
-        # build_recommendation_prompt 함수가 user_allergies와 disliked_food_prefs를 받도록 수정
-        prompt = build_recommendation_prompt(
-            user, 
-            profile, 
-            query_text, 
-            final_candidates_for_llm, 
-                        nutrition_summary,
-                        user_allergies,
-                        disliked_food_prefs,
-                        liked_food_prefs # NEW: Pass liked_food_prefs
-                    )        
-        # --- 디버그 용: 생성된 프롬프트 출력 ---
-        print("--- LLM Prompt Start ---")
-        print(prompt)
-        print("--- LLM Prompt End ---")
-        # -------------------------------------
-        
-        try:
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
-            completion = client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[
-                    {"role": "system", "content": "당신은 사용자의 영양 상태와 요청을 분석하여 개인화된 메뉴를 추천하는 최고의 영양사입니다."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-            )
-            recommendation = completion.choices[0].message.content
-        except Exception as e:
-            return Response({"detail": f"OpenAI API 호출 중 오류 발생: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        # 5. 결과 반환
-        return Response({"recommendation": recommendation})
-
-    except UserProfile.DoesNotExist:
-        return Response({"detail": "사용자 프로필을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        return Response({"detail": f"추천 생성 중 알 수 없는 오류 발생: {e}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+class PreparedRecommendation(NamedTuple):
+    prompt: str | None                      # None이면 후보 음식 없음 또는 캐시 적중
+    cache_key: RecommendationKey | None     # LLM 응답을 캐시에 저장할 때 사용
+    cached: str | None = None               # 캐시 적중 시 이전 추천 문장
+
+
+async def aprepare_recommendation(user, query_text: str) -> PreparedRecommendation:
+    """
+    사용자 정보/오늘의 섭취량(RDB) + 유사 음식 검색(Vector DB) → LLM 프롬프트
+    같은 사용자 상태에서 비슷한 요청을 이미 처리했다면 프롬프트 대신 캐시된 추천을 반환합니다.
+    (프로필이 없으면 UserProfile.DoesNotExist)
+    일반 추천 API와 스트리밍 추천 API(async_views)가 함께 사용합니다.
+    ORM은 async API로, 임베딩 계산은 이벤트 루프 밖의 스레드에서 실행합니다.
+    """
+    # 1. 사용자 정보 및 제약 조건 조회 (RDB) - 선호도 수와 관계없이 고정된 쿼리 수
+    profile = await UserProfile.objects.prefetch_related('allergies').aget(user=user)
+    user_allergies = list(profile.allergies.all())
+    preferences = UserFoodPreference.objects.filter(user_profile=profile).select_related('food')
+    disliked_food_prefs, liked_food_prefs = [], []
+    async for pref in preferences:
+        (liked_food_prefs if pref.preference == 'LIKE' else disliked_food_prefs).append(pref)
+    disliked_food_ids = [pref.food_id for pref in disliked_food_prefs]
+
+    # --- 오늘의 섭취량: 식사 저장 시 갱신되는 일별 합계 (행 하나 조회) ---
+    today_summary = await aget_daily_summary(user)
+    total_kcal = today_summary.total_kcal
+    total_carbs = today_summary.total_carbohydrate_g
+    total_protein = today_summary.total_protein_g
+    total_fat = today_summary.total_fat_g
+
+    # 영양소 총합 및 비율 계산
+    total_macros = total_carbs + total_protein + total_fat
+    carb_percent = int((total_carbs / total_macros) * 100) if total_macros > 0 else 0
+    protein_percent = int((total_protein / total_macros) * 100) if total_macros > 0 else 0
+    fat_percent = 100 - carb_percent - protein_percent if total_macros > 0 else 0
+
+    nutrition_summary = {
+        "total_kcal": round(total_kcal),
+        "recommended_kcal": profile.get_recommended_kcal(),
+        "carb_percent": carb_percent,
+        "protein_percent": protein_percent,
+        "fat_percent": fat_percent
+    }
+    # --- 계산 완료 ---
+
+    # 2. 유사 음식 검색 (Vector DB) - 알러지/비선호/채식 조건은 검색 단계에서 제외
+    # 쿼리 임베딩은 캐시 키에도 사용. 임베딩은 DB를 쓰지 않으므로 요청 스레드와 무관한 스레드에서 계산
+    with span("embed"):
+        query_embedding = await sync_to_async(encode_query, thread_sensitive=False)(query_text)
+    filters = FoodFilters.for_profile(profile, exclude_food_ids=disliked_food_ids)
+    # 인덱스에 없는 알러지 조건은 RDB를 조회하므로 검색은 thread_sensitive(기본값)로 실행
+    with span("vector_search"):
+        ranked = await sync_to_async(search_similar_foods)(
+            query_text, n_results=RECOMMENDATION_CANDIDATES, filters=filters, query_embedding=query_embedding
+        )
+    if not ranked:
+        return PreparedRecommendation(None, None)
+
+    # 3. 후보 상세 정보 조회 (RDB) - 유사도 순서 유지
+    foods_by_id = await Food.objects.prefetch_related('allergens').ain_bulk([food_id for food_id, _ in ranked])
+    final_candidates_for_llm = [foods_by_id[food_id] for food_id, _ in ranked if food_id in foods_by_id]
+
+    if not final_candidates_for_llm:
+        return PreparedRecommendation(None, None)
+
+    # 캐시 조회: 영양 상태/선호도/후보가 같고 쿼리가 충분히 비슷하면 LLM 호출 생략
+    catalog_version = await sync_to_async(food_index.get_catalog_version)()
+    fingerprint = user_fingerprint(
+        nutrition_summary,
+        allergy_ids=[allergen.id for allergen in user_allergies],
+        liked_food_ids=[pref.food_id for pref in liked_food_prefs],
+        disliked_food_ids=disliked_food_ids,
+        is_vegetarian=profile.is_vegetarian,
+        candidate_ids=[food.id for food in final_candidates_for_llm],
+        catalog_version=catalog_version,
+    )
+    cache_key = make_recommendation_key(user.id, fingerprint, query_text, query_embedding)
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        return PreparedRecommendation(None, cache_key, cached)
+
+    # 4. LLM 프롬프트 구성 및 생성 (영양 정보 요약, 알러지, 비선호 음식 전달)
+    # build_recommendation_prompt 함수가 user_allergies와 disliked_food_prefs를 받도록 수정
+    prompt = build_recommendation_prompt(
+        user,
+        profile,
+        query_text,
+        final_candidates_for_llm,
+        nutrition_summary,
+        user_allergies,
+        disliked_food_prefs,
+        liked_food_prefs # NEW: Pass liked_food_prefs
+    )
+
+    # 디버그 용: FOOD_APP_LOG_LEVEL=DEBUG일 때만 프롬프트 전체 기록
+    logger.debug("LLM prompt (user_id=%s):\n%s", user.id, prompt)
+    return PreparedRecommendation(prompt, cache_key)
 
 
 def build_recommendation_prompt(user, profile, query_text, candidates: list[Food], nutrition_summary: dict, user_allergies, disliked_food_prefs, liked_food_prefs) -> str:
@@ -193,22 +200,22 @@ def build_recommendation_prompt(user, profile, query_text, candidates: list[Food
             f"  - 맛 특징: {', '.join(food.taste_profile)}\n"
             f"  - 관련 상황: {', '.join(food.situational_tags)}"
             # NEW: 음식 자체의 알러지 정보도 LLM에 전달
-            f"  - 음식 알러지 유발 항원: {', '.join([a.name for a in food.allergens.all()]) if food.allergens.exists() else '없음'}"
+            f"  - 음식 알러지 유발 항원: {', '.join([a.name for a in food.allergens.all()]) or '없음'}"
         )
         candidate_details.append(details)
     
     constraints = []
     if profile.is_vegetarian:
         constraints.append("채식주의자입니다.")
-    if user_allergies.exists():
-        allergy_names = ", ".join([allergen.name for allergen in user_allergies.all()])
+    if user_allergies:
+        allergy_names = ", ".join([allergen.name for allergen in user_allergies])
         constraints.append(f"'{allergy_names}'에 알러지가 있습니다.")
     
-    if disliked_food_prefs.exists():
+    if disliked_food_prefs:
         disliked_food_names = ", ".join([pref.food.representative_name for pref in disliked_food_prefs])
         constraints.append(f"'{disliked_food_names}'을(를) 싫어합니다.")
 
-    if liked_food_prefs.exists(): # NEW: Add liked foods to constraints
+    if liked_food_prefs: # NEW: Add liked foods to constraints
         liked_food_names = ", ".join([pref.food.representative_name for pref in liked_food_prefs])
         constraints.append(f"'{liked_food_names}'을(를) 선호합니다. 가능한 이 음식들을 우선적으로 고려하거나 이와 유사한 것을 추천해주세요.")
 
@@ -228,6 +235,8 @@ def build_recommendation_prompt(user, profile, query_text, candidates: list[Food
         macro_guidance = "탄수화물 섭취 비중이 높아 보이니, 탄수화물이 적은 메뉴를 우선적으로 고려해주세요."
     # --- 문구 생성 완료 ---
 
+    candidate_text = "\n".join(candidate_details)
+
     prompt = f"""
     # 임무
     당신은 사용자의 현재 영양 상태, 요청사항, 선호도, 그리고 우리가 찾아낸 음식 후보 목록을 종합하여, 가장 적합한 메뉴 한두 가지를 추천하고 그 이유를 친절하게 설명해야 합니다.
@@ -243,7 +252,7 @@ def build_recommendation_prompt(user, profile, query_text, candidates: list[Food
 
     # 추천할 음식 후보 목록
     다음은 사용자의 요청과 관련성이 높고, 제약조건을 만족하는 음식 후보 목록입니다. 각 음식의 영양성분은 100g 기준입니다.
-    {'\n'.join(candidate_details)}
+    {candidate_text}
 
     # 최종 지시
     위 정보를 바탕으로, 다음 규칙을 지켜 답변해주세요:
@@ -342,43 +351,6 @@ def user_profile_view(request):
         return Response(serializer.data)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-# 한끼식사 저장
-@api_view(["GET", "POST"])
-@permission_classes([IsAuthenticated])
-def meal_list_create_view(request):
-    user = request.user
-
-    if request.method == "GET":
-        # Get date from query params, default to today
-        date_str = request.query_params.get('date', None)
-        
-        target_date = timezone.now().date()
-        if date_str:
-            try:
-                target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            except (ValueError, TypeError):
-                # Handle invalid date format, default to today
-                pass
-
-        # Filter meals for the target date
-        meals = Meal.objects.filter(user=user, created_at__date=target_date).prefetch_related('items__food').order_by("created_at")
-        
-        serializer = MealSerializer(meals, many=True)
-        return Response(serializer.data)
-
-    # POST: 새 식사 저장
-    serializer = MealSerializer(data=request.data, context={'request': request})
-    if serializer.is_valid():
-        meal_instance = serializer.save() # Get the saved meal instance
-        
-        # If the meal now has no items, delete the meal itself
-        if not meal_instance.items.exists():
-            meal_instance.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT) # Return 204 No Content for successful deletion
-        
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
 # === NEW: User Food Preference Views ===
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
@@ -386,7 +358,7 @@ def user_food_preference_list_create_view(request):
     user_profile = get_object_or_404(UserProfile, user=request.user)
 
     if request.method == "GET":
-        preferences = UserFoodPreference.objects.filter(user_profile=user_profile)
+        preferences = UserFoodPreference.objects.filter(user_profile=user_profile).select_related('food')
         serializer = UserFoodPreferenceSerializer(preferences, many=True)
         return Response(serializer.data)
 
@@ -426,41 +398,6 @@ def user_food_preference_delete_view(request, food_id):
         return Response({"detail": "해당 음식 선호도를 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
 
 
-# ============================================
-# 1. 경로 설정 (프로젝트 루트 기준)
-# ============================================
-BASE_DIR = settings.BASE_DIR
-
-CKPT_PATH = os.path.join(
-    BASE_DIR, "checkpoints_convnext_stratified", "best_model.pt"
-)
-
-from ultralytics import YOLO
-
-# ============================================
-# 2. 모델 / 프로세서 전역 로드
-#    (서버 시작 시 한 번만 실행)
-# ============================================
-print("[INFO] Loading checkpoint:", CKPT_PATH)
-ckpt = torch.load(CKPT_PATH, map_location="cpu")
-
-CLASSES = ckpt["classes"]
-MODEL_NAME = ckpt["model_name"]
-
-model = AutoModelForImageClassification.from_pretrained(
-    MODEL_NAME,
-    num_labels=len(CLASSES),
-    ignore_mismatched_sizes=True,
-)
-model.load_state_dict(ckpt["model_state_dict"])
-model.eval()
-
-processor = AutoImageProcessor.from_pretrained(MODEL_NAME)
-
-# YOLO 모델 로드 (없으면 자동 다운로드)
-print("[INFO] Loading YOLO model...")
-yolo_model = YOLO("yolo11n.pt") 
-
 # (선택) “영양성분함량기준” 같은 컬럼이 있다면 쓸 수 있는 파서
 def parse_base_grams(value: str, default: float = 100.0) -> float:
     if not isinstance(value, str):
@@ -475,106 +412,9 @@ def parse_base_grams(value: str, default: float = 100.0) -> float:
     return default
 
 
-def predict_class_from_pil(img: Image.Image) -> str:
-    """PIL 이미지 → 대표식품명(food_class) 예측"""
-    # Convert RGBA/P to RGB if necessary
-    if img.mode != "RGB":
-        img = img.convert("RGB")
-        
-    inputs = processor(images=img, return_tensors="pt")
-    with torch.no_grad():
-        logits = model(**inputs).logits
-    pred_idx = logits.argmax(-1).item()
-    return CLASSES[pred_idx]
-
-
 def get_food_options_by_class(pred_class: str):
-    """대표식품명(food_class) → 해당하는 식품명 목록 (DB 사용)"""
-    foods = Food.objects.filter(food_class=pred_class).values(
-        'id', 'representative_name', 'food_class'
-    ).distinct()
-    return list(foods)
-
-
-# ============================================
-# 3. API: 이미지 → 대표식품명 + 식품명 후보 (YOLO 다중 객체 탐지 적용)
-# ============================================
-@api_view(["POST"])
-@parser_classes([MultiPartParser, FormParser])
-@permission_classes([IsAuthenticated])
-def predict_food(request):
-    """
-    POST /api/predict/
-    - form-data: image (파일)
-    응답:
-    {
-      "detected_foods": [
-        {
-            "index": 0,
-            "pred_class": "국밥",
-            "food_options": [...],
-            "bbox": [x1, y1, x2, y2]
-        },
-        ...
-      ]
-    }
-    """
-    img_file = request.FILES.get("image")
-    if not img_file:
-        return Response(
-            {"detail": "image 파일이 필요합니다."},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
-    try:
-        img = Image.open(img_file).convert("RGB")
-    except Exception as e:
-        return Response({"detail": "이미지 파일을 열 수 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
-
-    # 1. YOLO로 객체 탐지
-    # conf=0.25 (기본값), save=False, device='cpu' (CUDA 오류 방지)
-    yolo_results = yolo_model(img, verbose=False, device='cpu') 
-    
-    detected_foods = []
-    
-    # 결과가 있고, 탐지된 박스가 1개 이상인 경우
-    if yolo_results and len(yolo_results[0].boxes) > 0:
-        boxes = yolo_results[0].boxes
-        
-        for i, box in enumerate(boxes):
-            # Bounding Box 좌표 (x1, y1, x2, y2)
-            x1, y1, x2, y2 = box.xyxy[0].tolist()
-            
-            # 이미지 Crop
-            crop_img = img.crop((x1, y1, x2, y2))
-            
-            # Crop된 이미지로 분류 수행
-            pred_class = predict_class_from_pil(crop_img)
-            options = get_food_options_by_class(pred_class)
-            
-            detected_foods.append({
-                "index": i,
-                "pred_class": pred_class,
-                "food_options": options,
-                "bbox": [x1, y1, x2, y2]
-            })
-    
-    # 탐지된 객체가 없으면 전체 이미지를 대상으로 1회 수행 (Fallback)
-    if not detected_foods:
-        pred_class = predict_class_from_pil(img)
-        options = get_food_options_by_class(pred_class)
-        detected_foods.append({
-            "index": 0,
-            "pred_class": pred_class,
-            "food_options": options,
-            "bbox": [0, 0, img.width, img.height]
-        })
-
-    return Response(
-        {
-            "detected_foods": detected_foods,
-        }
-    )
+    """대표식품명(food_class) → 해당하는 식품명 목록 (인메모리 인덱스, DB 조회 없음)"""
+    return food_index.options_for_class(pred_class)
 
 
 # ============================================
@@ -586,6 +426,15 @@ def food_options(request):
     """
     GET /api/food-options/?class=국밥 OR /api/food-options/?name=김치찌개
     Search for food options by class or by name.
+
+    - class만: 해당 대표식품명(food_class)의 식품 목록
+    - name만: /api/food-search/와 같은 자동완성 검색의 전체 결과 (search_index 참고)
+        * 대소문자/공백을 무시합니다. ("유부초밥"은 "유부 초밥"과 일치, 공백만 있는 name은 결과 없음)
+        * 마지막 글자가 입력 중인 글자(자모 하나, 받침 없는 음절)면 다음 음절의 앞부분으로 매칭합니다.
+          ("김치찌" → 김치찜, 김치찌개 / "기" → 김밥, 기무치)
+        * 초성만 입력하면 초성으로 매칭합니다. ("ㄱㅊㅉㄱ" → 김치찌개)
+        * 순서: 이름 완전 일치 > 앞부분 일치 > 일치 위치가 앞인 순 > 짧은 이름 순
+    - class와 name 모두: 해당 대표식품명 중 이름에 name이 포함된 식품 (icontains)
     """
     food_class = request.query_params.get("class")
     food_name = request.query_params.get("name")
@@ -593,6 +442,15 @@ def food_options(request):
     if not food_class and not food_name:
         return Response({"detail": "class 또는 name 파라미터 중 하나는 필수입니다."}, status=status.HTTP_400_BAD_REQUEST)
 
+    # class만으로 조회하는 경우는 예측 결과와 같은 인메모리 인덱스 사용
+    if food_class and not food_name:
+        return Response({"pred_class": food_class, "food_options": food_index.options_for_class(food_class)})
+
+    # 이름만으로 검색하는 경우는 자동완성과 같은 검색 인덱스 사용 (전체 결과)
+    if food_name and not food_class:
+        _, options = search_foods(food_name, limit=len(search_index.get_index().rows))
+        return Response({"pred_class": "", "food_options": options})
+
     foods_queryset = Food.objects.all()
 
     if food_class:
@@ -611,6 +469,48 @@ def food_options(request):
     )
 
 
+# ============================================
+# 4-1. API: 음식 이름 자동완성 검색 (자모 n-gram / 초성 검색)
+# ============================================
+FOOD_SEARCH_DEFAULT_LIMIT = 20
+FOOD_SEARCH_MAX_LIMIT = 50
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def food_search_view(request):
+    """
+    GET /api/food-search/?q=김치ㅉ&limit=20&offset=0
+    GET /api/food-search/?q=ㄱㅊㅉㄱ   (초성 검색)
+    응답:
+    {
+      "query": "김치ㅉ",
+      "count": 3,              # 전체 일치 수
+      "results": [{"id": 1, "representative_name": "김치찌개", "food_class": "김치찌개"}, ...],
+      "next_offset": null      # 다음 페이지가 없으면 null
+    }
+    """
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return Response({"detail": "q 파라미터는 필수입니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = min(max(int(request.query_params.get("limit", FOOD_SEARCH_DEFAULT_LIMIT)), 1), FOOD_SEARCH_MAX_LIMIT)
+        offset = max(int(request.query_params.get("offset", 0)), 0)
+    except ValueError:
+        return Response({"detail": "limit, offset은 숫자여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+    count, results = search_foods(query, limit=limit, offset=offset)
+    return Response(
+        {
+            "query": query,
+            "count": count,
+            "results": results,
+            "next_offset": offset + limit if offset + limit < count else None,
+        }
+    )
+
+
 # ============================================
 # 5. API: 식품 ID + 중량 → 영양성분 계산
 # ============================================
@@ -672,3 +572,99 @@ def calc_nutrition_view(request):
             "nutrition": nutrition, 
         }
     )
+
+
+# ============================================
+# 6. API: 기간별 영양 합계 (일/주/월 대시보드)
+# ============================================
+NUTRITION_SUMMARY_DEFAULT_DAYS = 7
+NUTRITION_SUMMARY_MAX_DAYS = 366
+# 허용 날짜 범위. 기간 끝 다음 날 계산이나 시간대 변환에서 date 범위를 넘지 않도록 양 끝을 제한
+NUTRITION_SUMMARY_MIN_DATE = date(1900, 1, 1)
+NUTRITION_SUMMARY_MAX_DATE = date.max - timedelta(days=1)
+
+
+def _parse_date_param(value: str | None):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def nutrition_summary_view(request):
+    """
+    GET /api/nutrition/summary/?from=2025-09-01&to=2025-11-30&granularity=week
+    - from/to: YYYY-MM-DD (포함). 기본값은 오늘까지 최근 7일
+    - granularity: day | week(월요일 시작) | month. 기본값 day
+    응답:
+    {
+      "from": "2025-09-01", "to": "2025-11-30", "granularity": "week",
+      "periods": [{"period": "2025-09-01", "meal_count": 12, "energy_kcal": 9870.5, "protein_g": ..., ...}, ...],
+      "totals": {"meal_count": 80, "energy_kcal": ..., ...}
+    }
+    식사가 없는 기간은 periods에 포함되지 않습니다. 기간 전체를 DB에서 한 번에 집계합니다.
+    """
+    granularity = request.query_params.get("granularity", "day")
+    if granularity not in GRANULARITIES:
+        return Response({"detail": "granularity는 day, week, month 중 하나여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        end = _parse_date_param(request.query_params.get("to")) or timezone.localdate()
+        start = _parse_date_param(request.query_params.get("from"))
+    except ValueError:
+        return Response({"detail": "from, to는 YYYY-MM-DD 형식이어야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+    if any(
+        value is not None and not NUTRITION_SUMMARY_MIN_DATE <= value <= NUTRITION_SUMMARY_MAX_DATE
+        for value in (start, end)
+    ):
+        return Response(
+            {"detail": f"from, to는 {NUTRITION_SUMMARY_MIN_DATE}부터 {NUTRITION_SUMMARY_MAX_DATE}까지만 조회할 수 있습니다."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if start is None:
+        start = end - timedelta(days=NUTRITION_SUMMARY_DEFAULT_DAYS - 1)
+    if start > end:
+        return Response({"detail": "from은 to보다 늦을 수 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days + 1 > NUTRITION_SUMMARY_MAX_DAYS:
+        return Response(
+            {"detail": f"조회 기간은 최대 {NUTRITION_SUMMARY_MAX_DAYS}일입니다."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    periods = nutrition_totals(request.user, start, end, granularity)
+    totals = {"meal_count": sum(row["meal_count"] for row in periods)}
+    for field_name in NUTRIENT_FIELDS:
+        totals[field_name] = round(sum(row[field_name] for row in periods), 2)
+        for row in periods:
+            row[field_name] = round(row[field_name], 2)
+
+    return Response(
+        {
+            "from": start,
+            "to": end,
+            "granularity": granularity,
+            "periods": periods,
+            "totals": totals,
+        }
+    )
+
+
+# ============================================
+# 7. API: 운영 지표 (Prometheus text 형식)
+# ============================================
+def metrics_view(request):
+    """
+    GET /api/metrics
+    구간별/요청별 소요 시간 히스토그램 (tracing 참고) + 프로세스 내 캐시/마이크로 배처 통계.
+    인증 없이 열려 있으므로 외부에 노출되지 않도록 프록시에서 접근을 제한하세요.
+    """
+    cache_stats = {
+        "prediction": prediction_cache.stats(),
+        "recommendation": recommendation_cache.stats(),
+        "query_embedding": embedding_cache_stats(),
+    }
+    # 모델을 로드하지 않는 웹 워커에서 torch 등을 import하지 않도록, 이미 로드된 경우에만 조회
+    inference = sys.modules.get("food_app.inference")
+    batcher_stats = inference.micro_batch_stats() if inference is not None else {}
+    return HttpResponse(
+        render_metrics(cache_stats, batcher_stats), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,6 +1,13 @@
+import argparse
+import json
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import openai
 import pandas as pd
-import json
 from openai import OpenAI
 from dotenv import load_dotenv
 from tqdm import tqdm
@@ -12,30 +19,62 @@ load_dotenv()
 API_KEY = os.getenv("OPENAI_API_KEY")
 if not API_KEY:
     raise ValueError("OPENAI_API_KEY가 .env 파일에 없습니다.")
+# 로컬 스텁 서버(manage.py run_llm_stub)로 테스트할 때: OPENAI_BASE_URL=http://127.0.0.1:8001/v1
+BASE_URL = os.getenv("OPENAI_BASE_URL") or None
 
 INPUT_CSV_PATH = 'food_project/data/클래스별_최종_영양DB.csv'
 OUTPUT_CSV_PATH = 'food_project/data/enriched_food_data_ko.csv'
+# 음식 하나가 끝날 때마다 한 줄씩 추가되는 진행 기록. 다시 실행하면 여기 있는 음식은 건너뜁니다.
+CHECKPOINT_PATH = 'food_project/data/enriched_food_data_ko.jsonl'
 FOOD_NAME_COLUMN = '대표식품명'
 FOOD_NAME_COLUMN_KO = '대표식품명' # Keep consistent column naming
 
+CONCURRENCY = int(os.getenv("DESCRIPTION_CONCURRENCY", "8"))           # 동시 요청 수
+RATE_PER_SECOND = float(os.getenv("DESCRIPTION_RATE_PER_SECOND", "5"))  # 초당 요청 수 (토큰 버킷)
+MAX_RETRIES = int(os.getenv("DESCRIPTION_MAX_RETRIES", "5"))
+
+# 재시도할 오류: 요청 한도 초과, 서버 오류, 연결/타임아웃
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,  # APITimeoutError 포함
+)
+
 # --- OpenAI Client ---
-client = OpenAI(api_key=API_KEY)
+# 재시도는 아래 generate_description에서 백오프와 함께 직접 처리합니다.
+client = OpenAI(api_key=API_KEY, base_url=BASE_URL, max_retries=0)
 
-def generate_description(food_name):
-    """
-    Generates a rich description for a food item using OpenAI API in Korean,
-    with Korean keys in the JSON output.
-    """
-    if not isinstance(food_name, str) or food_name.strip().upper() == 'UNKNOWN':
-        return json.dumps({
-            "설명": "인식할 수 없는 음식 항목입니다. 이미지 분류가 명확하지 않을 때 사용되는 값입니다.",
-            "주요_재료": [],
-            "맛_특징": [],
-            "조리_방식": "",
-            "상황_태그": ["재촬영 필요", "명확하지 않은 이미지"]
-        }, ensure_ascii=False)
 
-    prompt = f"""
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷 (스레드 안전)"""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """지수 백오프 + full jitter: 0 ~ min(cap, base * 2^attempt)초"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def build_prompt(food_name):
+    return f"""
     음식 '{food_name}'에 대한 상세 설명을 생성해주세요.
     응답은 반드시 JSON 형식이어야 하며, 다음 **한글 키**들을 포함해야 합니다:
     - "설명": 음식에 대한 전반적인 개요.
@@ -56,25 +95,126 @@ def generate_description(food_name):
     이제 '{food_name}'에 대한 JSON을 생성해주세요:
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
-                {"role": "system", "content": "당신은 한국 음식에 대한 구조화된 데이터를, 요청된 한글 키를 사용한 JSON 형식으로 제공하는 유용한 어시스턴트입니다."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.7,
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"'{food_name}'에 대한 OpenAI API 호출 중 오류 발생: {e}")
+
+def generate_description(food_name, rate_limiter=None, max_retries=MAX_RETRIES):
+    """
+    Generates a rich description for a food item using OpenAI API in Korean,
+    with Korean keys in the JSON output.
+    Returns a dict, or None when every attempt failed.
+    """
+    if not isinstance(food_name, str) or food_name.strip().upper() == 'UNKNOWN':
+        return {
+            "설명": "인식할 수 없는 음식 항목입니다. 이미지 분류가 명확하지 않을 때 사용되는 값입니다.",
+            "주요_재료": [],
+            "맛_특징": [],
+            "조리_방식": "",
+            "상황_태그": ["재촬영 필요", "명확하지 않은 이미지"]
+        }
+
+    prompt = build_prompt(food_name)
+    for attempt in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            response = client.chat.completions.create(
+                model="gpt-4.1-mini",
+                messages=[
+                    {"role": "system", "content": "당신은 한국 음식에 대한 구조화된 데이터를, 요청된 한글 키를 사용한 JSON 형식으로 제공하는 유용한 어시스턴트입니다."},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.7,
+            )
+            content = response.choices[0].message.content
+            result = json.loads(content)
+            if not isinstance(result, dict):
+                # 배열/문자열 등 유효한 JSON이지만 객체가 아니면 잘못된 응답으로 보고 재시도
+                raise json.JSONDecodeError(f"JSON 객체가 아닙니다 ({type(result).__name__})", content, 0)
+            return result
+        except (*RETRYABLE_ERRORS, json.JSONDecodeError) as e:
+            if attempt == max_retries:
+                tqdm.write(f"'{food_name}' 설명 생성 실패 ({max_retries + 1}회 시도): {e}")
+                return None
+            delay = backoff_delay(attempt)
+            tqdm.write(f"'{food_name}' 재시도 {attempt + 1}/{max_retries} ({delay:.1f}초 후): {e}")
+            time.sleep(delay)
+        except Exception as e:
+            # 인증 오류, 잘못된 요청 등은 재시도해도 같으므로 바로 포기
+            tqdm.write(f"'{food_name}'에 대한 OpenAI API 호출 중 오류 발생: {e}")
+            return None
+
+
+def load_checkpoint(path):
+    """
+    체크포인트 JSONL -> {음식 이름: 생성 결과}
+    중단 중에 잘린 마지막 줄이나 음식 이름이 없는 줄은 무시합니다. (다음 실행에서 다시 생성)
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(record, dict) or not isinstance(record.get(FOOD_NAME_COLUMN_KO), str):
+                continue
+            done[record[FOOD_NAME_COLUMN_KO]] = record
+    return done
+
+
+class CheckpointWriter:
+    """결과를 한 줄씩 추가하고 바로 디스크에 기록 (여러 스레드에서 호출)"""
+
+    def __init__(self, path):
+        # 이전 실행이 줄 중간에 끊겼다면 새 기록이 그 줄에 이어 붙지 않도록 줄바꿈부터
+        needs_newline = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        self._file = open(path, 'a', encoding='utf-8')
+        if needs_newline:
+            self._file.write("\n")
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def write_output_csv(food_names, done, path):
+    """체크포인트 결과를 입력 순서대로 CSV로 저장"""
+    results = [done[name] for name in food_names if name in done]
+    if not results:
         return None
 
+    enriched_df = pd.DataFrame(results)
+    cols = [FOOD_NAME_COLUMN_KO] + [col for col in enriched_df.columns if col != FOOD_NAME_COLUMN_KO]
+    enriched_df = enriched_df[cols]
+    enriched_df.to_csv(path, index=False, encoding='utf-8-sig')
+    return enriched_df
+
+
 def main():
     """
-    Main function to read CSV, generate descriptions, and save the new CSV.
+    Main function to read CSV, generate descriptions concurrently, and save the new CSV.
     """
+    parser = argparse.ArgumentParser(description="대표식품명별 음식 설명 생성 (중단 후 이어서 실행 가능)")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='동시 요청 수')
+    parser.add_argument('--rate', type=float, default=RATE_PER_SECOND, help='초당 최대 요청 수')
+    parser.add_argument('--max-retries', type=int, default=MAX_RETRIES)
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument('--output', default=OUTPUT_CSV_PATH)
+    args = parser.parse_args()
+
     print(f"{INPUT_CSV_PATH} 에서 데이터를 읽는 중...")
     try:
         df = pd.read_csv(INPUT_CSV_PATH)
@@ -82,46 +222,52 @@ def main():
         print(f"오류: {INPUT_CSV_PATH} 에서 파일을 찾을 수 없습니다.")
         return
 
-    unique_foods = df.drop_duplicates(subset=[FOOD_NAME_COLUMN]).copy()
-    unique_foods[FOOD_NAME_COLUMN] = unique_foods[FOOD_NAME_COLUMN].fillna('')
-    
-    process_df = unique_foods
-    print(f"{len(process_df)}개의 고유한 음식 설명을 생성합니다...")
-
-    results = []
-    for food_name in tqdm(process_df[FOOD_NAME_COLUMN], desc="설명 생성 중"):
-        if not food_name: # Skip empty food names
-            continue
-            
-        print(f"\n{food_name}에 대한 설명 생성 중...")
-        generated_json_str = generate_description(food_name)
-
-        if generated_json_str:
-            try:
-                generated_data = json.loads(generated_json_str)
+    food_names = [name for name in df[FOOD_NAME_COLUMN].fillna('').drop_duplicates() if name]
+    done = load_checkpoint(args.checkpoint)
+    pending = [name for name in food_names if name not in done]
+    print(f"{len(food_names)}개의 고유한 음식 중 {len(food_names) - len(pending)}개는 이미 생성됨 "
+          f"({args.checkpoint}), {len(pending)}개를 생성합니다...")
+
+    failed = []
+    if pending:
+        rate_limiter = TokenBucket(args.rate)
+        checkpoint = CheckpointWriter(args.checkpoint)
+        executor = ThreadPoolExecutor(max_workers=args.concurrency)
+        try:
+            futures = {
+                executor.submit(generate_description, name, rate_limiter, args.max_retries): name
+                for name in pending
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc="설명 생성 중"):
+                food_name = futures[future]
+                generated_data = future.result()
+                if generated_data is None:
+                    failed.append(food_name)
+                    continue
                 generated_data[FOOD_NAME_COLUMN_KO] = food_name
-                results.append(generated_data)
-                print(f"{food_name}에 대한 데이터 생성 성공")
-            except json.JSONDecodeError as e:
-                print(f"오류: {food_name}에 대한 JSON 응답을 디코딩할 수 없습니다: {e}")
-                print("받은 응답:", generated_json_str)
+                checkpoint.write(generated_data)
+                done[food_name] = generated_data
+        except BaseException:
+            # Ctrl-C/오류로 중단되면 대기 중인 요청은 보내지 않음 (결과를 기록하지 못해 비용만 나감)
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        else:
+            executor.shutdown()
+        finally:
+            checkpoint.close()
 
-    if not results:
+    if failed:
+        print(f"\n{len(failed)}개 음식의 설명 생성에 실패했습니다. 다시 실행하면 실패한 음식만 재시도합니다: {failed}")
+
+    print(f"\n{args.output}에 강화된 데이터를 저장 중...")
+    enriched_df = write_output_csv(food_names, done, args.output)
+    if enriched_df is None:
         print("생성된 설명이 없습니다. 종료합니다.")
         return
 
-    enriched_df = pd.DataFrame(results)
-
-    if not enriched_df.empty:
-        cols = [FOOD_NAME_COLUMN_KO] + [col for col in enriched_df.columns if col != FOOD_NAME_COLUMN_KO]
-        enriched_df = enriched_df[cols]
-
-    print(f"\n{OUTPUT_CSV_PATH}에 강화된 데이터를 저장 중...")
-    enriched_df.to_csv(OUTPUT_CSV_PATH, index=False, encoding='utf-8-sig')
-
     print("--- 강화된 데이터 샘플 ---")
     print(enriched_df.head())
     print("\n프로세스가 성공적으로 완료되었습니다!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()